@@ -3,7 +3,11 @@ from flask_login import current_user
 
 from config import config_map
 from .extensions import db, login_manager, csrf
-from .db_mongo import close_mongo_client
+from .db_mongo import init_audit_writer
+from .login_guard import login_limiter, password_pool
+from .security_utils import DEFAULT_HASH_METHOD, set_hash_method
+from .user_cache import user_cache
+from . import mongo_indexes
 
 
 def create_hospital_app(config_name: str = "default") -> Flask:
@@ -20,10 +24,29 @@ def create_hospital_app(config_name: str = "default") -> Flask:
     db.init_app(app)
     login_manager.init_app(app)
     csrf.init_app(app)
+    init_audit_writer(app)
 
     # Login manager configuration
     login_manager.login_view = "auth.login"
     login_manager.login_message_category = "warning"
+    user_cache.configure(
+        ttl=app.config.get("USER_CACHE_TTL", 60),
+        max_entries=app.config.get("USER_CACHE_MAX_ENTRIES", 1024),
+    )
+
+    # Password hashing and the login rate limit
+    set_hash_method(app.config.get("PASSWORD_HASH_METHOD", DEFAULT_HASH_METHOD))
+    password_pool.configure(
+        workers=app.config.get("PASSWORD_WORKERS", 2),
+        max_pending=app.config.get("PASSWORD_MAX_PENDING", 32),
+        timeout=app.config.get("PASSWORD_TIMEOUT", 10.0),
+    )
+    login_limiter.configure(
+        user_burst=app.config.get("LOGIN_USER_BURST", 5),
+        user_per_minute=app.config.get("LOGIN_USER_PER_MINUTE", 10),
+        ip_burst=app.config.get("LOGIN_IP_BURST", 20),
+        ip_per_minute=app.config.get("LOGIN_IP_PER_MINUTE", 60),
+    )
 
     # Register blueprints
     from .auth import auth_bp
@@ -41,8 +64,8 @@ def create_hospital_app(config_name: str = "default") -> Flask:
             return redirect(url_for("insights.dashboard"))
         return redirect(url_for("auth.login"))
 
-    # Close Mongo client at the end of the app context
-    app.teardown_appcontext(close_mongo_client)
+    # Create the declared MongoDB indexes (no-op when they already exist)
+    mongo_indexes.init_app(app)
 
     # Create SQL tables (for users etc.) on first run
     with app.app_context():
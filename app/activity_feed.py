@@ -0,0 +1,154 @@
+"""
+In-process fan-out of new audit entries to live activity streams.
+
+``log_activity`` publishes every entry to ``activity_feed``, and each
+browser watching ``/insights/activity-stream`` (Server-Sent Events) holds
+one ``Subscription``. Publishing copies a reference to the entry into
+each subscriber's buffer and never waits, so one write serves any
+number of viewers without a database read per viewer.
+
+Each buffer holds at most ``buffer_size`` entries. A subscriber that
+falls that far behind (a stalled or very slow connection) is evicted:
+its buffer is dropped and its stream ends with an ``evicted`` event, and
+the browser reconnects. Slow viewers therefore cost bounded memory and
+never delay the request that logged the entry.
+
+The last ``history`` entries are kept so a reconnecting browser can
+resume from the ``Last-Event-ID`` it saw. Event ids are per process,
+and so is the feed: with several worker processes a stream shows the
+entries logged by its own worker.
+"""
+
+import itertools
+import os
+import threading
+from collections import deque
+
+
+class Subscription:
+    """
+    Bounded buffer of entries for one live stream.
+    """
+
+    def __init__(self, feed: "ActivityFeed", buffer_size: int):
+        self._feed = feed
+        self._entries = deque()
+        self._ready = threading.Condition(threading.Lock())
+        self.buffer_size = buffer_size
+        self.evicted = False
+
+    def _offer(self, event: tuple) -> bool:
+        """
+        Queue ``event`` unless the buffer is full; returns False if full.
+        """
+        with self._ready:
+            if len(self._entries) >= self.buffer_size:
+                self.evicted = True
+                self._entries.clear()
+                self._ready.notify()
+                return False
+            self._entries.append(event)
+            self._ready.notify()
+            return True
+
+    def get(self, timeout: float) -> list:
+        """
+        Wait up to ``timeout`` seconds for entries; returns every buffered
+        ``(event_id, entry)`` pair, or [] on timeout or eviction.
+        """
+        with self._ready:
+            if not self._entries and not self.evicted:
+                self._ready.wait(timeout)
+            events = list(self._entries)
+            self._entries.clear()
+            return events
+
+    def close(self) -> None:
+        self._feed.unsubscribe(self)
+
+
+class ActivityFeed:
+    """
+    Publish/subscribe hub for audit entries within one process.
+    """
+
+    def __init__(self, buffer_size: int = 100, history: int = 100, max_subscribers: int = 50):
+        self.buffer_size = buffer_size
+        self.max_subscribers = max_subscribers
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._history = deque(maxlen=history)
+        self._ids = itertools.count(1)
+        self._pid = os.getpid()
+        self.published = 0
+        self.evicted = 0
+        self.rejected = 0
+
+    def configure(self, buffer_size: int, history: int, max_subscribers: int) -> None:
+        with self._lock:
+            self.buffer_size = buffer_size
+            self.max_subscribers = max_subscribers
+            self._history = deque(self._history, maxlen=history)
+
+    def _check_fork(self) -> None:
+        # Subscribers belong to the parent's connections; start afresh
+        if self._pid != os.getpid():
+            self._subscribers = set()
+            self._history.clear()
+            self._pid = os.getpid()
+
+    def subscribe(self, last_event_id: int | None = None) -> Subscription | None:
+        """
+        New subscription, or None if ``max_subscribers`` streams are open.
+
+        With ``last_event_id``, entries after it that are still in the
+        history are buffered straight away.
+        """
+        with self._lock:
+            self._check_fork()
+            if len(self._subscribers) >= self.max_subscribers:
+                self.rejected += 1
+                return None
+            subscription = Subscription(self, self.buffer_size)
+            if last_event_id is not None:
+                missed = [event for event in self._history if event[0] > last_event_id]
+                for event in missed[-self.buffer_size:]:
+                    subscription._offer(event)
+            self._subscribers.add(subscription)
+            return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, entry: dict) -> int:
+        """
+        Hand ``entry`` to every subscriber; returns its event id.
+        """
+        with self._lock:
+            self._check_fork()
+            event = (next(self._ids), entry)
+            self._history.append(event)
+            self.published += 1
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            if not subscription._offer(event):
+                self.unsubscribe(subscription)
+                with self._lock:
+                    self.evicted += 1
+        return event[0]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "subscribers": len(self._subscribers),
+                "max_subscribers": self.max_subscribers,
+                "buffer_size": self.buffer_size,
+                "published": self.published,
+                "evicted": self.evicted,
+                "rejected": self.rejected,
+            }
+
+
+# Shared by every request in this worker process
+activity_feed = ActivityFeed()
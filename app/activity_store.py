@@ -0,0 +1,153 @@
+"""
+Storage of the activity log: retention and rollups.
+
+``activity_logs`` is a regular collection. Entries older than
+``AUDIT_RETENTION_DAYS`` are removed by a TTL index on ``timestamp``
+(``timestamp_ttl``). A regular collection keeps the activity log pages
+(``insights.activity``) bounded: each filter pages through a range of a
+``(..., timestamp, _id)`` index.
+
+``activity_rollups`` holds action counts per hour and per day, one
+document per period::
+
+    {"_id": "hour:2024-05-01T13", "period": "hour",
+     "start": datetime(2024, 5, 1, 13), "total": 42,
+     "counts": {"CREATE_PATIENT": 30, "DELETE_PATIENT": 12}}
+
+``write_rollups`` adds a batch of entries with one ``$inc`` upsert per
+period touched; the audit writer calls it with every batch it inserts.
+Rollups are not expired with the raw entries, so the activity-over-time
+view can show periods whose entries are gone.
+``flask --app server activity-storage --rebuild-rollups`` recounts them
+from the stored entries (e.g. for entries logged before rollups existed).
+"""
+
+from datetime import datetime, timedelta
+
+from pymongo import ASCENDING, IndexModel, UpdateOne
+
+ACTIVITY_COLLECTION = "activity_logs"
+ROLLUP_COLLECTION = "activity_rollups"
+# Expires entries after the retention period
+TTL_INDEX_NAME = "timestamp_ttl"
+
+ROLLUP_PERIODS = ("hour", "day")
+PERIOD_LENGTH = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+
+
+def period_start(timestamp: datetime, period: str) -> datetime:
+    """
+    Start of the hour or day containing ``timestamp``.
+    """
+    start = timestamp.replace(minute=0, second=0, microsecond=0)
+    return start.replace(hour=0) if period == "day" else start
+
+
+def rollup_id(period: str, start: datetime) -> str:
+    return f"{period}:{start.strftime('%Y-%m-%dT%H' if period == 'hour' else '%Y-%m-%d')}"
+
+
+def _count_key(action: str) -> str:
+    # Field names may not contain "." or start with "$"
+    return (action or "UNKNOWN").replace(".", "_").lstrip("$") or "UNKNOWN"
+
+
+def rollup_updates(entries) -> list:
+    """
+    One ``$inc`` upsert per (period, start) touched by ``entries``.
+    """
+    increments = {}
+    for entry in entries:
+        key = f"counts.{_count_key(entry.get('action'))}"
+        for period in ROLLUP_PERIODS:
+            start = period_start(entry["timestamp"], period)
+            inc = increments.setdefault((period, start), {"total": 0})
+            inc["total"] += 1
+            inc[key] = inc.get(key, 0) + 1
+    return [
+        UpdateOne(
+            {"_id": rollup_id(period, start)},
+            {"$inc": inc, "$setOnInsert": {"period": period, "start": start}},
+            upsert=True,
+        )
+        for (period, start), inc in increments.items()
+    ]
+
+
+def write_rollups(rollup_coll, entries) -> None:
+    """
+    Add ``entries`` to the hourly and daily rollups.
+    """
+    updates = rollup_updates(entries)
+    if updates:
+        rollup_coll.bulk_write(updates, ordered=False)
+
+
+def rollup_series(docs, period: str, since: datetime, until: datetime) -> list:
+    """
+    Rollup rows for every period from ``since`` to ``until``, with empty
+    periods filled in as zero counts, oldest first.
+    """
+    by_start = {doc["start"]: doc for doc in docs}
+    rows = []
+    start = period_start(since, period)
+    while start <= until:
+        doc = by_start.get(start) or {}
+        rows.append({"start": start, "total": doc.get("total", 0), "counts": doc.get("counts", {})})
+        start += PERIOD_LENGTH[period]
+    return rows
+
+
+def ensure_activity_storage(db, retention_days: int) -> None:
+    """
+    Apply the retention period to ``activity_logs`` through its TTL index.
+
+    :param retention_days: days to keep entries; 0 keeps them forever
+    """
+    expire = int(retention_days * 86400) if retention_days else None
+    _ensure_ttl_index(db[ACTIVITY_COLLECTION], expire)
+
+
+def _ensure_ttl_index(coll, expire: int | None) -> None:
+    indexes = coll.index_information()
+    current = indexes.get(TTL_INDEX_NAME, {}).get("expireAfterSeconds")
+    if expire is None:
+        if TTL_INDEX_NAME in indexes:
+            coll.drop_index(TTL_INDEX_NAME)
+    elif TTL_INDEX_NAME not in indexes:
+        coll.create_indexes(
+            [IndexModel([("timestamp", ASCENDING)], name=TTL_INDEX_NAME, expireAfterSeconds=expire)]
+        )
+    elif current != expire:
+        coll.database.command(
+            "collMod",
+            coll.name,
+            index={"name": TTL_INDEX_NAME, "expireAfterSeconds": expire},
+        )
+
+
+def rebuild_rollups(db, batch_size: int = 1000) -> int:
+    """
+    Recount the hourly and daily rollups from the stored entries;
+    returns the entries counted.
+
+    Periods whose entries have expired are lost, and entries logged
+    while this runs may be counted twice.
+    """
+    rollups = db[ROLLUP_COLLECTION]
+    rollups.delete_many({})
+    counted = 0
+    batch = []
+    cursor = db[ACTIVITY_COLLECTION].find(
+        {"timestamp": {"$type": "date"}}, {"action": 1, "timestamp": 1}, batch_size=batch_size
+    )
+    for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            write_rollups(rollups, batch)
+            counted += len(batch)
+            batch = []
+    if batch:
+        write_rollups(rollups, batch)
+        counted += len(batch)
+    return counted
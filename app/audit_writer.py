@@ -0,0 +1,228 @@
+"""
+Buffered, asynchronous writer for audit entries.
+
+``log_activity`` is called on every patient create/update/delete and on
+dataset uploads. Writing the entry with ``insert_one`` inside the request
+added a Mongo round trip to each of those pages. ``AuditWriter`` puts the
+entry on a bounded in-memory queue instead, and a flusher thread writes
+the queue out in batches with ``insert_many``:
+
+- a batch is written once ``batch_size`` entries are waiting or
+  ``flush_interval`` seconds after its first entry, whichever comes first;
+- when Mongo is slow and the queue fills up, ``full_policy`` decides what
+  happens to new entries: ``"block"`` waits up to ``block_timeout``
+  seconds for room and then drops the entry, ``"drop"`` drops it at once,
+  and ``"inline"`` writes it in the calling thread;
+- ``shutdown`` drains the queue; ``db_mongo`` calls it at process exit,
+  before the Mongo client is closed.
+
+Entries that are dropped or fail to write are counted and logged, never
+raised to the caller: losing an audit line must not break a request.
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+
+FULL_POLICIES = ("block", "drop", "inline")
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class AuditWriter:
+    """
+    Bounded queue plus flusher thread feeding ``write_batch(entries)``.
+    """
+
+    def __init__(
+        self,
+        write_batch=None,
+        max_queue: int = 10_000,
+        batch_size: int = 200,
+        flush_interval: float = 0.5,
+        full_policy: str = "block",
+        block_timeout: float = 0.05,
+    ):
+        self.write_batch = write_batch
+        self._lock = threading.Lock()
+        # Signalled whenever queued entries are written or given up on
+        self._settled = threading.Condition(self._lock)
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._thread_pid = None
+        # Entries queued or in the batch being written; bounded by max_queue
+        self._pending = 0
+        self.configure(max_queue, batch_size, flush_interval, full_policy, block_timeout)
+        self.queued = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.inline_writes = 0
+        self.batches = 0
+        self.last_batch_seconds = None
+
+    def configure(
+        self,
+        max_queue: int,
+        batch_size: int,
+        flush_interval: float,
+        full_policy: str,
+        block_timeout: float,
+    ) -> None:
+        """
+        Change the queue limits and the policy for a full queue.
+        """
+        if full_policy not in FULL_POLICIES:
+            raise ValueError(f"full_policy must be one of {FULL_POLICIES}, not {full_policy!r}")
+        with self._lock:
+            self.max_queue = max(1, max_queue)
+            self.batch_size = max(1, batch_size)
+            self.flush_interval = flush_interval
+            self.full_policy = full_policy
+            self.block_timeout = block_timeout
+
+    def _ensure_thread(self) -> None:
+        # Threads do not survive fork(); a child starts its own flusher and
+        # forgets entries the parent had queued (the parent writes those).
+        if self._thread is not None and self._thread_pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread_pid != os.getpid():
+                self._queue = queue.SimpleQueue()
+                self._pending = 0
+                self._thread = None
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="audit-writer", daemon=True
+                )
+                self._thread_pid = os.getpid()
+                self._thread.start()
+
+    def submit(self, entry: dict) -> bool:
+        """
+        Queue one entry for writing; returns False if it was dropped.
+        """
+        self._ensure_thread()
+        with self._lock:
+            if self._pending >= self.max_queue and self.full_policy == "block":
+                self._settled.wait_for(
+                    lambda: self._pending < self.max_queue, self.block_timeout
+                )
+            full = self._pending >= self.max_queue
+            if not full:
+                self._pending += 1
+                self.queued += 1
+                self._queue.put(entry)
+            elif self.full_policy != "inline":
+                self.dropped += 1
+        if not full:
+            return True
+        if self.full_policy == "inline":
+            return self._write([entry], inline=True)
+        logger.warning("Audit queue full (%d entries); entry dropped.", self.max_queue)
+        return False
+
+    def _run(self) -> None:
+        q = self._queue
+        while True:
+            first = q.get()
+            if first is _STOP:
+                return
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            stop = False
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    entry = q.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if entry is _STOP:
+                    stop = True
+                    break
+                batch.append(entry)
+            self._write(batch)
+            self._settle(len(batch))
+            if stop:
+                return
+
+    def _write(self, batch: list, inline: bool = False) -> bool:
+        started = time.perf_counter()
+        try:
+            if self.write_batch is None:
+                raise RuntimeError("AuditWriter has no write_batch configured.")
+            self.write_batch(batch)
+        except Exception as exc:
+            with self._lock:
+                self.failed += len(batch)
+            logger.warning("Failed to write %d audit entries: %s", len(batch), exc)
+            return False
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.flushed += len(batch)
+            self.batches += 1
+            self.last_batch_seconds = elapsed
+            if inline:
+                self.inline_writes += len(batch)
+        return True
+
+    def _settle(self, count: int) -> None:
+        with self._lock:
+            self._pending -= count
+            self._settled.notify_all()
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """
+        Wait until every queued entry has been written (or has failed).
+
+        Returns False if entries are still pending after ``timeout`` seconds.
+        """
+        if self._thread_pid != os.getpid():
+            return True
+        with self._lock:
+            return self._settled.wait_for(lambda: self._pending <= 0, timeout)
+
+    def shutdown(self, timeout: float | None = 10.0) -> bool:
+        """
+        Write out the queued entries and stop the flusher thread.
+        """
+        with self._lock:
+            thread = self._thread if self._thread_pid == os.getpid() else None
+            self._thread = None
+        if thread is None:
+            return True
+        self._queue.put(_STOP)
+        thread.join(timeout)
+        return not thread.is_alive()
+
+    def stats(self) -> dict:
+        """
+        Snapshot of the writer counters, suitable for JSON output.
+        """
+        with self._lock:
+            return {
+                "full_policy": self.full_policy,
+                "max_queue": self.max_queue,
+                "pending": self._pending,
+                "queued": self.queued,
+                "flushed": self.flushed,
+                "dropped": self.dropped,
+                "failed": self.failed,
+                "inline_writes": self.inline_writes,
+                "batches": self.batches,
+                "last_batch_seconds": (
+                    round(self.last_batch_seconds, 4)
+                    if self.last_batch_seconds is not None
+                    else None
+                ),
+            }
+
+
+# Process-wide writer used by db_mongo.log_activity
+audit_writer = AuditWriter()
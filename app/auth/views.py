@@ -1,3 +1,5 @@
+import math
+
 from flask import render_template, redirect, url_for, flash, request
 from flask_login import (
     login_user,
@@ -7,32 +9,69 @@ from flask_login import (
 )
 
 from app.extensions import db
+from app.login_guard import PasswordPoolBusy, login_limiter, password_pool
 from app.models import AppUser
+from app.security_utils import needs_rehash
+from app.user_cache import user_cache
 from . import auth_bp
 from .forms import LoginForm, RegisterForm, ProfileForm
 
 
+def _busy(template: str, form):
+    """
+    503 response for a form whose password work the pool turned away.
+    """
+    flash("The server is busy. Please try again shortly.", "warning")
+    return render_template(template, form=form), 503
+
+
 @auth_bp.route("/login", methods=["GET", "POST"])
 def login():
     """
     Handle user sign-in.
 
     If the user is already authenticated, they are sent to the dashboard.
-    Otherwise, validate the login form and use AppUser.check_password
-    to verify the credentials.
+    Otherwise, validate the login form and verify the credentials on
+    the password pool, after the per-username / per-IP rate limit
+    (see app/login_guard.py). A password stored with an older hash
+    method or cost is re-hashed with the current one.
     """
     if current_user.is_authenticated:
         return redirect(url_for("insights.dashboard"))
 
     form = LoginForm()
     if form.validate_on_submit():
+        # Excess attempts are turned away before any password hashing
+        retry_after = login_limiter.check(form.username.data, request.remote_addr)
+        if retry_after:
+            flash("Too many sign-in attempts. Please wait a moment and try again.", "danger")
+            headers = {"Retry-After": str(math.ceil(retry_after))}
+            return render_template("auth/login.html", form=form), 429, headers
+
         user = AppUser.query.filter_by(username=form.username.data).first()
 
+        try:
+            valid = user is not None and password_pool.verify(
+                form.password.data, user.password_hash
+            )
+        except PasswordPoolBusy:
+            return _busy("auth/login.html", form)
+
         # Invalid username or password
-        if user is None or not user.check_password(form.password.data):
+        if not valid:
             flash("Invalid username or password.", "danger")
             return render_template("auth/login.html", form=form)
 
+        # Re-hash passwords stored with an older method or cost
+        if needs_rehash(user.password_hash):
+            try:
+                user.password_hash = password_pool.hash(form.password.data)
+                db.session.commit()
+                user_cache.invalidate(user.id)
+            except PasswordPoolBusy:
+                # Upgraded at a later sign-in instead
+                pass
+
         # Successful login
         login_user(user, remember=False)
         flash("You have signed in successfully.", "success")
@@ -50,7 +89,7 @@ def register():
     Handle creation of a new user account.
 
     New users are stored in SQLite via AppUser, with the password
-    hashed through AppUser.set_password (which uses security_utils).
+    hashed on the password pool (see app/login_guard.py).
     """
     if current_user.is_authenticated:
         return redirect(url_for("insights.dashboard"))
@@ -63,9 +102,12 @@ def register():
             flash("That username is already registered.", "warning")
             return render_template("auth/register.html", form=form)
 
-        # Create user and hash password via model helper
-        user = AppUser(username=form.username.data)
-        user.set_password(form.password.data)
+        # Hash off the request thread, as for sign-ins
+        try:
+            password_hash = password_pool.hash(form.password.data)
+        except PasswordPoolBusy:
+            return _busy("auth/register.html", form)
+        user = AppUser(username=form.username.data, password_hash=password_hash)
 
         db.session.add(user)
         db.session.commit()
@@ -95,29 +137,45 @@ def profile():
     and/or password.
 
     The current password must be provided and verified before any
-    changes are applied.
+    changes are applied. Password hashing runs on the password pool.
     """
     form = ProfileForm(obj=current_user)
 
     if form.validate_on_submit():
-        # 1. Verify current password
-        if not current_user.check_password(form.current_password.data):
+        # current_user may come from user_cache (detached); change the
+        # row loaded into this request's session instead
+        user = db.session.get(AppUser, current_user.id)
+
+        # 1. Verify current password, and hash the new one before any
+        #    change is made
+        try:
+            valid = user is not None and password_pool.verify(
+                form.current_password.data, user.password_hash
+            )
+            new_hash = None
+            if valid and form.new_password.data:
+                new_hash = password_pool.hash(form.new_password.data)
+        except PasswordPoolBusy:
+            return _busy("auth/profile.html", form)
+        if not valid:
             flash("Current password is incorrect.", "danger")
             return render_template("auth/profile.html", form=form)
 
         # 2. If username changed, check for uniqueness
-        if form.username.data != current_user.username:
+        if form.username.data != user.username:
             existing = AppUser.query.filter_by(username=form.username.data).first()
-            if existing and existing.id != current_user.id:
+            if existing and existing.id != user.id:
                 flash("That username is already taken.", "warning")
                 return render_template("auth/profile.html", form=form)
-            current_user.username = form.username.data
+            user.username = form.username.data
 
-        # 3. If new password provided, update it via model helper
-        if form.new_password.data:
-            current_user.set_password(form.new_password.data)
+        # 3. If new password provided, store its hash
+        if new_hash is not None:
+            user.password_hash = new_hash
 
         db.session.commit()
+        # Next request reloads the changed username / password hash
+        user_cache.invalidate(user.id)
         flash("Profile updated successfully.", "success")
         return redirect(url_for("auth.profile"))
 
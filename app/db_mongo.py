@@ -1,17 +1,224 @@
+"""
+MongoDB wiring for patient records and the activity log.
+
+One ``MongoClient`` is shared by every request in a worker process.
+Building a client per request meant a server selection, TCP connect and
+handshake on each page view, and the driver's connection pool was
+thrown away before it could be reused. The shared client is created on
+first use, rebuilt if the Mongo settings change, and replaced in a child
+process after ``fork()`` (a client must not be used across a fork).
+
+Pool size, timeouts, write concern and read preference come from the
+``MONGO_*`` settings in ``config.py``. Connection checkout counts and
+wait times are collected with a pymongo pool event listener and shown
+under ``mongo_pool`` in ``/insights/metrics``.
+
+Audit entries from ``log_activity`` are written in batches by the
+background ``audit_writer`` (see ``app/audit_writer.py``) into the
+storage described in ``app/activity_store.py``.
+"""
+
+import atexit
+import os
+import threading
 from datetime import datetime
 
-from flask import current_app, g
-from pymongo import MongoClient
+from flask import current_app
+from pymongo import MongoClient, monitoring
+from pymongo.errors import PyMongoError
+
+from .activity_feed import activity_feed
+from .activity_store import ACTIVITY_COLLECTION, ROLLUP_COLLECTION, write_rollups
+from .audit_writer import audit_writer
+
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """
+    Connection pool listener that counts checkouts and their wait times.
+
+    Wait time is the time between asking the pool for a connection and
+    getting one, so it includes connecting when the pool had none idle.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.checkout_failures = 0
+            self.checked_out = 0
+            self.max_checked_out = 0
+            self.connections_created = 0
+            self.connections_closed = 0
+            self.pool_clears = 0
+            self.wait_seconds = 0.0
+            self.max_wait_seconds = 0.0
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.max_checked_out = max(self.max_checked_out, self.checked_out)
+            if event.duration is not None:
+                self.wait_seconds += event.duration
+                self.max_wait_seconds = max(self.max_wait_seconds, event.duration)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.checkout_failures += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out = max(self.checked_out - 1, 0)
+
+    def connection_created(self, event):
+        with self._lock:
+            self.connections_created += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.connections_closed += 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def stats(self) -> dict:
+        """
+        Snapshot of the pool counters, suitable for JSON output.
+        """
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "checked_out": self.checked_out,
+                "max_checked_out": self.max_checked_out,
+                "connections_created": self.connections_created,
+                "connections_closed": self.connections_closed,
+                "open_connections": self.connections_created - self.connections_closed,
+                "pool_clears": self.pool_clears,
+                "wait_seconds_total": round(self.wait_seconds, 4),
+                "avg_wait_ms": (
+                    round(1000 * self.wait_seconds / self.checkouts, 3)
+                    if self.checkouts
+                    else None
+                ),
+                "max_wait_ms": round(1000 * self.max_wait_seconds, 3),
+            }
+
+
+def client_options(config) -> dict:
+    """
+    ``MongoClient`` keyword arguments built from the app configuration.
+    """
+    w = config.get("MONGO_WRITE_CONCERN_W")
+    if isinstance(w, str) and w.isdigit():
+        w = int(w)
+    options = {
+        "maxPoolSize": config.get("MONGO_MAX_POOL_SIZE", 100),
+        "minPoolSize": config.get("MONGO_MIN_POOL_SIZE", 0),
+        "maxIdleTimeMS": config.get("MONGO_MAX_IDLE_TIME_MS"),
+        "waitQueueTimeoutMS": config.get("MONGO_WAIT_QUEUE_TIMEOUT_MS"),
+        "serverSelectionTimeoutMS": config.get("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000),
+        "connectTimeoutMS": config.get("MONGO_CONNECT_TIMEOUT_MS", 5000),
+        "socketTimeoutMS": config.get("MONGO_SOCKET_TIMEOUT_MS"),
+        "w": w,
+        "journal": config.get("MONGO_WRITE_CONCERN_JOURNAL"),
+        "readPreference": config.get("MONGO_READ_PREFERENCE"),
+    }
+    # Unset options are left to the URI / driver defaults
+    return {key: value for key, value in options.items() if value is not None}
+
+
+class MongoClientManager:
+    """
+    Lazily built, process-wide ``MongoClient``.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._client = None
+        self._client_pid = None
+        self._settings = None
+        self.pool_stats = PoolStats()
+        self.clients_created = 0
+
+    def get_client(self, uri: str, options: dict) -> MongoClient:
+        """
+        Return the shared client, creating it on first use, after a fork,
+        or when ``uri`` / ``options`` differ from the current client's.
+        """
+        settings = (uri, tuple(sorted(options.items())))
+        client = self._client
+        if client is not None and self._client_pid == os.getpid() and self._settings == settings:
+            return client
+
+        with self._lock:
+            if self._client_pid != os.getpid():
+                # Inherited from the parent: sockets and monitor threads are
+                # not usable here, and closing it would disturb the parent.
+                self._client = None
+                self.pool_stats.reset()
+            elif self._client is not None and self._settings != settings:
+                self._client.close()
+                self._client = None
+
+            if self._client is None:
+                self._client = MongoClient(
+                    uri, event_listeners=[self.pool_stats], **options
+                )
+                self._client_pid = os.getpid()
+                self._settings = settings
+                self.clients_created += 1
+            return self._client
+
+    def close(self) -> None:
+        """
+        Close the shared client (if this process created it).
+        """
+        with self._lock:
+            client, self._client = self._client, None
+            if client is not None and self._client_pid == os.getpid():
+                client.close()
+
+    def stats(self) -> dict:
+        """
+        Client and connection pool counters, suitable for JSON output.
+        """
+        return {
+            "clients_created": self.clients_created,
+            "connected": self._client is not None and self._client_pid == os.getpid(),
+            **self.pool_stats.stats(),
+        }
+
+
+# Process-wide client shared by every request
+mongo_clients = MongoClientManager()
 
 
 def _get_mongo_client() -> MongoClient:
     """
-    Lazily create and cache a MongoDB client on the Flask 'g' object.
+    The process-wide MongoDB client for the current app's settings.
     """
-    if "mongo_client" not in g:
-        uri = current_app.config["MONGO_URI"]
-        g.mongo_client = MongoClient(uri, serverSelectionTimeoutMS=5000)
-    return g.mongo_client
+    config = current_app.config
+    return mongo_clients.get_client(config["MONGO_URI"], client_options(config))
 
 
 def _get_db():
@@ -27,40 +234,106 @@ def get_patient_collection():
     return _get_db()["patients"]
 
 
+def get_patient_stats_collection():
+    """
+    Collection holding the running aggregates of the patient records.
+    """
+    return _get_db()["patient_stats"]
+
+
 def get_activity_collection():
     """
     Collection for audit / activity logs.
     """
-    return _get_db()["activity_logs"]
+    return _get_db()[ACTIVITY_COLLECTION]
+
+
+def get_activity_rollup_collection():
+    """
+    Collection of hourly / daily activity counts.
+    """
+    return _get_db()[ROLLUP_COLLECTION]
+
+
+def _store_activity(entries: list) -> None:
+    """
+    Insert audit entries and add them to the activity rollups.
+    """
+    get_activity_collection().insert_many(entries, ordered=False)
+    try:
+        write_rollups(get_activity_rollup_collection(), entries)
+    except PyMongoError as exc:
+        # The entries are stored; only the counts are off
+        current_app.logger.warning("Failed to update activity rollups: %s", exc)
+
+
+def init_audit_writer(app) -> None:
+    """
+    Configure the background audit writer from ``app``'s settings.
+
+    Batches are stored with ``insert_many`` (plus one rollup update per
+    hour and day touched) inside an app context, so the flusher thread
+    uses the same shared client as the requests.
+    """
+    config = app.config
+
+    def write_batch(entries):
+        with app.app_context():
+            _store_activity(entries)
+
+    audit_writer.configure(
+        max_queue=config.get("AUDIT_QUEUE_SIZE", 10_000),
+        batch_size=config.get("AUDIT_BATCH_SIZE", 200),
+        flush_interval=config.get("AUDIT_FLUSH_INTERVAL", 0.5),
+        full_policy=config.get("AUDIT_FULL_POLICY", "block"),
+        block_timeout=config.get("AUDIT_BLOCK_TIMEOUT", 0.05),
+    )
+    audit_writer.write_batch = write_batch
 
 
 def log_activity(username: str, action: str, details: str | None = None) -> None:
     """
-    Write a simple audit entry to MongoDB.
+    Record a simple audit entry in MongoDB.
+
+    With ``AUDIT_ASYNC`` enabled (the default) the entry is queued for the
+    background audit writer and this returns without a database round
+    trip; otherwise it is written in the request. Either way the hourly
+    and daily rollups (``activity_store``) are updated with it, and it is
+    pushed to open live activity streams (``activity_feed``).
 
     :param username: user who triggered the action
     :param action: short code such as CREATE_PATIENT, UPDATE_PATIENT,
                    DELETE_PATIENT, UPLOAD_DATASET
     :param details: free-text description of what happened
     """
-    coll = get_activity_collection()
     doc = {
         "username": username,
         "action": action,
         "details": details,
         "timestamp": datetime.utcnow(),
     }
+    # Live activity streams; a copy, as the insert adds an _id to ``doc``
+    activity_feed.publish(dict(doc))
+    if current_app.config.get("AUDIT_ASYNC", True) and audit_writer.write_batch is not None:
+        audit_writer.submit(doc)
+        return
+
     try:
-        coll.insert_one(doc)
+        _store_activity([doc])
     except Exception as exc:  # pragma: no cover
         # Do not break the app just because logging failed
         current_app.logger.warning("Failed to write activity log: %s", exc)
 
 
-def close_mongo_client(exception=None):
+def close_mongo_client() -> None:
     """
-    Close the Mongo client at the end of the request/app context.
+    Flush queued audit entries and close the process-wide Mongo client
+    (at process shutdown).
+
+    The client is no longer torn down per request or app context.
     """
-    client: MongoClient | None = g.pop("mongo_client", None)
-    if client is not None:
-        client.close()
+    audit_writer.shutdown()
+    mongo_clients.close()
+
+
+atexit.register(close_mongo_client)
@@ -0,0 +1,105 @@
+"""
+Filters and paging for the activity log.
+
+Entries are listed newest first, ordered by ``(timestamp, _id)``
+descending, and paged with the same keyset cursors as the patient list
+(``patient.queries.fetch_page``), so page 10,000 costs the same as page
+one. Each filter combination has an index whose leading keys are the
+equality filters followed by ``(timestamp, _id)``; a time window is a
+range on ``timestamp`` within that index:
+
+- no filter or only a time window: ``timestamp_id``;
+- username: ``username_timestamp_id``;
+- action: ``action_timestamp_id``;
+- username and action: ``username_action_timestamp_id``.
+"""
+
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+
+from pymongo import DESCENDING
+
+ACTIVITY_SORT = [("timestamp", DESCENDING), ("_id", DESCENDING)]
+# Fields rendered by insights/activity_log.html
+ACTIVITY_PROJECTION = {"username": 1, "action": 1, "details": 1, "timestamp": 1}
+# Action codes written by the app, offered as suggestions in the filter form
+ACTION_CODES = (
+    "CREATE_PATIENT",
+    "UPDATE_PATIENT",
+    "DELETE_PATIENT",
+    "BULK_UPDATE_PATIENTS",
+    "IMPORT_PATIENTS",
+    "EXPORT_PATIENTS",
+    "UPLOAD_DATASET",
+)
+
+
+def _parse_time(raw: str | None) -> datetime | None:
+    """
+    UTC datetime from an ISO string such as a ``datetime-local`` input
+    ("2024-05-01T13:30"); None if blank or invalid.
+    """
+    try:
+        value = datetime.fromisoformat((raw or "").strip())
+    except ValueError:
+        return None
+    if value.tzinfo is not None:
+        # Stored timestamps are naive UTC
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+@dataclass
+class ActivityFilters:
+    """
+    Activity log filters, parsed from request arguments.
+    """
+
+    username: str = ""
+    action: str = ""
+    since: datetime | None = None
+    until: datetime | None = None
+
+    @classmethod
+    def from_args(cls, args) -> "ActivityFilters":
+        return cls(
+            username=(args.get("username") or "").strip(),
+            action=(args.get("action") or "").strip().upper(),
+            since=_parse_time(args.get("since")),
+            until=_parse_time(args.get("until")),
+        )
+
+    def to_args(self) -> dict:
+        """
+        Request arguments that reproduce these filters (blank ones omitted).
+        """
+        args = {}
+        for name, value in asdict(self).items():
+            if isinstance(value, datetime):
+                value = value.isoformat()
+            if value not in (None, ""):
+                args[name] = value
+        return args
+
+    @property
+    def active(self) -> bool:
+        return bool(self.to_args())
+
+
+def build_activity_query(filters: ActivityFilters) -> dict:
+    """
+    Mongo filter for ``filters``; ``until`` is exclusive.
+    """
+    query = {}
+    if filters.username:
+        query["username"] = filters.username
+    if filters.action:
+        query["action"] = filters.action
+    window = {}
+    if filters.since is not None:
+        window["$gte"] = filters.since
+    if filters.until is not None:
+        window["$lt"] = filters.until
+    if window:
+        query["timestamp"] = window
+    return query
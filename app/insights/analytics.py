@@ -0,0 +1,117 @@
+"""
+Pre-aggregated summaries of the stroke dataset.
+
+``compute_summary`` reduces the dataset to the handful of numbers the
+dashboard and charts need: the headline KPIs, category counts,
+histogram bins for age and BMI and the correlation matrix. The result
+is a plain, JSON-serialisable dict of a few KB, so it can be cached per
+dataset version and sent to the browser instead of full data or images.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+# Bump when the shape of the summary payload changes (part of the ETag)
+SUMMARY_FORMAT = 1
+
+HISTOGRAM_BINS = 20
+HISTOGRAM_COLUMNS = ("age", "bmi")
+COUNT_COLUMNS = (
+    "gender",
+    "stroke",
+    "hypertension",
+    "heart_disease",
+    "ever_married",
+    "work_type",
+    "Residence_type",
+    "smoking_status",
+)
+
+
+def _clean(value):
+    """
+    Convert numpy scalars to Python types and NaN/inf to None for JSON.
+    """
+    if isinstance(value, (np.integer,)):
+        return int(value)
+    if isinstance(value, (np.floating, float)):
+        value = float(value)
+        return value if math.isfinite(value) else None
+    return value
+
+
+def _rounded_mean(series: pd.Series, scale: float = 1.0, digits: int = 1):
+    mean = series.mean()
+    if pd.isna(mean):
+        return None
+    return round(float(mean) * scale, digits)
+
+
+def compute_kpis(df: pd.DataFrame) -> dict:
+    """
+    Headline numbers shown on the dashboard and visuals pages.
+    """
+    return {
+        "total_records": len(df),
+        "avg_age": _rounded_mean(df["age"]) if "age" in df.columns else None,
+        "avg_bmi": _rounded_mean(df["bmi"]) if "bmi" in df.columns else None,
+        "stroke_rate": (
+            _rounded_mean(df["stroke"], scale=100, digits=2)
+            if "stroke" in df.columns
+            else None
+        ),
+    }
+
+
+def histogram(values, bins: int = HISTOGRAM_BINS) -> dict:
+    """
+    Equal-width histogram of the non-missing values, as edges and counts.
+    """
+    arr = np.asarray(values, dtype=np.float64)
+    arr = arr[~np.isnan(arr)]
+    if arr.size == 0:
+        return {"edges": [], "counts": []}
+    counts, edges = np.histogram(arr, bins=bins)
+    return {
+        "edges": [round(float(e), 4) for e in edges],
+        "counts": counts.tolist(),
+    }
+
+
+def compute_summary(df: pd.DataFrame) -> dict:
+    """
+    Full JSON-ready summary of ``df`` (KPIs, counts, histograms, correlations).
+    """
+    value_counts = {}
+    for col in COUNT_COLUMNS:
+        if col in df.columns:
+            counts = df[col].value_counts(sort=False)
+            value_counts[col] = {str(k): int(v) for k, v in counts.items()}
+
+    histograms = {
+        col: histogram(df[col].to_numpy())
+        for col in HISTOGRAM_COLUMNS
+        if col in df.columns
+    }
+
+    numeric_df = df.select_dtypes(include="number")
+    if not numeric_df.empty:
+        corr = numeric_df.corr()
+        correlation = {
+            "columns": [str(c) for c in corr.columns],
+            "matrix": [
+                [_clean(round(v, 4)) for v in row]
+                for row in corr.to_numpy().tolist()
+            ],
+        }
+    else:
+        correlation = {"columns": [], "matrix": []}
+
+    return {
+        "kpis": compute_kpis(df),
+        "value_counts": value_counts,
+        "histograms": histograms,
+        "correlation": correlation,
+    }
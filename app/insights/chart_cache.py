@@ -0,0 +1,130 @@
+"""
+Content-addressed cache for rendered chart images.
+
+Chart files are named after a hash of the dataset version and the chart
+parameters, e.g. ``charts/age-3f9c0b1d2e4a5b6c.png``. If a file with
+that name already exists it is reused as-is, so a page view against an
+unchanged dataset does no matplotlib work. New files are rendered to a
+temporary name and renamed into place, so concurrent requests never
+serve a half-written image.
+
+The folder is kept bounded by evicting the least recently used files
+(by modification time, refreshed on every cache hit) once either the
+file count or total size limit is exceeded.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import uuid
+
+_CACHED_NAME = re.compile(r"^[a-z0-9_]+-[0-9a-f]{16}\.png$")
+
+
+def publish_file(final_path: str, render) -> None:
+    """
+    Call ``render(tmp_path)`` and atomically rename the result to ``final_path``.
+    """
+    root = os.path.dirname(final_path)
+    tmp_path = os.path.join(root, f".{uuid.uuid4().hex}.tmp.png")
+    try:
+        render(tmp_path)
+        os.replace(tmp_path, final_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+class ChartCache:
+    """
+    Tracks chart files under a folder and evicts old ones.
+    """
+
+    def __init__(self, max_files: int = 50, max_bytes: int = 20 * 1024 * 1024):
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.renders = 0
+        self.evictions = 0
+
+    @staticmethod
+    def filename(name: str, version: str, params: dict) -> str:
+        """
+        Cache file name for chart ``name`` drawn from dataset ``version``.
+        """
+        key = json.dumps({"version": version, "params": params}, sort_keys=True)
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+        return f"{name}-{digest}.png"
+
+    def lookup(self, root: str, filename: str) -> bool:
+        """
+        Return True (and mark the file as recently used) if it exists.
+        """
+        path = os.path.join(root, filename)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return False
+        with self._lock:
+            self.hits += 1
+        return True
+
+    def record_render(self, root: str) -> None:
+        """
+        Account for a chart published into ``root`` and enforce the limits.
+        """
+        with self._lock:
+            self.renders += 1
+        self.evict(root)
+
+    def evict(self, root: str) -> None:
+        """
+        Remove least recently used chart files beyond the configured limits.
+        """
+        entries = []
+        for entry in os.scandir(root):
+            if not _CACHED_NAME.match(entry.name):
+                continue
+            try:
+                st = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime_ns, st.st_size, entry.path))
+
+        entries.sort()
+        total_bytes = sum(size for _, size, _ in entries)
+        removed = 0
+        while entries and (
+            len(entries) > self.max_files or total_bytes > self.max_bytes
+        ):
+            _, size, path = entries.pop(0)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_bytes -= size
+            removed += 1
+
+        if removed:
+            with self._lock:
+                self.evictions += removed
+
+    def stats(self) -> dict:
+        """
+        Snapshot of the cache counters, suitable for JSON output.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "renders": self.renders,
+                "evictions": self.evictions,
+                "max_files": self.max_files,
+                "max_bytes": self.max_bytes,
+            }
+
+
+# Process-wide instance used by the insights views
+chart_cache = ChartCache()
@@ -0,0 +1,148 @@
+"""
+Matplotlib renderers for the stroke dataset summary charts.
+
+Each chart has a name, a set of drawing parameters (``CHART_SPECS``)
+and a renderer that draws it from a DataFrame into a PNG file. The
+parameters are part of the chart cache key, so changing them produces
+new files instead of serving stale images.
+"""
+
+import threading
+import time
+
+import pandas as pd
+import matplotlib
+matplotlib.use("Agg")  # non-GUI backend for servers
+import matplotlib.pyplot as plt
+
+from .chart_cache import publish_file
+
+# Bump when a renderer changes in a way the parameters do not capture
+CHART_STYLE_VERSION = 1
+
+CHART_SPECS = {
+    "gender": {"figsize": (4, 4), "title": "Gender distribution"},
+    "stroke": {"figsize": (4, 4), "title": "Stroke vs no-stroke"},
+    "age": {"figsize": (5, 4), "bins": 20, "title": "Age distribution"},
+    "bmi": {"figsize": (5, 4), "bins": 20, "title": "BMI distribution"},
+    "heatmap": {
+        "figsize": (6, 5),
+        "title": "Correlation heatmap (numeric features)",
+    },
+}
+
+# pyplot keeps global figure state, so renders in one process must not overlap
+_pyplot_lock = threading.Lock()
+
+
+def _save_fig(path: str):
+    """
+    Helper to save the current matplotlib figure and close it.
+    """
+    plt.tight_layout()
+    plt.savefig(path, bbox_inches="tight")
+    plt.close()
+
+
+def _render_gender(df: pd.DataFrame, path: str, spec: dict):
+    plt.figure(figsize=spec["figsize"])
+    df["gender"].value_counts().plot(kind="bar")
+    plt.title(spec["title"])
+    plt.xlabel("Gender")
+    plt.ylabel("Count")
+    _save_fig(path)
+
+
+def _render_stroke(df: pd.DataFrame, path: str, spec: dict):
+    plt.figure(figsize=spec["figsize"])
+    df["stroke"].value_counts().rename({0: "No stroke", 1: "Stroke"}).plot(
+        kind="bar"
+    )
+    plt.title(spec["title"])
+    plt.xlabel("Outcome")
+    plt.ylabel("Count")
+    _save_fig(path)
+
+
+def _render_age(df: pd.DataFrame, path: str, spec: dict):
+    plt.figure(figsize=spec["figsize"])
+    df["age"].dropna().plot(kind="hist", bins=spec["bins"])
+    plt.title(spec["title"])
+    plt.xlabel("Age (years)")
+    plt.ylabel("Number of patients")
+    _save_fig(path)
+
+
+def _render_bmi(df: pd.DataFrame, path: str, spec: dict):
+    plt.figure(figsize=spec["figsize"])
+    df["bmi"].dropna().plot(kind="hist", bins=spec["bins"])
+    plt.title(spec["title"])
+    plt.xlabel("BMI")
+    plt.ylabel("Number of patients")
+    _save_fig(path)
+
+
+def _render_heatmap(df: pd.DataFrame, path: str, spec: dict):
+    corr = df.select_dtypes(include="number").corr()
+    plt.figure(figsize=spec["figsize"])
+    im = plt.imshow(corr, aspect="auto")
+    plt.colorbar(im, fraction=0.046, pad=0.04)
+    plt.xticks(range(len(corr.columns)), corr.columns, rotation=90)
+    plt.yticks(range(len(corr.columns)), corr.columns)
+    plt.title(spec["title"])
+    _save_fig(path)
+
+
+_RENDERERS = {
+    "gender": _render_gender,
+    "stroke": _render_stroke,
+    "age": _render_age,
+    "bmi": _render_bmi,
+    "heatmap": _render_heatmap,
+}
+
+
+def chart_inputs(name: str, df: pd.DataFrame) -> pd.DataFrame:
+    """
+    The subset of ``df`` a chart needs, to keep job payloads small.
+    """
+    if name == "heatmap":
+        return df.select_dtypes(include="number")
+    return df[[name]]
+
+
+def available_charts(df: pd.DataFrame) -> list:
+    """
+    Names of the charts that can be drawn from the columns of ``df``.
+    """
+    names = [name for name in ("gender", "stroke", "age", "bmi") if name in df.columns]
+    if not df.select_dtypes(include="number").empty:
+        names.append("heatmap")
+    return names
+
+
+def chart_params(name: str) -> dict:
+    """
+    Everything that affects the rendered image apart from the data itself.
+    """
+    return {"style": CHART_STYLE_VERSION, "chart": name, **CHART_SPECS[name]}
+
+
+def render_chart(name: str, df: pd.DataFrame, path: str) -> None:
+    """
+    Draw chart ``name`` from ``df`` and save it as a PNG at ``path``.
+    """
+    with _pyplot_lock:
+        _RENDERERS[name](df, path, CHART_SPECS[name])
+
+
+def render_chart_file(name: str, df: pd.DataFrame, final_path: str) -> float:
+    """
+    Render chart ``name`` and atomically publish it at ``final_path``.
+
+    Runs inside chart renderer worker processes; returns the render time
+    in seconds.
+    """
+    started = time.perf_counter()
+    publish_file(final_path, lambda tmp_path: render_chart(name, df, tmp_path))
+    return time.perf_counter() - started
@@ -0,0 +1,149 @@
+"""
+In-process cache for the stroke dataset.
+
+The dashboard, data overview and visuals pages all read the same CSV.
+Parsing it on every request dominates their latency, so the parsed
+DataFrame is kept in memory and shared between requests until the file
+on disk changes.
+
+A file's "version" is derived from its size, modification time and
+inode. Uploading a new dataset changes at least one of those, so a
+stale entry is never served even if ``invalidate`` is not called.
+"""
+
+import hashlib
+import os
+import threading
+import time
+
+
+def dataset_version(path: str) -> str:
+    """
+    Return a short, stable token identifying the current contents of ``path``.
+
+    Raises FileNotFoundError if the file does not exist.
+    """
+    st = os.stat(path)
+    raw = f"{st.st_size}:{st.st_mtime_ns}:{st.st_ino}".encode("ascii")
+    return hashlib.sha1(raw).hexdigest()[:16]
+
+
+class DatasetCache:
+    """
+    Thread-safe cache of parsed datasets keyed by path and file version.
+
+    Cached DataFrames are shared between requests and must be treated as
+    read-only by callers (use ``.copy()`` before mutating).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._entries = {}  # path -> (version, DataFrame)
+        self._derived = {}  # (path, key) -> (version, value)
+        self.hits = 0
+        self.misses = 0
+        self.parse_seconds = 0.0
+        self.last_parse_seconds = None
+
+    def get_with_version(self, path: str, loader):
+        """
+        Return ``(version, DataFrame)`` for ``path``, calling
+        ``loader(path)`` only when no entry exists for the file's current
+        version. Callers key derived artefacts on exactly the version
+        they were given.
+        """
+        version = dataset_version(path)
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == version:
+                self.hits += 1
+                return entry
+
+        # Only one thread parses at a time; others wait and then reuse it.
+        with self._load_lock:
+            with self._lock:
+                entry = self._entries.get(path)
+                if entry is not None and entry[0] == version:
+                    self.hits += 1
+                    return entry
+
+            started = time.perf_counter()
+            df = loader(path)
+            elapsed = time.perf_counter() - started
+
+            with self._lock:
+                self.misses += 1
+                self.parse_seconds += elapsed
+                self.last_parse_seconds = elapsed
+                self._entries[path] = (version, df)
+            return version, df
+
+    def derive(self, path: str, version: str, key: str, compute):
+        """
+        Memoise ``compute()`` for one dataset version.
+
+        Used for values derived from the dataset (summaries, profiles) so
+        they are computed once per version rather than once per request.
+        Only the most recent version is kept for each ``(path, key)``.
+        """
+        with self._lock:
+            entry = self._derived.get((path, key))
+            if entry is not None and entry[0] == version:
+                return entry[1]
+
+        value = compute()
+        with self._lock:
+            self._derived[(path, key)] = (version, value)
+        return value
+
+    def prime(self, path: str, version: str, df, derived: dict | None = None) -> None:
+        """
+        Install an already loaded dataset and its derived values.
+
+        Used after a background job has built everything for a new
+        version, so the first request after the swap is a cache hit.
+        """
+        with self._lock:
+            self._entries[path] = (version, df)
+            for key in [k for k in self._derived if k[0] == path]:
+                del self._derived[key]
+            for key, value in (derived or {}).items():
+                self._derived[(path, key)] = (version, value)
+
+    def invalidate(self, path: str | None = None) -> None:
+        """
+        Drop the cached entry for ``path``, or every entry if no path is given.
+        """
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self._derived.clear()
+            else:
+                self._entries.pop(path, None)
+                for key in [k for k in self._derived if k[0] == path]:
+                    del self._derived[key]
+
+    def stats(self) -> dict:
+        """
+        Snapshot of the cache counters, suitable for JSON output.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "parse_seconds_total": round(self.parse_seconds, 4),
+                "last_parse_seconds": (
+                    round(self.last_parse_seconds, 4)
+                    if self.last_parse_seconds is not None
+                    else None
+                ),
+            }
+
+
+# Process-wide instance shared by the insights views
+dataset_cache = DatasetCache()
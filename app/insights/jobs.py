@@ -0,0 +1,173 @@
+"""
+Local background job queue for dataset post-processing.
+
+Jobs run on a small thread pool inside the web process; no external
+broker is needed. Each job records its status, current step and
+progress so that the ``/insights/jobs/<id>`` endpoint can report on it.
+Only the most recent jobs are kept in memory.
+
+Dataset uploads have their own queue (``job_queue``); patient imports
+and rebuilds of the running patient aggregates use
+``patient_job_queue``, so a long import never holds an upload in
+``queued``. Failures are logged with their traceback; the job keeps the
+error message for the status endpoint.
+
+Job status is per process: with several worker processes, poll the
+worker that accepted the upload (or use a single worker for uploads).
+"""
+
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+logger = logging.getLogger(__name__)
+
+
+class Job:
+    """
+    A unit of background work and its progress.
+    """
+
+    def __init__(self, kind: str, steps: list):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.steps = list(steps)
+        self.status = QUEUED
+        self.step = None
+        self.completed_steps = 0
+        self.error = None
+        self.result = None
+        self.created_at = datetime.utcnow()
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+        self._future = None
+
+    def advance(self, step: str) -> None:
+        """
+        Mark the start of ``step`` (one of ``steps``); earlier steps count as done.
+        """
+        with self._lock:
+            if self.step is not None:
+                self.completed_steps += 1
+            self.step = step
+
+    @property
+    def done(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED)
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """
+        Block until the job finishes or ``timeout`` expires; returns ``done``.
+        """
+        if self._future is not None:
+            wait([self._future], timeout=timeout)
+        return self.done
+
+    @property
+    def progress(self) -> int:
+        if self.status == SUCCEEDED:
+            return 100
+        if not self.steps:
+            return 0
+        return int(100 * self.completed_steps / len(self.steps))
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "id": self.id,
+                "kind": self.kind,
+                "status": self.status,
+                "step": self.step,
+                "steps": self.steps,
+                "progress": self.progress,
+                "error": self.error,
+                "result": self.result,
+                "created_at": self.created_at.isoformat() + "Z",
+                "started_at": self.started_at.isoformat() + "Z" if self.started_at else None,
+                "finished_at": self.finished_at.isoformat() + "Z" if self.finished_at else None,
+            }
+
+
+class JobQueue:
+    """
+    Thread-backed queue that runs ``fn(job, *args)`` in the background.
+    """
+
+    def __init__(self, workers: int = 1, history: int = 50, name: str = "dataset-job"):
+        self.workers = workers
+        self.history = history
+        self.name = name
+        self._lock = threading.Lock()
+        self._executor = None
+        self._jobs = OrderedDict()  # job id -> Job, oldest first
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix=self.name
+            )
+        return self._executor
+
+    def submit(self, kind: str, steps: list, fn, *args) -> Job:
+        """
+        Queue ``fn(job, *args)``; its return value is stored as ``job.result``.
+        """
+        job = Job(kind, steps)
+        with self._lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.history:
+                self._jobs.popitem(last=False)
+            job._future = self._get_executor().submit(self._run, job, fn, args)
+        return job
+
+    @staticmethod
+    def _run(job: Job, fn, args) -> None:
+        job.status = RUNNING
+        job.started_at = datetime.utcnow()
+        try:
+            job.result = fn(job, *args)
+        except Exception as exc:
+            logger.exception("Background job %s (%s) failed", job.kind, job.id)
+            job.error = str(exc) or exc.__class__.__name__
+            job.status = FAILED
+        else:
+            job.status = SUCCEEDED
+        finally:
+            job.finished_at = datetime.utcnow()
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self) -> dict:
+        """
+        Number of tracked jobs in each status, suitable for JSON output.
+        """
+        with self._lock:
+            jobs = list(self._jobs.values())
+        counts = dict.fromkeys((QUEUED, RUNNING, SUCCEEDED, FAILED), 0)
+        for job in jobs:
+            counts[job.status] += 1
+        return {"tracked": len(jobs), **counts}
+
+
+# Process-wide queue used for dataset uploads
+job_queue = JobQueue()
+# Patient imports and patient aggregate rebuilds
+patient_job_queue = JobQueue(name="patient-job")
+
+
+def find_job(job_id: str):
+    """
+    Job ``job_id`` from either queue, or None.
+    """
+    return job_queue.get(job_id) or patient_job_queue.get(job_id)
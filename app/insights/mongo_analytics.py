@@ -0,0 +1,231 @@
+"""
+Dashboard summary computed from the ``patients`` collection.
+
+``compute_mongo_summary`` returns the same payload as
+``analytics.compute_summary`` (KPIs, category counts, histogram bins and
+correlations) for the live patient records. All of the work happens in
+MongoDB aggregation pipelines; only the aggregated numbers come back,
+never patient documents. It takes two round trips:
+
+1. one ``$facet`` with a ``$group`` of counts, sums, sums of squares and
+   min/max per numeric field, pairwise sums for the correlations, and a
+   ``$group`` per category field;
+2. one ``$facet`` of ``$bucket`` stages for the histograms, whose edges
+   depend on the min/max found in step 1. A record written between the
+   two steps may fall outside those edges; it goes to the ``default``
+   bucket, which is left out of the counts.
+
+Field names follow the patient documents; ``residence_type`` is reported
+as ``Residence_type`` so the payload matches the CSV summary.
+"""
+
+import math
+
+import numpy as np
+
+from .analytics import COUNT_COLUMNS, HISTOGRAM_BINS, HISTOGRAM_COLUMNS
+
+# Summary key -> patient document field
+FIELD_NAMES = {"Residence_type": "residence_type"}
+NUMERIC_FIELDS = ("age", "hypertension", "heart_disease", "avg_glucose_level", "bmi", "stroke")
+# Pairwise sums kept per pair of numeric fields, in pearson() argument order
+PAIR_SUMS = ("pn", "pa", "pb", "paa", "pbb", "pab")
+# $bucket id for values outside the edges computed in the first pass
+OUT_OF_RANGE_BUCKET = "other"
+
+
+def document_field(column: str) -> str:
+    """
+    Patient document field holding the summary column ``column``.
+    """
+    return FIELD_NAMES.get(column, column)
+
+
+def _is_number(*fields) -> dict:
+    return {"$and": [{"$isNumber": f"${name}"} for name in fields]}
+
+
+def pair_key(a: str, b: str) -> str:
+    """
+    Key suffix of the pairwise sums for numeric fields ``a`` and ``b``.
+    """
+    return f"{a}__{b}"
+
+
+def stats_pipeline() -> list:
+    """
+    Pipeline for the KPIs, category counts, histogram ranges and the
+    sums needed for pairwise Pearson correlations.
+    """
+    group = {"_id": None, "total": {"$sum": 1}}
+    for name in NUMERIC_FIELDS:
+        value = f"${name}"
+        group[f"n_{name}"] = {"$sum": {"$cond": [_is_number(name), 1, 0]}}
+        group[f"sum_{name}"] = {"$sum": value}
+        group[f"min_{name}"] = {"$min": {"$cond": [_is_number(name), value, None]}}
+        group[f"max_{name}"] = {"$max": {"$cond": [_is_number(name), value, None]}}
+    # Pairwise-complete sums, as pandas' corr() uses
+    for i, a in enumerate(NUMERIC_FIELDS):
+        for b in NUMERIC_FIELDS[i:]:
+            both = _is_number(a, b)
+            key = pair_key(a, b)
+            terms = {
+                "pn": 1,
+                "pa": f"${a}",
+                "pb": f"${b}",
+                "paa": {"$multiply": [f"${a}", f"${a}"]},
+                "pbb": {"$multiply": [f"${b}", f"${b}"]},
+                "pab": {"$multiply": [f"${a}", f"${b}"]},
+            }
+            for prefix, term in terms.items():
+                group[f"{prefix}_{key}"] = {"$sum": {"$cond": [both, term, 0]}}
+
+    facets = {"stats": [{"$group": group}]}
+    for column in COUNT_COLUMNS:
+        field = document_field(column)
+        facets[column] = [
+            {"$match": {field: {"$ne": None}}},
+            {"$group": {"_id": f"${field}", "count": {"$sum": 1}}},
+        ]
+    return [{"$facet": facets}]
+
+
+def histogram_edges(lo: float, hi: float, bins: int = HISTOGRAM_BINS) -> np.ndarray:
+    """
+    Bin edges as ``np.histogram`` would choose them for data in [lo, hi].
+    """
+    if lo == hi:
+        lo, hi = lo - 0.5, hi + 0.5
+    return np.linspace(lo, hi, bins + 1)
+
+
+def bucket_boundaries(edges) -> list:
+    """
+    ``$bucket`` boundaries for ``edges``.
+
+    ``$bucket`` ranges are half-open, while the last ``np.histogram`` bin
+    includes its right edge; the final boundary is nudged up so the
+    maximum lands in the last bucket.
+    """
+    boundaries = [float(e) for e in edges]
+    boundaries[-1] = float(np.nextafter(boundaries[-1], np.inf))
+    return boundaries
+
+
+def histogram_pipeline(ranges: dict) -> list:
+    """
+    Pipeline bucketing each column in ``ranges`` ({column: (min, max)}).
+    """
+    facets = {}
+    for column, (lo, hi) in ranges.items():
+        field = document_field(column)
+        facets[column] = [
+            {"$match": {field: {"$type": "number"}}},
+            {
+                "$bucket": {
+                    "groupBy": f"${field}",
+                    "boundaries": bucket_boundaries(histogram_edges(lo, hi)),
+                    "default": OUT_OF_RANGE_BUCKET,
+                    "output": {"count": {"$sum": 1}},
+                }
+            },
+        ]
+    return [{"$facet": facets}]
+
+
+def pearson(n, sa, sb, saa, sbb, sab):
+    """
+    Pearson correlation from pairwise sums (None when undefined).
+    """
+    if n < 2:
+        return None
+    cov = n * sab - sa * sb
+    var_a = n * saa - sa * sa
+    var_b = n * sbb - sb * sb
+    if var_a <= 0 or var_b <= 0:
+        return None
+    r = cov / math.sqrt(var_a * var_b)
+    return round(max(-1.0, min(1.0, r)), 4)
+
+
+def _rounded(value, scale: float = 1.0, digits: int = 1):
+    return None if value is None else round(float(value) * scale, digits)
+
+
+def summary_from_stats(stats: dict, counts: dict, buckets: dict) -> dict:
+    """
+    Assemble the summary payload from the aggregation results.
+
+    :param stats: the ``$group`` document from ``stats_pipeline``
+    :param counts: {column: [{"_id": value, "count": n}, ...]}
+    :param buckets: {column: [{"_id": lower boundary, "count": n}, ...]}
+    """
+    def mean(name):
+        n = stats.get(f"n_{name}", 0)
+        return stats[f"sum_{name}"] / n if n else None
+
+    kpis = {
+        "total_records": stats.get("total", 0),
+        "avg_age": _rounded(mean("age")),
+        "avg_bmi": _rounded(mean("bmi")),
+        "stroke_rate": _rounded(mean("stroke"), scale=100, digits=2),
+    }
+
+    value_counts = {
+        column: {str(row["_id"]): int(row["count"]) for row in rows}
+        for column, rows in counts.items()
+    }
+
+    histograms = {}
+    for column in HISTOGRAM_COLUMNS:
+        lo, hi = stats.get(f"min_{column}"), stats.get(f"max_{column}")
+        if lo is None:
+            histograms[column] = {"edges": [], "counts": []}
+            continue
+        edges = histogram_edges(lo, hi)
+        by_lower = {
+            row["_id"]: row["count"]
+            for row in buckets.get(column, [])
+            if row["_id"] != OUT_OF_RANGE_BUCKET
+        }
+        histograms[column] = {
+            "edges": [round(float(e), 4) for e in edges],
+            "counts": [int(by_lower.get(float(e), 0)) for e in edges[:-1]],
+        }
+
+    columns = [name for name in NUMERIC_FIELDS if stats.get(f"n_{name}")]
+    matrix = []
+    for a in columns:
+        row = []
+        for b in columns:
+            first, second = sorted((a, b), key=NUMERIC_FIELDS.index)
+            key = pair_key(first, second)
+            sums = [stats.get(f"{prefix}_{key}", 0) for prefix in PAIR_SUMS]
+            row.append(pearson(*sums))
+        matrix.append(row)
+
+    return {
+        "kpis": kpis,
+        "value_counts": value_counts,
+        "histograms": histograms,
+        "correlation": {"columns": columns, "matrix": matrix},
+    }
+
+
+def compute_mongo_summary(coll) -> dict:
+    """
+    Summary of the patient records in ``coll`` (same shape as
+    ``compute_summary``), computed server-side.
+    """
+    facets = next(coll.aggregate(stats_pipeline()), {})
+    stats_rows = facets.get("stats") or [{}]
+    stats = stats_rows[0]
+    counts = {column: facets.get(column, []) for column in COUNT_COLUMNS}
+
+    ranges = {
+        column: (stats[f"min_{column}"], stats[f"max_{column}"])
+        for column in HISTOGRAM_COLUMNS
+        if stats.get(f"min_{column}") is not None
+    }
+    buckets = next(coll.aggregate(histogram_pipeline(ranges)), {}) if ranges else {}
+    return summary_from_stats(stats, counts, buckets)
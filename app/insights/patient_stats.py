@@ -0,0 +1,256 @@
+"""
+Running aggregates of the ``patients`` collection.
+
+Aggregating every patient record on each dashboard view (see
+``mongo_analytics``) costs time proportional to the collection. Instead,
+one small summary document in ``patient_stats`` holds:
+
+- ``stats``: the record count and, per numeric field and per pair of
+  numeric fields, the counts, sums and sums of squares / products the
+  KPIs and correlations are computed from (same keys as
+  ``mongo_analytics.stats_pipeline``);
+- ``counts``: per-category record counts;
+- ``hist``: histogram bucket counts on fixed edges (``HISTOGRAM_RANGES``),
+  since edges derived from the data's min/max cannot be kept up to date
+  incrementally.
+
+``add_patient``, ``edit_patient``, ``delete_patient`` and the bulk
+endpoint apply the changes they made as one ``$inc`` of the
+differences, which MongoDB applies atomically to the summary document. Reading the dashboard is then a
+single ``find_one``.
+
+The patient write and the ``$inc`` are separate operations, so a crash
+between them, or a failed ``$inc``, leaves the summary slightly off.
+``rebuild_patient_stats`` recomputes the document from the collection
+with the aggregation pipelines. It runs when the document is missing,
+in the background once it is older than ``PATIENT_STATS_REBUILD_SECONDS``,
+and from ``flask --app server insights rebuild-patient-stats``. Changes made while
+a rebuild is aggregating may be counted twice or not at all; the next
+rebuild corrects that.
+"""
+
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from .analytics import COUNT_COLUMNS, HISTOGRAM_BINS
+from .mongo_analytics import (
+    NUMERIC_FIELDS,
+    document_field,
+    pair_key,
+    stats_pipeline,
+    summary_from_stats,
+)
+
+STATS_DOC_ID = "patients"
+# Bump when the layout of the summary document changes; older documents
+# are rebuilt
+STATS_FORMAT = 1
+
+# Fixed histogram ranges; values outside are counted in the end buckets
+HISTOGRAM_RANGES = {"age": (0.0, 120.0), "bmi": (0.0, 100.0)}
+
+_rebuild_lock = threading.Lock()
+_rebuild_running = False
+# Held while a request builds a missing summary document
+_build_lock = threading.Lock()
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and value == value
+
+
+def bucket_index(column: str, value: float) -> int:
+    """
+    Fixed-edge histogram bucket for ``value``, clamped to the end buckets.
+    """
+    lo, hi = HISTOGRAM_RANGES[column]
+    width = (hi - lo) / HISTOGRAM_BINS
+    return int(min(max((value - lo) // width, 0), HISTOGRAM_BINS - 1))
+
+
+def record_deltas(doc: dict, sign: int = 1) -> dict:
+    """
+    ``$inc`` fields that add (``sign=1``) or remove (``sign=-1``) one
+    patient document from the summary.
+    """
+    inc = {"stats.total": sign}
+    for name in NUMERIC_FIELDS:
+        value = doc.get(name)
+        if _is_number(value):
+            inc[f"stats.n_{name}"] = sign
+            inc[f"stats.sum_{name}"] = sign * value
+    for i, a in enumerate(NUMERIC_FIELDS):
+        x = doc.get(a)
+        if not _is_number(x):
+            continue
+        for b in NUMERIC_FIELDS[i:]:
+            y = doc.get(b)
+            if not _is_number(y):
+                continue
+            key = pair_key(a, b)
+            inc[f"stats.pn_{key}"] = sign
+            inc[f"stats.pa_{key}"] = sign * x
+            inc[f"stats.pb_{key}"] = sign * y
+            inc[f"stats.paa_{key}"] = sign * x * x
+            inc[f"stats.pbb_{key}"] = sign * y * y
+            inc[f"stats.pab_{key}"] = sign * x * y
+    for column in COUNT_COLUMNS:
+        value = doc.get(document_field(column))
+        if value is not None:
+            # Category values come from PatientForm choices, which are
+            # valid field names
+            inc[f"counts.{column}.{value}"] = sign
+    for column in HISTOGRAM_RANGES:
+        value = doc.get(column)
+        if _is_number(value):
+            inc[f"hist.{column}.{bucket_index(column, value)}"] = sign
+    return inc
+
+
+def change_deltas(before: dict | None, after: dict | None) -> dict:
+    """
+    ``$inc`` fields for replacing ``before`` with ``after`` (either may be
+    None for an insert or a delete); fields that cancel out are dropped.
+    """
+    inc = record_deltas(after, 1) if after is not None else {}
+    if before is not None:
+        for key, value in record_deltas(before, -1).items():
+            inc[key] = inc.get(key, 0) + value
+    return {key: value for key, value in inc.items() if value != 0}
+
+
+def apply_patient_changes(stats_coll, changes) -> None:
+    """
+    Apply ``(before, after)`` patient inserts/updates/deletes to the
+    summary document as one ``$inc``.
+
+    Nothing is written if the summary does not exist yet; the first
+    rebuild counts the changes.
+    """
+    inc = {}
+    for before, after in changes:
+        for key, value in change_deltas(before, after).items():
+            inc[key] = inc.get(key, 0) + value
+    inc = {key: value for key, value in inc.items() if value != 0}
+    if inc:
+        stats_coll.update_one({"_id": STATS_DOC_ID, "format": STATS_FORMAT}, {"$inc": inc})
+
+
+def rebuild_pipeline() -> list:
+    """
+    ``stats_pipeline`` plus fixed-edge histogram facets.
+    """
+    pipeline = stats_pipeline()
+    facets = pipeline[0]["$facet"]
+    for column, (lo, hi) in HISTOGRAM_RANGES.items():
+        width = (hi - lo) / HISTOGRAM_BINS
+        raw_index = {"$floor": {"$divide": [{"$subtract": [f"${column}", lo]}, width]}}
+        index = {"$min": [{"$max": [raw_index, 0]}, HISTOGRAM_BINS - 1]}
+        facets[f"hist_{column}"] = [
+            {"$match": {column: {"$type": "number"}}},
+            {"$group": {"_id": index, "count": {"$sum": 1}}},
+        ]
+    return pipeline
+
+
+def rebuild_patient_stats(patients_coll, stats_coll) -> dict:
+    """
+    Recompute the summary document from the whole collection and store it.
+    """
+    facets = next(patients_coll.aggregate(rebuild_pipeline()), {})
+    stats = (facets.get("stats") or [{}])[0]
+    stats.pop("_id", None)
+    # min/max cannot be maintained under deletes
+    stats = {k: v for k, v in stats.items() if not k.startswith(("min_", "max_"))}
+    stats.setdefault("total", 0)
+
+    doc = {
+        "_id": STATS_DOC_ID,
+        "format": STATS_FORMAT,
+        "stats": stats,
+        "counts": {
+            column: {str(row["_id"]): row["count"] for row in facets.get(column, [])}
+            for column in COUNT_COLUMNS
+        },
+        "hist": {
+            column: {
+                str(int(row["_id"])): row["count"]
+                for row in facets.get(f"hist_{column}", [])
+            }
+            for column in HISTOGRAM_RANGES
+        },
+        "rebuilt_at": datetime.utcnow(),
+    }
+    stats_coll.replace_one({"_id": STATS_DOC_ID}, doc, upsert=True)
+    return doc
+
+
+def summary_from_running(doc: dict) -> dict:
+    """
+    Summary payload (same shape as ``compute_summary``) from the summary
+    document, with histograms on the fixed edges.
+    """
+    stats = dict(doc.get("stats") or {})
+    counts = {
+        column: [{"_id": value, "count": n} for value, n in values.items() if n]
+        for column, values in (doc.get("counts") or {}).items()
+    }
+    summary = summary_from_stats(stats, counts, {})
+    for column, (lo, hi) in HISTOGRAM_RANGES.items():
+        buckets = (doc.get("hist") or {}).get(column) or {}
+        counts_row = [int(buckets.get(str(i), 0)) for i in range(HISTOGRAM_BINS)]
+        if any(counts_row):
+            edges = np.linspace(lo, hi, HISTOGRAM_BINS + 1)
+            summary["histograms"][column] = {
+                "edges": [round(float(e), 4) for e in edges],
+                "counts": counts_row,
+            }
+    return summary
+
+
+def load_running_summary(patients_coll, stats_coll, max_age_seconds: float, schedule_rebuild):
+    """
+    Summary payload from the running aggregates.
+
+    Builds the summary document if it is missing or in an old format;
+    concurrent requests wait for that one build instead of each scanning
+    the collection. If it is older than ``max_age_seconds``,
+    ``schedule_rebuild()`` is called once to refresh it in the background
+    (at most one rebuild runs at a time in this process).
+    """
+    doc = stats_coll.find_one({"_id": STATS_DOC_ID})
+    if doc is None or doc.get("format") != STATS_FORMAT:
+        with _build_lock:
+            # Another request may have built it while this one waited
+            doc = stats_coll.find_one({"_id": STATS_DOC_ID})
+            if doc is None or doc.get("format") != STATS_FORMAT:
+                doc = rebuild_patient_stats(patients_coll, stats_coll)
+    elif max_age_seconds and doc.get("rebuilt_at", datetime.min) < (
+        datetime.utcnow() - timedelta(seconds=max_age_seconds)
+    ):
+        _start_rebuild(schedule_rebuild)
+    return summary_from_running(doc)
+
+
+def _start_rebuild(schedule_rebuild) -> None:
+    global _rebuild_running
+    with _rebuild_lock:
+        if _rebuild_running:
+            return
+        _rebuild_running = True
+    try:
+        schedule_rebuild()
+    except Exception:
+        rebuild_finished()
+        raise
+
+
+def rebuild_finished() -> None:
+    """
+    Allow the next background rebuild to be scheduled.
+    """
+    global _rebuild_running
+    with _rebuild_lock:
+        _rebuild_running = False
@@ -0,0 +1,205 @@
+"""
+Single-pass profiling of the numeric columns of the stroke dataset.
+
+The data overview page needs, per numeric column: missing counts,
+count/mean/std, min/max, quartiles and IQR outlier counts. Computing
+those with ``isna().sum()``, ``describe()`` and a per-column quantile
+loop scans the frame many times. ``profile_dataset`` instead copies
+the numeric columns into one 2-D float array and derives everything
+from a single column-wise sort of that array:
+
+- missing values are the NaNs, which ``np.sort`` places at the end;
+- min, max and the quartiles are read from the sorted rows by index
+  (using the same linear interpolation as pandas);
+- mean, std and outlier counts are vectorised reductions over axis 0.
+
+The resulting ``DatasetProfile`` is cached per dataset version and
+renders the same tables the page showed before.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .schema import float32_display_values
+
+SUMMARY_COLUMNS = ["count", "mean", "std", "min", "25%", "50%", "75%", "max"]
+
+
+class DatasetProfile:
+    """
+    Per-column statistics for a dataset, ready to be rendered as tables.
+    """
+
+    def __init__(
+        self,
+        missing: pd.Series,
+        stats: pd.DataFrame,
+        method: str = "exact",
+        rank_error: float | None = None,
+    ):
+        # Missing values for every column, in the dataset's column order
+        self.missing = missing
+        # One row per numeric column: SUMMARY_COLUMNS plus IQR bounds/outliers
+        self.stats = stats
+        # "exact", or "sketch" when quartiles are estimates with a rank error
+        self.method = method
+        self.rank_error = rank_error
+
+    def missing_frame(self) -> pd.DataFrame:
+        return (
+            self.missing.reset_index()
+            .rename(columns={"index": "Column", 0: "Missing values"})
+        )
+
+    def summary_frame(self) -> pd.DataFrame:
+        return self.stats[SUMMARY_COLUMNS].reset_index().rename(
+            columns={"index": "Column"}
+        )
+
+    def outlier_frame(self) -> pd.DataFrame:
+        present = self.stats[self.stats["count"] > 0]
+        return pd.DataFrame(
+            {
+                "Column": present.index,
+                "Outliers": present["outliers"].astype(int).to_numpy(),
+            }
+        )
+
+
+def _sorted_quantile(sorted_x: np.ndarray, counts: np.ndarray, q: float) -> np.ndarray:
+    """
+    Linear-interpolated quantile of each column of a column-sorted array
+    whose NaNs have been sorted to the end.
+    """
+    n_cols = sorted_x.shape[1]
+    result = np.full(n_cols, np.nan)
+    valid = counts > 0
+    if not valid.any():
+        return result
+
+    cols = np.nonzero(valid)[0]
+    pos = q * (counts[valid] - 1)
+    lo = np.floor(pos).astype(np.intp)
+    hi = np.ceil(pos).astype(np.intp)
+    lo_vals = sorted_x[lo, cols]
+    hi_vals = sorted_x[hi, cols]
+    result[valid] = lo_vals + (hi_vals - lo_vals) * (pos - lo)
+    return result
+
+
+def widen_float32_stats(values, float32_mask: np.ndarray) -> np.ndarray:
+    """
+    Per-column order statistics as float64, with the entries of float32
+    columns kept at float32 precision (36.6 rather than 36.599998).
+    """
+    values = np.array(values, dtype=np.float64)
+    if float32_mask.any():
+        values[float32_mask] = float32_display_values(values[float32_mask])
+    return values
+
+
+def iqr_bounds(q1: np.ndarray, q3: np.ndarray, float32_mask: np.ndarray):
+    """
+    1.5 * IQR outlier bounds per column.
+
+    Returns ``(lower, upper, compare_lower, compare_upper)``. The compare
+    bounds of float32 columns are rounded to float32, so a value equal to
+    a bound is not counted as an outlier just because the value and the
+    bound were widened to float64 differently.
+    """
+    iqr = q3 - q1
+    lower = q1 - 1.5 * iqr
+    upper = q3 + 1.5 * iqr
+    compare_lower = np.where(float32_mask, lower.astype(np.float32), lower)
+    compare_upper = np.where(float32_mask, upper.astype(np.float32), upper)
+    return lower, upper, compare_lower, compare_upper
+
+
+def _empty_profile(df: pd.DataFrame, numeric_columns: list) -> DatasetProfile:
+    """
+    Profile of a dataset with no rows (e.g. a header-only CSV).
+    """
+    stats = pd.DataFrame(
+        np.nan,
+        index=pd.Index(numeric_columns),
+        columns=SUMMARY_COLUMNS + ["lower_bound", "upper_bound", "outliers"],
+    )
+    stats["count"] = 0.0
+    stats["outliers"] = 0
+    missing = pd.Series(0, index=df.columns, dtype=np.int64)
+    return DatasetProfile(missing=missing, stats=stats)
+
+
+def profile_dataset(df: pd.DataFrame, numeric_columns=None) -> DatasetProfile:
+    """
+    Compute a ``DatasetProfile`` for ``df``.
+
+    :param df: the dataset
+    :param numeric_columns: columns to profile (defaults to every numeric
+                            column, matching the overview page)
+    """
+    if numeric_columns is None:
+        numeric_columns = df.select_dtypes(include="number").columns
+    numeric_columns = list(numeric_columns)
+
+    x = df[numeric_columns].to_numpy(dtype=np.float64, copy=True)
+    n_rows = x.shape[0]
+    if n_rows == 0:
+        return _empty_profile(df, numeric_columns)
+
+    sorted_x = np.sort(x, axis=0)
+    nan_mask = np.isnan(x)
+    counts = n_rows - nan_mask.sum(axis=0)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sums = np.where(nan_mask, 0.0, x).sum(axis=0)
+        means = sums / counts
+        centred = np.where(nan_mask, 0.0, x - means)
+        # NaN for fewer than two values, as pandas gives
+        stds = np.where(
+            counts > 1, np.sqrt((centred * centred).sum(axis=0) / (counts - 1)), np.nan
+        )
+    del centred
+
+    float32_mask = np.array([df[c].dtype == np.float32 for c in numeric_columns], dtype=bool)
+    has_values = counts > 0
+    last = np.maximum(counts - 1, 0)
+    mins, maxs, q1, q2, q3 = (
+        widen_float32_stats(values, float32_mask)
+        for values in (
+            np.where(has_values, sorted_x[0], np.nan),
+            np.where(has_values, sorted_x[last, np.arange(len(numeric_columns))], np.nan),
+            _sorted_quantile(sorted_x, counts, 0.25),
+            _sorted_quantile(sorted_x, counts, 0.50),
+            _sorted_quantile(sorted_x, counts, 0.75),
+        )
+    )
+
+    lower, upper, compare_lower, compare_upper = iqr_bounds(q1, q3, float32_mask)
+    with np.errstate(invalid="ignore"):
+        outliers = ((x < compare_lower) | (x > compare_upper)).sum(axis=0)
+
+    stats = pd.DataFrame(
+        {
+            "count": counts.astype(np.float64),
+            "mean": means,
+            "std": stds,
+            "min": mins,
+            "25%": q1,
+            "50%": q2,
+            "75%": q3,
+            "max": maxs,
+            "lower_bound": lower,
+            "upper_bound": upper,
+            "outliers": outliers,
+        },
+        index=pd.Index(numeric_columns),
+    )
+
+    missing = pd.Series(0, index=df.columns, dtype=np.int64)
+    missing[numeric_columns] = n_rows - counts
+    other_columns = [c for c in df.columns if c not in set(numeric_columns)]
+    if other_columns:
+        missing[other_columns] = df[other_columns].isna().sum()
+
+    return DatasetProfile(missing=missing, stats=stats)
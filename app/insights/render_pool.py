@@ -0,0 +1,175 @@
+"""
+Off-request chart rendering.
+
+matplotlib's pyplot interface keeps process-global state, so charts drawn
+inside request threads have to be serialised and hold up the request
+that triggered them. ``ChartRenderer`` hands rendering to a small pool
+of worker processes instead:
+
+- identical jobs (same chart file) that are already in flight are merged,
+  so N simultaneous page loads cause a single render;
+- the number of pending jobs is bounded, and callers wait at most a
+  configurable timeout before falling back to a placeholder image;
+- submission, deduplication, queue depth and render times are counted.
+
+With ``workers=0`` jobs run synchronously in the calling thread, which
+keeps tests and single-process setups free of child processes.
+"""
+
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+
+class RenderQueueFull(RuntimeError):
+    """
+    Raised when a job is submitted while the pending-job limit is reached.
+    """
+
+
+class ChartRenderer:
+    """
+    Process pool for chart jobs with single-flight deduplication.
+    """
+
+    def __init__(self, workers: int = 2, max_pending: int = 16):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._executor = None
+        self._executor_pid = None
+        self._inflight = {}  # job key -> Future
+        self.submitted = 0
+        self.deduplicated = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.render_seconds = 0.0
+        self.last_render_seconds = None
+
+    def configure(self, workers: int, max_pending: int) -> None:
+        """
+        Change the pool size and queue limit; takes effect for new pools.
+        """
+        with self._lock:
+            self.workers = workers
+            self.max_pending = max_pending
+
+    def _get_executor(self):
+        # A pool inherited across fork() is unusable, so build one per process.
+        if self._executor is None or self._executor_pid != os.getpid():
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            self._executor_pid = os.getpid()
+        return self._executor
+
+    def submit(self, key: str, fn, *args, on_success=None) -> Future:
+        """
+        Run ``fn(*args)`` in the pool, or join the in-flight job for ``key``.
+
+        ``fn`` must be a picklable top-level function returning its render
+        time in seconds. ``on_success`` is called in this process once a
+        new job finishes successfully.
+
+        Raises RenderQueueFull when ``max_pending`` jobs are already queued.
+        """
+        if self.workers <= 0:
+            return self._run_inline(fn, args, on_success)
+
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.deduplicated += 1
+                return future
+            if len(self._inflight) >= self.max_pending:
+                self.rejected += 1
+                raise RenderQueueFull(f"{len(self._inflight)} chart jobs pending")
+
+            try:
+                future = self._get_executor().submit(fn, *args)
+            except BrokenProcessPool:
+                # A crashed worker poisons the pool; start a fresh one.
+                self._executor = None
+                future = self._get_executor().submit(fn, *args)
+            self._inflight[key] = future
+            self.submitted += 1
+
+        future.add_done_callback(
+            lambda fut: self._finish(key, fut, on_success)
+        )
+        return future
+
+    def _run_inline(self, fn, args, on_success) -> Future:
+        future = Future()
+        with self._lock:
+            self.submitted += 1
+        try:
+            future.set_result(fn(*args))
+        except Exception as exc:
+            future.set_exception(exc)
+        self._finish(None, future, on_success)
+        return future
+
+    def _finish(self, key, future: Future, on_success) -> None:
+        with self._lock:
+            if key is not None:
+                self._inflight.pop(key, None)
+            if future.cancelled() or future.exception() is not None:
+                self.failed += 1
+                return
+            seconds = future.result()
+            self.completed += 1
+            self.render_seconds += seconds
+            self.last_render_seconds = seconds
+        if on_success is not None:
+            on_success()
+
+    def record_timeout(self, count: int = 1) -> None:
+        """
+        Count callers that gave up waiting and served a placeholder.
+        """
+        with self._lock:
+            self.timeouts += count
+
+    def shutdown(self) -> None:
+        """
+        Stop the worker processes, dropping jobs that have not started.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None and self._executor_pid == os.getpid():
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        """
+        Snapshot of the renderer counters, suitable for JSON output.
+        """
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "queue_depth": len(self._inflight),
+                "submitted": self.submitted,
+                "deduplicated": self.deduplicated,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                "render_seconds_total": round(self.render_seconds, 4),
+                "last_render_seconds": (
+                    round(self.last_render_seconds, 4)
+                    if self.last_render_seconds is not None
+                    else None
+                ),
+            }
+
+
+# Process-wide instance used by the insights views
+chart_renderer = ChartRenderer()
+atexit.register(chart_renderer.shutdown)
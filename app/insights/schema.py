@@ -0,0 +1,122 @@
+"""
+Declared column types for the stroke dataset.
+
+Parsed with default dtypes, the text columns become Python string
+objects and the 0/1 flags become int64. That costs far more memory than
+the data needs and makes every copy, pickle and snapshot larger. The
+schema below is applied whenever the dataset is read:
+
+- text columns become categoricals, with the categories taken from the
+  choices already declared on ``PatientForm`` (values the form does not
+  know about are kept and appended, never turned into missing values);
+- 0/1 flags become int8 (float32 if a column has missing values);
+- continuous measures become float32;
+- "N/A" is parsed as missing, alongside pandas' default markers such as
+  empty cells.
+"""
+
+import numpy as np
+import pandas as pd
+
+from app.patient.forms import PatientForm
+
+# Dataset column -> PatientForm field whose choices list the categories
+CATEGORY_FIELDS = {
+    "gender": "gender",
+    "ever_married": "ever_married",
+    "work_type": "work_type",
+    "Residence_type": "residence_type",
+    "smoking_status": "smoking_status",
+}
+FLAG_COLUMNS = ("hypertension", "heart_disease", "stroke")
+MEASURE_COLUMNS = ("age", "avg_glucose_level", "bmi")
+NA_VALUES = ["N/A"]
+
+# Significant decimal digits a float32 value reliably carries
+FLOAT32_DIGITS = 7
+
+
+def _form_choices(field_name: str) -> list:
+    """
+    Stored values of a SelectField declared on ``PatientForm``.
+    """
+    field = getattr(PatientForm, field_name)
+    return [value for value, _label in field.kwargs["choices"]]
+
+
+CATEGORIES = {column: _form_choices(field) for column, field in CATEGORY_FIELDS.items()}
+
+# dtype mapping passed to read_csv; columns absent from a file are ignored.
+# Numeric columns are parsed with the default types and narrowed in
+# ``apply_schema``: the C parser is slower when asked for float32 directly.
+CSV_DTYPES = {column: "category" for column in CATEGORIES}
+
+
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Finish typing a frame read with ``CSV_DTYPES`` (modifies ``df`` in place).
+
+    Expects numeric columns to hold numbers; the upload validator
+    guarantees that for installed datasets.
+
+    Categoricals get the declared category order plus any unexpected
+    values; unused categories are dropped so counts match the data.
+    """
+    for column, declared in CATEGORIES.items():
+        if column not in df.columns:
+            continue
+        series = df[column]
+        if not isinstance(series.dtype, pd.CategoricalDtype):
+            series = series.astype("category")
+        seen = series.cat.categories
+        extra = sorted(str(v) for v in seen.difference(declared))
+        df[column] = (
+            series.cat.set_categories(declared + extra).cat.remove_unused_categories()
+        )
+
+    for column in FLAG_COLUMNS:
+        if column in df.columns:
+            flags = df[column]
+            df[column] = flags.astype(np.float32 if flags.isna().any() else np.int8)
+    for column in MEASURE_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype(np.float32)
+    return df
+
+
+def read_stroke_csv(path, **kwargs):
+    """
+    ``pd.read_csv`` with the stroke dataset schema applied.
+
+    Accepts the same keyword arguments; with ``chunksize`` it returns an
+    iterator of typed chunks.
+    """
+    kwargs.setdefault("dtype", CSV_DTYPES)
+    kwargs.setdefault("na_values", NA_VALUES)
+    result = pd.read_csv(path, **kwargs)
+    if kwargs.get("chunksize"):
+        return (apply_schema(chunk) for chunk in result)
+    return apply_schema(result)
+
+
+def float32_display_values(values) -> np.ndarray:
+    """
+    Widen float32 values to float64 at the precision float32 holds.
+
+    ``np.float32(36.6)`` widens to 36.599998..., which tables would show
+    as such; rounding to FLOAT32_DIGITS significant digits gives 36.6.
+    """
+    return np.array(
+        [float(f"{v:.{FLOAT32_DIGITS}g}") for v in np.asarray(values, dtype=np.float64)]
+    )
+
+
+def display_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Copy of a (small) frame with float32 columns widened for display.
+    """
+    out = df.copy()
+    for column in out.columns:
+        if out[column].dtype == np.float32:
+            out[column] = float32_display_values(out[column].to_numpy())
+    return out
@@ -0,0 +1,177 @@
+"""
+Binary columnar snapshots of the stroke dataset.
+
+When a dataset is uploaded, a snapshot is written next to the CSV:
+
+    <csv path>.snapshot/<version>/manifest.json
+    <csv path>.snapshot/<version>/000.npy, 001.npy, ...
+
+Each column is stored as one typed ``.npy`` array. Text columns are
+stored as integer category codes, with the category labels kept in the
+manifest. Loading a snapshot memory-maps the arrays instead of parsing
+text. Several worker processes can then share the OS page cache, and a
+cold worker can serve its first request almost immediately.
+
+Snapshot directories are named after the CSV's version token (see
+``dataset_cache.dataset_version``), so a snapshot can never be paired
+with a different file than the one it was built from.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from .dataset_cache import dataset_version
+
+SNAPSHOT_FORMAT = 1
+MANIFEST_NAME = "manifest.json"
+
+
+def snapshot_root(csv_path: str) -> str:
+    """
+    Folder that holds all snapshot versions for ``csv_path``.
+    """
+    return f"{csv_path}.snapshot"
+
+
+def _codes_dtype(n_categories: int):
+    if n_categories < np.iinfo(np.int8).max:
+        return np.int8
+    if n_categories < np.iinfo(np.int16).max:
+        return np.int16
+    return np.int32
+
+
+def write_snapshot(
+    df: pd.DataFrame,
+    csv_path: str,
+    version: str | None = None,
+    prune: bool = True,
+) -> str:
+    """
+    Write a columnar snapshot of ``df`` for the given CSV file.
+
+    The snapshot is assembled in a temporary folder and renamed into
+    place, so readers never observe a partially written snapshot. Older
+    snapshot versions for the same CSV are removed afterwards unless
+    ``prune`` is False.
+
+    :param df: parsed contents of ``csv_path``
+    :param csv_path: the CSV file the snapshot describes
+    :param version: version token of ``csv_path`` (computed if omitted);
+                    may be the version of a staged file not yet renamed
+                    to ``csv_path``
+    :param prune: remove snapshots of other versions
+    :return: path of the snapshot folder
+    """
+    version = version or dataset_version(csv_path)
+    root = snapshot_root(csv_path)
+    final_dir = os.path.join(root, version)
+    if os.path.exists(os.path.join(final_dir, MANIFEST_NAME)):
+        return final_dir
+
+    os.makedirs(root, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=".tmp-", dir=root)
+    try:
+        columns = []
+        for idx, name in enumerate(df.columns):
+            series = df[name]
+            file_name = f"{idx:03d}.npy"
+            meta = {"name": str(name), "file": file_name}
+
+            if isinstance(series.dtype, pd.CategoricalDtype) or series.dtype == object:
+                cat = pd.Categorical(series)
+                codes = cat.codes.astype(_codes_dtype(len(cat.categories)))
+                np.save(os.path.join(tmp_dir, file_name), codes)
+                meta["kind"] = "category"
+                meta["categories"] = cat.categories.tolist()
+                meta["ordered"] = bool(cat.ordered)
+            elif series.dtype.kind in "biufmM":
+                np.save(os.path.join(tmp_dir, file_name), series.to_numpy())
+                meta["kind"] = "array"
+            else:
+                raise TypeError(
+                    f"Column {name!r} has unsupported dtype {series.dtype} for snapshots."
+                )
+            columns.append(meta)
+
+        manifest = {
+            "format": SNAPSHOT_FORMAT,
+            "version": version,
+            "rows": len(df),
+            "columns": columns,
+        }
+        with open(os.path.join(tmp_dir, MANIFEST_NAME), "w", encoding="utf-8") as fh:
+            json.dump(manifest, fh)
+
+        try:
+            os.rename(tmp_dir, final_dir)
+        except OSError:
+            # Another worker published the same version first
+            if not os.path.exists(os.path.join(final_dir, MANIFEST_NAME)):
+                raise
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    if prune:
+        prune_snapshots(csv_path, keep=version)
+    return final_dir
+
+
+def prune_snapshots(csv_path: str, keep: str) -> None:
+    """
+    Delete snapshot folders for versions other than ``keep``.
+
+    Workers that still have the old arrays mapped keep reading them;
+    the data is only released once the last mapping is closed.
+    """
+    root = snapshot_root(csv_path)
+    if not os.path.isdir(root):
+        return
+    for entry in os.listdir(root):
+        if entry == keep or entry.startswith(".tmp-"):
+            continue
+        shutil.rmtree(os.path.join(root, entry), ignore_errors=True)
+
+
+def remove_snapshot(csv_path: str, version: str) -> None:
+    """
+    Delete the snapshot folder for one version, if it exists.
+    """
+    shutil.rmtree(os.path.join(snapshot_root(csv_path), version), ignore_errors=True)
+
+
+def load_snapshot(csv_path: str, version: str | None = None):
+    """
+    Memory-map the snapshot for the current version of ``csv_path``.
+
+    Returns a read-only DataFrame, or None if no matching snapshot exists.
+    """
+    version = version or dataset_version(csv_path)
+    snap_dir = os.path.join(snapshot_root(csv_path), version)
+    try:
+        with open(os.path.join(snap_dir, MANIFEST_NAME), encoding="utf-8") as fh:
+            manifest = json.load(fh)
+    except FileNotFoundError:
+        return None
+
+    if manifest.get("format") != SNAPSHOT_FORMAT:
+        return None
+
+    data = {}
+    for meta in manifest["columns"]:
+        arr = np.load(os.path.join(snap_dir, meta["file"]), mmap_mode="r")
+        if meta["kind"] == "category":
+            data[meta["name"]] = pd.Categorical.from_codes(
+                arr, categories=meta["categories"], ordered=meta["ordered"]
+            )
+        else:
+            data[meta["name"]] = arr
+
+    return pd.DataFrame(data, copy=False)
@@ -0,0 +1,155 @@
+"""
+Streaming, validated and atomic replacement of the stroke dataset.
+
+An upload is copied in fixed-size blocks to a temporary file next to the
+live dataset, with a hard size limit. The temporary file is then checked
+in row chunks against the expected columns and value types. Only when
+every chunk passes is it renamed over the live dataset with
+``os.replace``, which is atomic on the same filesystem. Other requests
+therefore see either the old file or the complete new one, never a
+partial write. Memory use is bounded by the block and chunk sizes, not
+by the size of the upload.
+
+The upload page stages the file with ``stage_dataset`` and publishes it
+from a background job once its snapshot, profile and charts are built.
+"""
+
+import os
+import tempfile
+
+import pandas as pd
+
+from .schema import FLAG_COLUMNS, MEASURE_COLUMNS, NA_VALUES
+
+# Columns every uploaded dataset must provide
+REQUIRED_COLUMNS = ("gender", "age", "hypertension", "heart_disease", "bmi", "stroke")
+# Columns that must parse as numbers when present (blank / N/A allowed);
+# FLAG_COLUMNS are further restricted to 0/1
+NUMERIC_COLUMNS = MEASURE_COLUMNS + FLAG_COLUMNS
+
+COPY_BLOCK_BYTES = 1024 * 1024
+
+
+class DatasetValidationError(ValueError):
+    """
+    Raised when an uploaded file is too large or does not match the schema.
+    """
+
+
+def stream_to_temp(stream, target_dir: str, max_bytes: int) -> str:
+    """
+    Copy ``stream`` into a new temporary file inside ``target_dir``.
+
+    Raises DatasetValidationError (and removes the partial file) if more
+    than ``max_bytes`` are received.
+    """
+    os.makedirs(target_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".upload-", suffix=".csv", dir=target_dir)
+    written = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                block = stream.read(COPY_BLOCK_BYTES)
+                if not block:
+                    break
+                written += len(block)
+                if written > max_bytes:
+                    raise DatasetValidationError(
+                        f"File is larger than the {max_bytes // (1024 * 1024)} MB limit."
+                    )
+                out.write(block)
+            out.flush()
+            os.fsync(out.fileno())
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return tmp_path
+
+
+def _validate_chunk(chunk: pd.DataFrame, first_row: int) -> None:
+    for col in NUMERIC_COLUMNS:
+        if col not in chunk.columns:
+            continue
+        raw = chunk[col]
+        values = pd.to_numeric(raw, errors="coerce")
+        bad = values.isna() & raw.notna()
+        if bad.any():
+            row = first_row + int(bad.to_numpy().argmax())
+            raise DatasetValidationError(
+                f"Column '{col}' has a non-numeric value {raw[bad].iloc[0]!r} on row {row}."
+            )
+        if col in FLAG_COLUMNS:
+            bad = values.notna() & ~values.isin([0, 1])
+            if bad.any():
+                row = first_row + int(bad.to_numpy().argmax())
+                raise DatasetValidationError(
+                    f"Column '{col}' must be 0 or 1 (row {row})."
+                )
+
+
+def validate_csv(path: str, chunk_rows: int = 100_000):
+    """
+    Check a CSV file chunk by chunk against the expected schema.
+
+    Returns ``(preview, row_count)`` where ``preview`` is a DataFrame
+    with the first ten rows. Raises DatasetValidationError on the first
+    problem found.
+    """
+    preview = None
+    rows = 0
+    try:
+        # No dtypes are forced here, so a bad value is reported with its row
+        # instead of failing the whole parse
+        for chunk in pd.read_csv(path, chunksize=chunk_rows, na_values=NA_VALUES):
+            if preview is None:
+                missing = [c for c in REQUIRED_COLUMNS if c not in chunk.columns]
+                if missing:
+                    raise DatasetValidationError(
+                        "Missing required column(s): " + ", ".join(missing) + "."
+                    )
+                preview = chunk.head(10)
+            # Row numbers are 1-based data rows (the header is row 0)
+            _validate_chunk(chunk, first_row=rows + 1)
+            rows += len(chunk)
+    except (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError) as exc:
+        raise DatasetValidationError(f"File could not be parsed as CSV ({exc}).") from exc
+
+    if preview is None or rows == 0:
+        raise DatasetValidationError("The file contains no data rows.")
+    return preview, rows
+
+
+def stage_dataset(stream, dataset_path: str, max_bytes: int, chunk_rows: int = 100_000):
+    """
+    Stream and validate an upload into a staged file next to the dataset.
+
+    Returns ``(staged_path, preview, row_count)``. The live dataset is not
+    touched; call ``publish_dataset`` to install the staged file. Because
+    the staged file is later renamed rather than copied, its
+    ``dataset_version`` stays the same once published, so artefacts can
+    be built for that version before the swap.
+    """
+    tmp_path = stream_to_temp(stream, os.path.dirname(dataset_path) or ".", max_bytes)
+    try:
+        preview, rows = validate_csv(tmp_path, chunk_rows=chunk_rows)
+        # mkstemp creates owner-only files; match a normally saved dataset
+        os.chmod(tmp_path, 0o644)
+    except BaseException:
+        discard_staged(tmp_path)
+        raise
+    return tmp_path, preview, rows
+
+
+def publish_dataset(staged_path: str, dataset_path: str) -> None:
+    """
+    Atomically replace the live dataset with a staged file.
+    """
+    os.replace(staged_path, dataset_path)
+
+
+def discard_staged(staged_path: str) -> None:
+    """
+    Remove a staged upload that will not be published.
+    """
+    if os.path.exists(staged_path):
+        os.remove(staged_path)
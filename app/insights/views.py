@@ -1,37 +1,152 @@
+import hashlib
+import json
 import os
-from datetime import datetime
+import time
+from concurrent.futures import wait
+from datetime import datetime, timedelta
 
+import click
 import pandas as pd
-import matplotlib
-matplotlib.use("Agg")  # non-GUI backend for servers
-import matplotlib.pyplot as plt
 
 from flask import (
     render_template,
     current_app,
     flash,
+    jsonify,
+    redirect,
     request,
+    url_for,
 )
 from flask_login import login_required, current_user
-from pymongo.errors import ServerSelectionTimeoutError
+from pymongo.errors import PyMongoError, ServerSelectionTimeoutError
 
 from . import insights_bp
-from app.db_mongo import get_activity_collection, log_activity
+from .activity import (
+    ACTION_CODES,
+    ACTIVITY_PROJECTION,
+    ACTIVITY_SORT,
+    ActivityFilters,
+    build_activity_query,
+)
+from .analytics import SUMMARY_FORMAT, compute_summary
+from .chart_cache import chart_cache
+from .charts import (
+    CHART_SPECS,
+    available_charts,
+    chart_inputs,
+    chart_params,
+    render_chart_file,
+)
+from .dataset_cache import dataset_cache, dataset_version
+from .jobs import find_job, job_queue, patient_job_queue
+from .mongo_analytics import compute_mongo_summary
+from .patient_stats import load_running_summary, rebuild_finished, rebuild_patient_stats
+from .profiling import profile_dataset
+from .render_pool import RenderQueueFull, chart_renderer
+from .schema import display_frame, read_stroke_csv
+from .sketches import DEFAULT_SKETCH_K, stream_profile
+from .snapshot import load_snapshot, prune_snapshots, remove_snapshot, write_snapshot
+from .upload import (
+    DatasetValidationError,
+    discard_staged,
+    publish_dataset,
+    stage_dataset,
+    stream_to_temp,
+)
+from app.activity_feed import activity_feed
+from app.activity_store import ROLLUP_PERIODS, period_start, rollup_series
+from app.audit_writer import audit_writer
+from app.db_mongo import (
+    get_activity_collection,
+    get_activity_rollup_collection,
+    get_patient_collection,
+    get_patient_stats_collection,
+    log_activity,
+    mongo_clients,
+)
+from app.login_guard import login_limiter, password_pool
+from app.patient.importer import run_patient_import
+from app.patient.queries import InvalidCursor, Page, fetch_page
+from app.user_cache import user_cache
+
+# Shown while a chart is still being rendered in the background
+PLACEHOLDER_CHART = "img/chart_pending.svg"
+
+# Steps of the background job that prepares an uploaded dataset
+DATASET_JOB_STEPS = [
+    "Loading data",
+    "Writing snapshot",
+    "Profiling",
+    "Computing aggregates",
+    "Rendering charts",
+    "Publishing",
+]
+# Activity over time: (default, maximum) days shown per rollup period
+TREND_DAYS = {"hour": (2, 31), "day": (30, 366)}
+
+# Steps of the background job that imports an uploaded file into patients
+PATIENT_IMPORT_JOB_STEPS = ["Importing patients"]
+
+
+def _read_stroke_csv(csv_path: str) -> pd.DataFrame:
+    """
+    Load the stroke dataset. Only called on a dataset cache miss.
 
-def _load_stroke_data():
+    A binary snapshot written at upload time is memory-mapped when one
+    exists for the current file version; otherwise the CSV is parsed
+    with the dataset schema (categoricals, int8 flags, float32 measures).
+    """
+    df = load_snapshot(csv_path)
+    if df is None:
+        df = read_stroke_csv(csv_path)
+    return df
+
+
+def _load_versioned_stroke_data():
     """
     Load the stroke dataset from the configured CSV path.
-    Returns a pandas DataFrame or None if the file is missing.
+    Returns a ``(DataFrame, version)`` pair, or ``(None, None)`` if the
+    file is missing.
+
+    The parsed frame is cached per file version and shared between
+    requests, so callers must not modify it in place.
     """
     csv_path = current_app.config["STROKE_DATA_PATH"]
     try:
-        df = pd.read_csv(csv_path)
+        version, df = dataset_cache.get_with_version(csv_path, _read_stroke_csv)
     except FileNotFoundError:
-        return None
-    except Exception as exc:
+        return None, None
+    except Exception as exc:  # pragma: no cover
         current_app.logger.warning("Could not read stroke dataset: %s", exc)
-        return None
-    return df
+        return None, None
+    return df, version
+
+
+def _load_stroke_data():
+    """
+    Load the stroke dataset from the configured CSV path.
+    Returns a pandas DataFrame or None if the file is missing.
+    """
+    return _load_versioned_stroke_data()[0]
+
+
+@insights_bp.record_once
+def _configure_caches(state):
+    """
+    Apply cache limits from the app config when the blueprint is registered.
+    """
+    config = state.app.config
+    chart_cache.max_files = config.get("CHART_CACHE_MAX_FILES", chart_cache.max_files)
+    chart_cache.max_bytes = config.get("CHART_CACHE_MAX_BYTES", chart_cache.max_bytes)
+    chart_renderer.configure(
+        workers=config.get("CHART_RENDER_WORKERS", chart_renderer.workers),
+        max_pending=config.get("CHART_RENDER_MAX_PENDING", chart_renderer.max_pending),
+    )
+    activity_feed.configure(
+        buffer_size=config.get("ACTIVITY_STREAM_BUFFER", 100),
+        history=config.get("ACTIVITY_STREAM_HISTORY", 100),
+        max_subscribers=config.get("ACTIVITY_STREAM_MAX_CLIENTS", 50),
+    )
 
 
 def _charts_dir():
@@ -43,191 +158,115 @@ def _charts_dir():
     return charts_root
 
 
-def _save_fig(path: str):
+def _generate_summary_charts(df: pd.DataFrame, version: str, block: bool = False) -> dict:
     """
-    Helper to save the current matplotlib figure and close it.
-    """
-    plt.tight_layout()
-    plt.savefig(path, bbox_inches="tight")
-    plt.close()
-
-
-def _generate_summary_charts(df: pd.DataFrame) -> dict:
-    """
-    Generate core summary charts and return mapping of chart keys to
-    static file paths (relative to the 'static' folder).
+    Return mapping of chart keys to static file paths (relative to the
+    'static' folder).
+
+    Charts already cached for this dataset version are reused. Missing
+    ones are rendered by the chart worker pool; if a render does not
+    finish within CHART_RENDER_TIMEOUT a placeholder image is returned
+    and the finished chart is picked up on a later page view. With
+    ``block=True`` (background jobs) every render is waited for.
     """
     charts_root = _charts_dir()
 
-    gender_file = "charts/gender_distribution.png"
-    stroke_file = "charts/stroke_distribution.png"
-    age_file = "charts/age_histogram.png"
-    bmi_file = "charts/bmi_histogram.png"
-    heatmap_file = "charts/correlation_heatmap.png"
-
-    # 1. Gender distribution (horizontal bar)
-    if "gender" in df.columns:
-        plt.figure(figsize=(4.5, 3.5))
-        df["gender"].value_counts().plot(kind="barh")
-        plt.title("Gender distribution")
-        plt.xlabel("Count")
-        plt.ylabel("Gender")
-        _save_fig(os.path.join(charts_root, "gender_distribution.png"))
-
-    # 2. Stroke vs no stroke
-    if "stroke" in df.columns:
-        plt.figure(figsize=(4.5, 3.5))
-        df["stroke"].value_counts().rename({0: "No stroke", 1: "Stroke"}).plot(
-            kind="bar"
-        )
-        plt.title("Stroke vs no stroke")
-        plt.xlabel("Outcome")
-        plt.ylabel("Count")
-        _save_fig(os.path.join(charts_root, "stroke_distribution.png"))
-
-    # 3. Age distribution
-    if "age" in df.columns:
-        plt.figure(figsize=(5, 3.5))
-        df["age"].dropna().plot(kind="hist", bins=20)
-        plt.title("Age distribution")
-        plt.xlabel("Age (years)")
-        plt.ylabel("Number of patients")
-        _save_fig(os.path.join(charts_root, "age_histogram.png"))
-
-    # 4. BMI distribution
-    if "bmi" in df.columns:
-        plt.figure(figsize=(5, 3.5))
-        df["bmi"].dropna().plot(kind="hist", bins=20)
-        plt.title("BMI distribution")
-        plt.xlabel("BMI")
-        plt.ylabel("Number of patients")
-        _save_fig(os.path.join(charts_root, "bmi_histogram.png"))
-
-    # 5. Correlation heatmap
-    numeric_df = df.select_dtypes(include=["float64", "int64"])
-    if not numeric_df.empty:
-        corr = numeric_df.corr()
-        plt.figure(figsize=(6, 4.5))
-        im = plt.imshow(corr, aspect="auto")
-        plt.colorbar(im, fraction=0.046, pad=0.04)
-        plt.xticks(range(len(corr.columns)), corr.columns, rotation=90)
-        plt.yticks(range(len(corr.columns)), corr.columns)
-        plt.title("Correlation heatmap")
-        _save_fig(os.path.join(charts_root, "correlation_heatmap.png"))
-
-    return {
-        "gender": gender_file,
-        "stroke": stroke_file,
-        "age": age_file,
-        "bmi": bmi_file,
-        "heatmap": heatmap_file,
-    }
+    chart_files = dict.fromkeys(CHART_SPECS)
+    pending = {}
+    for name in available_charts(df):
+        filename = chart_cache.filename(name, version, chart_params(name))
+        chart_files[name] = f"charts/{filename}"
+        if chart_cache.lookup(charts_root, filename):
+            continue
+        try:
+            pending[name] = chart_renderer.submit(
+                filename,
+                render_chart_file,
+                name,
+                chart_inputs(name, df),
+                os.path.join(charts_root, filename),
+                on_success=lambda: chart_cache.record_render(charts_root),
+            )
+        except RenderQueueFull:
+            chart_files[name] = PLACEHOLDER_CHART
 
+    if pending:
+        timeout = None if block else current_app.config.get("CHART_RENDER_TIMEOUT", 3.0)
+        _, not_done = wait(list(pending.values()), timeout=timeout)
+        if not_done:
+            chart_renderer.record_timeout(len(not_done))
+        for name, future in pending.items():
+            if future in not_done or future.exception() is not None:
+                chart_files[name] = PLACEHOLDER_CHART
+    return chart_files
 
-def _load_stroke_data():
+
+def _analytics_summary():
     """
-    Load the stroke dataset from the configured CSV path.
-    Returns a pandas DataFrame or None if the file is missing.
+    Summary payload and its ETag from the configured ANALYTICS_SOURCE.
+
+    "csv" summarises the uploaded dataset (cached per file version);
+    "mongo" aggregates the live ``patients`` collection server-side;
+    "mongo-incremental" reads the running aggregates kept up to date by
+    the patient views. The Mongo ETags are a hash of the payload.
+    Returns ``(None, None)`` if the CSV is missing; Mongo errors are
+    raised to the caller.
     """
-    csv_path = current_app.config["STROKE_DATA_PATH"]
-    try:
-        df = pd.read_csv(csv_path)
-    except FileNotFoundError:
-        return None
-    except Exception as exc:  # pragma: no cover
-        current_app.logger.warning("Could not read stroke dataset: %s", exc)
-        return None
-    return df
+    source = current_app.config.get("ANALYTICS_SOURCE", "csv")
+    if source in ("mongo", "mongo-incremental"):
+        if source == "mongo":
+            summary = compute_mongo_summary(get_patient_collection())
+        else:
+            app = current_app._get_current_object()
+            summary = load_running_summary(
+                get_patient_collection(),
+                get_patient_stats_collection(),
+                current_app.config.get("PATIENT_STATS_REBUILD_SECONDS", 3600),
+                lambda: patient_job_queue.submit(
+                    "rebuild_patient_stats", ["Rebuilding"], _rebuild_patient_stats, app
+                ),
+            )
+        digest = hashlib.sha1(
+            json.dumps(summary, sort_keys=True, separators=(",", ":")).encode("utf-8")
+        ).hexdigest()[:16]
+        return summary, f"mongo-{digest}-{SUMMARY_FORMAT}"
 
+    df, version = _load_versioned_stroke_data()
+    if df is None:
+        return None, None
+    return _dataset_summary(df, version), f"{version}-{SUMMARY_FORMAT}"
 
-def _charts_dir():
+
+def _rebuild_patient_stats(job, app):
     """
-    Absolute path to the folder where we store generated charts.
+    Background job: recompute the running patient aggregates.
     """
-    charts_root = os.path.join(current_app.static_folder, "charts")
-    os.makedirs(charts_root, exist_ok=True)
-    return charts_root
+    try:
+        with app.app_context():
+            job.advance("Rebuilding")
+            doc = rebuild_patient_stats(get_patient_collection(), get_patient_stats_collection())
+            return {"records": doc["stats"]["total"]}
+    finally:
+        rebuild_finished()
 
 
-def _save_fig(path: str):
-    """
-    Helper to save the current matplotlib figure and close it.
-    """
-    plt.tight_layout()
-    plt.savefig(path, bbox_inches="tight")
-    plt.close()
+@insights_bp.cli.command("rebuild-patient-stats")
+def rebuild_patient_stats_command():
+    """Recompute the running patient aggregates from the collection."""
+    doc = rebuild_patient_stats(get_patient_collection(), get_patient_stats_collection())
+    click.echo(f"Summarised {doc['stats']['total']} patient records.")
 
 
-def _generate_summary_charts(df: pd.DataFrame) -> dict:
+def _dataset_summary(df: pd.DataFrame, version: str) -> dict:
     """
-    Generate core summary charts and return mapping of chart keys to
-    static file paths (relative to the 'static' folder).
+    Aggregated summary of the dataset, computed once per dataset version.
     """
-    charts_root = _charts_dir()
-
-    gender_file = "charts/gender_distribution.png"
-    stroke_file = "charts/stroke_distribution.png"
-    age_file = "charts/age_histogram.png"
-    bmi_file = "charts/bmi_histogram.png"
-    heatmap_file = "charts/correlation_heatmap.png"
-
-    # 1. Gender distribution
-    if "gender" in df.columns:
-        plt.figure(figsize=(4, 4))
-        df["gender"].value_counts().plot(kind="bar")
-        plt.title("Gender distribution")
-        plt.xlabel("Gender")
-        plt.ylabel("Count")
-        _save_fig(os.path.join(charts_root, "gender_distribution.png"))
-
-    # 2. Stroke vs no-stroke
-    if "stroke" in df.columns:
-        plt.figure(figsize=(4, 4))
-        df["stroke"].value_counts().rename({0: "No stroke", 1: "Stroke"}).plot(
-            kind="bar"
-        )
-        plt.title("Stroke vs no-stroke")
-        plt.xlabel("Outcome")
-        plt.ylabel("Count")
-        _save_fig(os.path.join(charts_root, "stroke_distribution.png"))
-
-    # 3. Age distribution
-    if "age" in df.columns:
-        plt.figure(figsize=(5, 4))
-        df["age"].dropna().plot(kind="hist", bins=20)
-        plt.title("Age distribution")
-        plt.xlabel("Age (years)")
-        plt.ylabel("Number of patients")
-        _save_fig(os.path.join(charts_root, "age_histogram.png"))
-
-    # 4. BMI distribution
-    if "bmi" in df.columns:
-        plt.figure(figsize=(5, 4))
-        df["bmi"].dropna().plot(kind="hist", bins=20)
-        plt.title("BMI distribution")
-        plt.xlabel("BMI")
-        plt.ylabel("Number of patients")
-        _save_fig(os.path.join(charts_root, "bmi_histogram.png"))
-
-    # 5. Correlation heatmap for numeric columns
-    numeric_df = df.select_dtypes(include=["float64", "int64"])
-    if not numeric_df.empty:
-        corr = numeric_df.corr()
-        plt.figure(figsize=(6, 5))
-        im = plt.imshow(corr, aspect="auto")
-        plt.colorbar(im, fraction=0.046, pad=0.04)
-        plt.xticks(range(len(corr.columns)), corr.columns, rotation=90)
-        plt.yticks(range(len(corr.columns)), corr.columns)
-        plt.title("Correlation heatmap (numeric features)")
-        _save_fig(os.path.join(charts_root, "correlation_heatmap.png"))
-
-    return {
-        "gender": gender_file,
-        "stroke": stroke_file,
-        "age": age_file,
-        "bmi": bmi_file,
-        "heatmap": heatmap_file,
-    }
+    return dataset_cache.derive(
+        current_app.config["STROKE_DATA_PATH"],
+        version,
+        "summary",
+        lambda: compute_summary(df),
+    )
 
 
 @insights_bp.route("/dashboard")
@@ -237,52 +276,87 @@ def dashboard():
     Main landing page once authenticated.
     Shows high level KPIs and visual charts for the stroke dataset.
     """
-    df = _load_stroke_data()
     dataset_path = current_app.config["STROKE_DATA_PATH"]
+    source = current_app.config.get("ANALYTICS_SOURCE", "csv")
+    try:
+        summary, _etag = _analytics_summary()
+    except PyMongoError:
+        summary = None
+        flash(
+            "Could not connect to the patient records store. "
+            "Please verify MongoDB configuration.",
+            "danger",
+        )
 
-    if df is None:
+    if summary is None:
         return render_template(
             "insights/dashboard.html",
             data_available=False,
             dataset_path=dataset_path,
+            source=source,
         )
 
-    total_records = len(df)
-    avg_age = round(df["age"].mean(), 1) if "age" in df.columns else None
-    avg_bmi = round(df["bmi"].mean(), 1) if "bmi" in df.columns else None
-    if "stroke" in df.columns:
-        stroke_rate = round(df["stroke"].mean() * 100, 2)
-    else:
-        stroke_rate = None
-
-    chart_files = _generate_summary_charts(df)
+    # The dashboard only shows KPIs; charts live on the data visuals page.
+    kpis = summary["kpis"]
 
     return render_template(
         "insights/dashboard.html",
         data_available=True,
         dataset_path=dataset_path,
-        total_patients=total_records,
-        avg_age=avg_age,
-        avg_bmi=avg_bmi,
-        stroke_rate=stroke_rate,
-        gender_img=chart_files["gender"],
-        stroke_img=chart_files["stroke"],
-        age_img=chart_files["age"],
-        bmi_img=chart_files["bmi"],
-        heatmap_img=chart_files["heatmap"],
+        source=source,
+        total_records=kpis["total_records"],
+        avg_age=kpis["avg_age"],
+        avg_bmi=kpis["avg_bmi"],
+        stroke_rate=kpis["stroke_rate"],
     )
 
 
+def _sketch_profile(dataset_path: str):
+    """
+    Bounded-memory profile of the dataset from chunked reads and KLL
+    sketches, cached per dataset version. Returns ``(None, None)`` if
+    the file is missing or unreadable.
+    """
+    try:
+        version = dataset_version(dataset_path)
+        return dataset_cache.derive(
+            dataset_path,
+            version,
+            "sketch_profile",
+            lambda: stream_profile(
+                dataset_path,
+                k=current_app.config.get("OUTLIER_SKETCH_K", DEFAULT_SKETCH_K),
+                chunksize=current_app.config.get("DATASET_CHUNK_ROWS", 100_000),
+                read_csv=read_stroke_csv,
+            ),
+        )
+    except FileNotFoundError:
+        return None, None
+    except Exception as exc:  # pragma: no cover
+        current_app.logger.warning("Could not profile stroke dataset: %s", exc)
+        return None, None
+
+
 @insights_bp.route("/data-overview")
 @login_required
 def data_overview():
     """
     Data quality and structure overview for the stroke dataset.
     """
-    df = _load_stroke_data()
     dataset_path = current_app.config["STROKE_DATA_PATH"]
+    if current_app.config.get("OUTLIER_MODE") == "sketch":
+        profile, preview_df = _sketch_profile(dataset_path)
+    else:
+        df, version = _load_versioned_stroke_data()
+        profile = preview_df = None
+        if df is not None:
+            # Missing values, summary stats and IQR outliers from one cached profile
+            profile = dataset_cache.derive(
+                dataset_path, version, "profile", lambda: profile_dataset(df)
+            )
+            preview_df = df.head(10)
 
-    if df is None:
+    if profile is None:
         return render_template(
             "insights/data_overview.html",
             data_available=False,
@@ -290,27 +364,17 @@ def data_overview():
         )
 
     # Preview top rows
-    preview_html = (
-        df.head(10)
-        .to_html(classes="table table-sm table-striped mb-0", index=False)
+    preview_html = display_frame(preview_df).to_html(
+        classes="table table-sm table-striped mb-0", index=False
     )
 
-    # Missing values per column
-    missing_series = df.isna().sum()
-    missing_df = (
-        missing_series.reset_index()
-        .rename(columns={"index": "Column", 0: "Missing values"})
-    )
-    missing_html = missing_df.to_html(
+    missing_html = profile.missing_frame().to_html(
         classes="table table-sm table-bordered mb-0", index=False
     )
 
     # Summary stats for numeric columns
-    numeric_df = df.select_dtypes(include=["float64", "int64"])
-    if not numeric_df.empty:
-        summary_df = numeric_df.describe().T.reset_index().rename(
-            columns={"index": "Column"}
-        )
+    summary_df = profile.summary_frame()
+    if not summary_df.empty:
         summary_html = summary_df.to_html(
             classes="table table-sm table-striped mb-0", index=False
         )
@@ -318,21 +382,8 @@ def data_overview():
         summary_html = None
 
     # Outlier counts using IQR method
-    outlier_rows = []
-    for col in numeric_df.columns:
-        series = numeric_df[col].dropna()
-        if series.empty:
-            continue
-        q1 = series.quantile(0.25)
-        q3 = series.quantile(0.75)
-        iqr = q3 - q1
-        lower = q1 - 1.5 * iqr
-        upper = q3 + 1.5 * iqr
-        outlier_count = int(((series < lower) | (series > upper)).sum())
-        outlier_rows.append({"Column": col, "Outliers": outlier_count})
-
-    if outlier_rows:
-        outlier_df = pd.DataFrame(outlier_rows)
+    outlier_df = profile.outlier_frame()
+    if not outlier_df.empty:
         outlier_html = outlier_df.to_html(
             classes="table table-sm table-hover mb-0", index=False
         )
@@ -354,9 +405,18 @@ def data_overview():
         "stroke": "Outcome label used as target variable (1=stroke, 0=no stroke).",
     }
 
+    if profile.rank_error is not None:
+        sketch_note = (
+            f"Quartiles and outlier bounds are estimated with a streaming KLL sketch "
+            f"(rank error within \u00b1{profile.rank_error * 100:.1f}% at 99% confidence)."
+        )
+    else:
+        sketch_note = None
+
     return render_template(
         "insights/data_overview.html",
         data_available=True,
+        sketch_note=sketch_note,
         dataset_path=dataset_path,
         preview_html=preview_html,
         missing_html=missing_html,
@@ -370,31 +430,231 @@ def data_overview():
 @login_required
 def activity_log():
     """
-    Read the latest activity entries from MongoDB and render them in a table.
+    One page of activity entries, newest first, filtered by username,
+    action code and time window, with keyset "older"/"newer" links.
     """
     coll = get_activity_collection()
+    filters = ActivityFilters.from_args(request.args)
+    query = build_activity_query(filters)
+    after = request.args.get("after") or None
+    before = request.args.get("before") or None
+    page_size = current_app.config.get("ACTIVITY_PAGE_SIZE", 100)
+
+    def fetch(after=None, before=None):
+        return fetch_page(
+            coll,
+            query,
+            page_size,
+            after=after,
+            before=before,
+            sort=ACTIVITY_SORT,
+            projection=ACTIVITY_PROJECTION,
+        )
+
+    page = Page(items=[], next_cursor=None, prev_cursor=None)
     try:
-        docs = list(coll.find().sort("timestamp", -1).limit(100))
+        try:
+            page = fetch(after=after, before=before)
+        except InvalidCursor:
+            flash("That page link is no longer valid; showing the newest entries.", "warning")
+            page = fetch()
     except ServerSelectionTimeoutError:
-        docs = []
         flash(
             "Could not connect to the activity log store. "
             "Please verify MongoDB configuration.",
             "danger",
         )
 
-    logs = []
-    for d in docs:
-        logs.append(
-            {
-                "username": d.get("username", "unknown"),
-                "action": d.get("action", "UNKNOWN"),
-                "details": d.get("details") or "",
-                "timestamp": d.get("timestamp"),
-            }
+    return render_template(
+        "insights/activity_log.html",
+        logs=page.items,
+        next_cursor=page.next_cursor,
+        prev_cursor=page.prev_cursor,
+        filters=filters,
+        filter_args=filters.to_args(),
+        action_codes=ACTION_CODES,
+    )
+
+
+def _sse_event(event_id: int, entry: dict) -> str:
+    payload = {
+        "username": entry.get("username", "unknown"),
+        "action": entry.get("action", "UNKNOWN"),
+        "details": entry.get("details") or "",
+        "timestamp": entry["timestamp"].isoformat(sep=" ") if entry.get("timestamp") else None,
+    }
+    return f"id: {event_id}\ndata: {json.dumps(payload, separators=(',', ':'))}\n\n"
+
+
+@insights_bp.route("/activity-stream")
+@login_required
+def activity_stream():
+    """
+    Server-Sent Events stream of new activity entries as they are logged.
+
+    Entries come from the in-process ``activity_feed``, not from MongoDB.
+    A comment line is sent every ACTIVITY_STREAM_HEARTBEAT seconds to keep
+    proxies from closing an idle stream, and the stream ends after
+    ACTIVITY_STREAM_MAX_SECONDS (EventSource reconnects with
+    ``Last-Event-ID``) so a connection does not hold a worker thread
+    indefinitely.
+    """
+    try:
+        last_event_id = int(request.headers.get("Last-Event-ID", ""))
+    except ValueError:
+        last_event_id = None
+    subscription = activity_feed.subscribe(last_event_id)
+    if subscription is None:
+        response = jsonify({"error": "Too many live activity streams are open."})
+        response.status_code = 503
+        response.headers["Retry-After"] = "30"
+        return response
+
+    heartbeat = current_app.config.get("ACTIVITY_STREAM_HEARTBEAT", 15.0)
+    max_seconds = current_app.config.get("ACTIVITY_STREAM_MAX_SECONDS", 300.0)
+
+    def events():
+        deadline = time.monotonic() + max_seconds
+        try:
+            # Reconnect delay for the browser, in milliseconds
+            yield "retry: 3000\n\n"
+            while time.monotonic() < deadline:
+                batch = subscription.get(timeout=heartbeat)
+                if subscription.evicted:
+                    yield "event: evicted\ndata: {}\n\n"
+                    return
+                if batch:
+                    yield "".join(_sse_event(event_id, entry) for event_id, entry in batch)
+                else:
+                    yield ": keep-alive\n\n"
+        finally:
+            subscription.close()
+
+    response = current_app.response_class(events(), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+@insights_bp.route("/activity-trends")
+@login_required
+def activity_trends():
+    """
+    Activity over time: actions per hour or per day, read from the
+    precomputed rollups (a few small documents) rather than from the log.
+    """
+    period = request.args.get("period", "day")
+    if period not in ROLLUP_PERIODS:
+        period = "day"
+    default_days, max_days = TREND_DAYS[period]
+    try:
+        days = min(max(int(request.args.get("days", default_days)), 1), max_days)
+    except ValueError:
+        days = default_days
+
+    until = datetime.utcnow()
+    since = period_start(until - timedelta(days=days), period)
+    docs = []
+    try:
+        docs = list(
+            get_activity_rollup_collection()
+            .find({"period": period, "start": {"$gte": since}}, {"start": 1, "total": 1, "counts": 1})
+            .sort("start", 1)
+        )
+    except ServerSelectionTimeoutError:
+        flash(
+            "Could not connect to the activity log store. "
+            "Please verify MongoDB configuration.",
+            "danger",
         )
 
-    return render_template("insights/activity_log.html", logs=logs)
+    rows = rollup_series(docs, period, since, until)
+    actions = sorted({action for row in rows for action in row["counts"]})
+    return render_template(
+        "insights/activity_trends.html",
+        rows=rows,
+        actions=actions,
+        period=period,
+        days=days,
+        peak=max((row["total"] for row in rows), default=0),
+    )
+
+
+def _materialise_dataset(job, app, staged_path, dataset_path, username, row_count):
+    """
+    Background job: build everything derived from a staged upload, then
+    publish it.
+
+    The snapshot, profile, summary and charts are keyed by the staged
+    file's version, which survives the final rename. Until that rename
+    the pages keep serving the previous dataset; afterwards the caches
+    are primed so the first request for the new version is a hit.
+    """
+    with app.app_context():
+        version = None
+        try:
+            job.advance("Loading data")
+            version = dataset_version(staged_path)
+            df = read_stroke_csv(staged_path)
+
+            job.advance("Writing snapshot")
+            # Keep the live version's snapshot until the swap below
+            write_snapshot(df, dataset_path, version, prune=False)
+            # Work from the snapshot so this process sees the same frame
+            # other workers will memory-map
+            df = load_snapshot(dataset_path, version)
+
+            job.advance("Profiling")
+            derived = {}
+            if app.config.get("OUTLIER_MODE") == "sketch":
+                derived["sketch_profile"] = stream_profile(
+                    staged_path,
+                    k=app.config.get("OUTLIER_SKETCH_K", DEFAULT_SKETCH_K),
+                    chunksize=app.config.get("DATASET_CHUNK_ROWS", 100_000),
+                    read_csv=read_stroke_csv,
+                )
+            else:
+                derived["profile"] = profile_dataset(df)
+
+            job.advance("Computing aggregates")
+            derived["summary"] = compute_summary(df)
+
+            job.advance("Rendering charts")
+            _generate_summary_charts(df, version, block=True)
+
+            job.advance("Publishing")
+            publish_dataset(staged_path, dataset_path)
+        except BaseException:
+            discard_staged(staged_path)
+            if version is not None:
+                remove_snapshot(dataset_path, version)
+            raise
+
+        dataset_cache.prime(dataset_path, version, df, derived)
+        prune_snapshots(dataset_path, keep=version)
+
+        log_activity(
+            username=username,
+            action="UPLOAD_DATASET",
+            details=(
+                f"Uploaded new stroke dataset ({os.path.basename(dataset_path)}, "
+                f"{row_count} rows)."
+            ),
+        )
+        return {"version": version, "rows": row_count}
+
+
+def _import_patient_file(job, app, path, username):
+    """
+    Background job: import an uploaded CSV into the patients collection.
+    """
+    try:
+        with app.app_context():
+            job.advance("Importing patients")
+            # The job result is polled as JSON; keep it small
+            return run_patient_import(path, username).to_dict(max_errors=20)
+    finally:
+        discard_staged(path)
 
 
 @insights_bp.route("/data-upload", methods=["GET", "POST"])
@@ -404,8 +664,17 @@ def data_upload():
     Allow an authenticated user to upload/replace the stroke dataset CSV.
     The file is stored at the configured STROKE_DATA_PATH and used
     by the dashboard and data overview pages.
+
+    The upload is validated in the request; the snapshot, profile and
+    charts are then built by a background job, which swaps the file in
+    when they are ready.
+
+    With ``target=patients`` the file is instead imported into the
+    patients collection by a background job (rows are validated there).
     """
     preview_html = None
+    job_id = None
+    job_kind = None
     dataset_path = current_app.config["STROKE_DATA_PATH"]
 
     if request.method == "POST":
@@ -414,45 +683,80 @@ def data_upload():
             flash("Please choose a CSV file to upload.", "warning")
         elif not file.filename.lower().endswith(".csv"):
             flash("Only CSV files are accepted.", "warning")
+        elif request.form.get("target") == "patients":
+            try:
+                staged_path = stream_to_temp(
+                    file.stream,
+                    os.path.dirname(dataset_path) or ".",
+                    max_bytes=current_app.config["MAX_DATASET_UPLOAD_BYTES"],
+                )
+            except DatasetValidationError as exc:
+                flash(f"Patients were not imported: {exc}", "danger")
+            else:
+                job = patient_job_queue.submit(
+                    "patient_import",
+                    PATIENT_IMPORT_JOB_STEPS,
+                    _import_patient_file,
+                    current_app._get_current_object(),
+                    staged_path,
+                    current_user.username,
+                )
+                job_id, job_kind = job.id, job.kind
+                flash("File received. Patient records are being imported in the background.", "success")
         else:
-            # Ensure folder exists
-            os.makedirs(os.path.dirname(dataset_path), exist_ok=True)
-
-            # Save file as the configured dataset file
-            file.save(dataset_path)
-
-            log_activity(
-                username=current_user.username,
-                action="UPLOAD_DATASET",
-                details=f"Uploaded new stroke dataset ({os.path.basename(dataset_path)}).",
-            )
-
-            flash(
-                "Dataset uploaded successfully. Analytics will now use the new file.",
-                "success",
-            )
-
-            # Try to show a small preview
             try:
-                df = pd.read_csv(dataset_path)
-                preview_html = df.head(10).to_html(
-                    classes="table table-sm table-striped mb-0", index=False
+                # Stream to a temp file and validate it in chunks
+                staged_path, preview_df, row_count = stage_dataset(
+                    file.stream,
+                    dataset_path,
+                    max_bytes=current_app.config["MAX_DATASET_UPLOAD_BYTES"],
+                    chunk_rows=current_app.config.get("DATASET_CHUNK_ROWS", 100_000),
                 )
-            except Exception:
-                preview_html = None
+            except DatasetValidationError as exc:
+                flash(f"Dataset was not replaced: {exc}", "danger")
+            else:
+                job = job_queue.submit(
+                    "dataset_upload",
+                    DATASET_JOB_STEPS,
+                    _materialise_dataset,
+                    current_app._get_current_object(),
+                    staged_path,
+                    dataset_path,
+                    current_user.username,
+                    row_count,
+                )
+                job_id, job_kind = job.id, job.kind
+
                 flash(
-                    "File was saved but could not be parsed as CSV. "
-                    "Please verify the file structure.",
-                    "danger",
+                    f"Dataset validated ({row_count} rows). It is being prepared in the "
+                    "background; analytics will switch to it once processing finishes.",
+                    "success",
+                )
+                preview_html = preview_df.to_html(
+                    classes="table table-sm table-striped mb-0", index=False
                 )
 
     return render_template(
         "insights/data_upload.html",
         preview=preview_html,
+        job_id=job_id,
+        job_kind=job_kind,
         dataset_path=dataset_path,
     )
 
 
+@insights_bp.route("/jobs/<job_id>")
+@login_required
+def job_status(job_id):
+    """
+    Status and progress of a background job, as JSON.
+    """
+    job = find_job(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job."}), 404
+    return jsonify(job.to_dict())
+
+
 @insights_bp.route("/data-visuals")
 @login_required
 def data_visuals():
@@ -460,7 +764,7 @@ def data_visuals():
     Dedicated page for visual summaries of the stroke dataset.
     Dashboard stays lightweight; this page hosts the charts.
     """
-    df = _load_stroke_data()
+    df, version = _load_versioned_stroke_data()
     if df is None:
         flash(
             "No dataset found. Please upload a CSV file first.",
@@ -468,26 +772,70 @@ def data_visuals():
         )
         return redirect(url_for("insights.data_overview"))
 
-    total_records = len(df)
-    avg_age = round(df["age"].mean(), 1) if "age" in df.columns else None
-    avg_bmi = round(df["bmi"].mean(), 1) if "bmi" in df.columns else None
-    stroke_rate = (
-        round(df["stroke"].mean() * 100, 2)
-        if "stroke" in df.columns
-        else None
-    )
-
-    chart_files = _generate_summary_charts(df)
+    kpis = _dataset_summary(df, version)["kpis"]
+    chart_files = _generate_summary_charts(df, version)
 
     return render_template(
         "insights/data_visuals.html",
-        total_patients=total_records,
-        avg_age=avg_age,
-        avg_bmi=avg_bmi,
-        stroke_rate=stroke_rate,
+        total_patients=kpis["total_records"],
+        avg_age=kpis["avg_age"],
+        avg_bmi=kpis["avg_bmi"],
+        stroke_rate=kpis["stroke_rate"],
         gender_img=chart_files["gender"],
         stroke_img=chart_files["stroke"],
         age_img=chart_files["age"],
         bmi_img=chart_files["bmi"],
         heatmap_img=chart_files["heatmap"],
     )
+
+
+@insights_bp.route("/api/summary")
+@login_required
+def api_summary():
+    """
+    KPIs, category counts, histogram bins and correlations as compact JSON.
+
+    The ETag is tied to the dataset version (or, for the Mongo source, to
+    the payload), so clients revalidating unchanged data get an empty
+    304 response.
+    """
+    try:
+        summary, etag = _analytics_summary()
+    except PyMongoError:
+        return jsonify({"error": "Patient records store unavailable."}), 503
+    if summary is None:
+        return jsonify({"error": "No dataset found."}), 404
+
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        payload = json.dumps(summary, separators=(",", ":"), allow_nan=False)
+        response = current_app.response_class(payload, mimetype="application/json")
+
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+@insights_bp.route("/metrics")
+@login_required
+def metrics():
+    """
+    Runtime counters for the analytics caches, as JSON.
+    """
+    return jsonify(
+        {
+            "dataset_cache": dataset_cache.stats(),
+            "chart_cache": chart_cache.stats(),
+            "chart_renderer": chart_renderer.stats(),
+            "jobs": job_queue.stats(),
+            "patient_jobs": patient_job_queue.stats(),
+            "mongo_pool": mongo_clients.stats(),
+            "audit_writer": audit_writer.stats(),
+            "activity_feed": activity_feed.stats(),
+            "user_cache": user_cache.stats(),
+            "password_pool": password_pool.stats(),
+            "login_limiter": login_limiter.stats(),
+        }
+    )
@@ -0,0 +1,240 @@
+"""
+Protection for the login view against bursts of sign-in attempts.
+
+Checking a password runs scrypt or PBKDF2, tens of milliseconds of CPU
+by design. Done in the request thread, a burst of logins runs one hash
+per attempt at the same time and leaves no CPU for the pages of users
+who are already signed in. Two pieces bound that work:
+
+- ``login_limiter`` keeps a token bucket per username and per client IP
+  and turns away attempts beyond the allowed rate before any hashing;
+- ``password_pool`` runs password hashing on a small thread pool
+  (``hashlib`` releases the GIL while hashing), so at most ``workers``
+  hashes run at once in this process. At most ``max_pending`` checks may
+  be queued or running; beyond that, or after ``timeout`` seconds of
+  waiting, ``PasswordPoolBusy`` is raised and the login view answers 503
+  instead of queueing more work.
+
+Both are per worker process. The IP is ``request.remote_addr``; behind a
+reverse proxy, configure ``ProxyFix`` so it is the client's address.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from .security_utils import hash_password, verify_password
+
+
+class PasswordPoolBusy(RuntimeError):
+    """
+    Raised when a password check cannot be queued or does not start in time.
+    """
+
+
+class PasswordPool:
+    """
+    Bounded thread pool for password hashing and verification.
+    """
+
+    def __init__(self, workers: int = 2, max_pending: int = 32, timeout: float = 10.0):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._executor = None
+        self._executor_pid = None
+        self._pending = 0
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.hash_seconds = 0.0
+        self.max_pending_seen = 0
+
+    def configure(self, workers: int, max_pending: int, timeout: float) -> None:
+        """
+        Change the pool size and limits; a new size applies to new pools.
+        """
+        with self._lock:
+            if workers != self.workers and self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+            self.workers = workers
+            self.max_pending = max_pending
+            self.timeout = timeout
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Threads do not survive fork(); build a pool per process
+        if self._executor is None or self._executor_pid != os.getpid():
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="password"
+            )
+            self._executor_pid = os.getpid()
+        return self._executor
+
+    def _timed(self, fn, args):
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.hash_seconds += elapsed
+
+    def _finish(self, future: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+            self.completed += 1
+
+    def run(self, fn, *args):
+        """
+        Result of ``fn(*args)`` run on the pool.
+
+        Raises PasswordPoolBusy when ``max_pending`` calls are already
+        queued or running, or when the result takes longer than
+        ``timeout`` seconds (the call still finishes in the background).
+        With ``workers=0`` the call runs in the calling thread.
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordPoolBusy(f"{self._pending} password checks pending")
+            self._pending += 1
+            self.submitted += 1
+            self.max_pending_seen = max(self.max_pending_seen, self._pending)
+            if self.workers > 0:
+                future = self._get_executor().submit(self._timed, fn, args)
+
+        if self.workers <= 0:
+            try:
+                return self._timed(fn, args)
+            finally:
+                self._finish(None)
+
+        future.add_done_callback(self._finish)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            with self._lock:
+                self.timeouts += 1
+            raise PasswordPoolBusy(f"password check took over {self.timeout}s")
+
+    def verify(self, plain_password: str, stored_hash: str) -> bool:
+        return self.run(verify_password, plain_password, stored_hash)
+
+    def hash(self, plain_password: str) -> str:
+        return self.run(hash_password, plain_password)
+
+    def stats(self) -> dict:
+        """
+        Snapshot of the pool counters, suitable for JSON output.
+        """
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "max_pending_seen": self.max_pending_seen,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                "avg_hash_ms": (
+                    round(1000 * self.hash_seconds / self.completed, 3)
+                    if self.completed
+                    else None
+                ),
+            }
+
+
+class LoginRateLimiter:
+    """
+    Token buckets for sign-in attempts, one per username and one per IP.
+
+    Each bucket holds up to ``burst`` attempts and refills at
+    ``per_minute`` attempts a minute; a rate of 0 turns that limit off.
+    At most ``max_keys`` buckets are kept, least recently used dropped
+    first (a dropped bucket starts full again).
+    """
+
+    def __init__(
+        self,
+        user_burst: int = 5,
+        user_per_minute: float = 10,
+        ip_burst: int = 20,
+        ip_per_minute: float = 60,
+        max_keys: int = 10_000,
+    ):
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()  # (kind, key) -> (tokens, updated)
+        self.allowed = 0
+        self.limited = 0
+        self.configure(user_burst, user_per_minute, ip_burst, ip_per_minute, max_keys)
+
+    def configure(
+        self,
+        user_burst: int,
+        user_per_minute: float,
+        ip_burst: int,
+        ip_per_minute: float,
+        max_keys: int = 10_000,
+    ) -> None:
+        with self._lock:
+            self.limits = {
+                "user": (user_burst, user_per_minute / 60),
+                "ip": (ip_burst, ip_per_minute / 60),
+            }
+            self.max_keys = max_keys
+            self._buckets.clear()
+
+    def _level(self, bucket_key, now: float) -> float:
+        burst, rate = self.limits[bucket_key[0]]
+        tokens, updated = self._buckets.get(bucket_key, (burst, now))
+        return min(burst, tokens + (now - updated) * rate)
+
+    def check(self, username: str, ip: str | None, now: float | None = None) -> float:
+        """
+        Take one attempt from the buckets of ``username`` and ``ip``.
+
+        Returns 0 if the attempt is allowed, otherwise the seconds until
+        it would be; nothing is taken from either bucket then.
+        """
+        now = time.monotonic() if now is None else now
+        keys = [("user", (username or "").strip().lower()), ("ip", ip or "")]
+        keys = [key for key in keys if self.limits[key[0]][1] > 0]
+
+        with self._lock:
+            levels = {key: self._level(key, now) for key in keys}
+            waits = [
+                (1 - level) / self.limits[key[0]][1]
+                for key, level in levels.items()
+                if level < 1
+            ]
+            if waits:
+                self.limited += 1
+                return max(waits)
+
+            for key, level in levels.items():
+                self._buckets[key] = (level - 1, now)
+                self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            self.allowed += 1
+            return 0.0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "tracked_keys": len(self._buckets),
+                "allowed": self.allowed,
+                "limited": self.limited,
+            }
+
+
+# Shared by every request in this worker process
+password_pool = PasswordPool()
+login_limiter = LoginRateLimiter()
@@ -1,8 +1,10 @@
 from flask_login import UserMixin
+from sqlalchemy.orm import make_transient_to_detached
 from werkzeug.security import generate_password_hash, check_password_hash
 
 from app.extensions import db, login_manager
 from .security_utils import hash_password, verify_password
+from .user_cache import user_cache
 
 
 class AppUser(UserMixin, db.Model):
@@ -23,15 +25,38 @@ class AppUser(UserMixin, db.Model):
         """Return True if the password matches the stored hash."""
         return verify_password(password, self.password_hash)
 
+    def to_record(self) -> dict:
+        """Column values cached by ``user_cache``."""
+        return {"id": self.id, "username": self.username, "password_hash": self.password_hash}
+
+    @classmethod
+    def from_record(cls, record: dict) -> "AppUser":
+        """Detached instance rebuilt from ``to_record`` output, without a query."""
+        user = cls(**record)
+        make_transient_to_detached(user)
+        return user
+
 
 @login_manager.user_loader
 def load_user(user_id: str):
     """
     Used by Flask-Login to reload the user object from the user ID stored in the session.
+
+    Served from ``user_cache`` when possible, so most requests do not
+    query the users table; the returned user is then detached from the
+    session.
     """
     if not user_id:
         return None
     try:
-        return AppUser.query.get(int(user_id))
+        user_id = int(user_id)
     except ValueError:
         return None
+
+    record = user_cache.get(user_id)
+    if record is not None:
+        return AppUser.from_record(record)
+    user = db.session.get(AppUser, user_id)
+    if user is not None:
+        user_cache.put(user_id, user.to_record())
+    return user
@@ -0,0 +1,364 @@
+"""
+Declared MongoDB indexes and query-plan checks.
+
+``INDEX_SPECS`` lists the indexes each collection needs for the queries
+the views issue. ``ensure_indexes`` creates them when the app starts;
+``create_indexes`` is a no-op for indexes that already exist with the
+same definition, so this is safe to run on every start and from several
+workers at once.
+
+``QUERY_SHAPES`` mirrors those queries (filter, sort, limit). The
+``verify_query_plans`` check runs ``explain()`` for each shape and
+raises ``QueryPlanError`` if the winning plan scans the whole collection
+(COLLSCAN) or sorts in memory (SORT, or a ``$sort`` stage in
+aggregation-shaped output), so a query change that loses its index is
+caught before the collection grows. Run it with
+``flask --app server mongo-indexes --check`` or set
+``MONGO_VERIFY_QUERY_PLANS`` to check at startup.
+
+The activity log's retention (see ``activity_store``) is applied
+alongside the indexes.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+
+import click
+import pymongo
+from bson.objectid import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import PyMongoError
+
+from .activity_store import ensure_activity_storage, rebuild_rollups
+from .db_mongo import _get_db
+from .insights.activity import (
+    ACTIVITY_PROJECTION,
+    ACTIVITY_SORT,
+    ActivityFilters,
+    build_activity_query,
+)
+from .patient.queries import (
+    FILTER_INDEX_FIELDS,
+    LIST_PROJECTION,
+    LIST_SORT,
+    PatientFilters,
+    build_query,
+    keyset_filter,
+)
+
+INDEX_SPECS = {
+    "patients": [
+        # Patient list, keyset-paginated on (age, _id)
+        IndexModel([("age", ASCENDING), ("_id", ASCENDING)], name="age_id"),
+        # Patient id prefix search, ordered by id
+        IndexModel([("patient_id", ASCENDING), ("_id", ASCENDING)], name="patient_id_id"),
+        # One record per hospital id; the importer upserts on it. Records
+        # saved without an id (None) are left out
+        IndexModel(
+            [("patient_id", ASCENDING)],
+            name="patient_id_unique",
+            unique=True,
+            partialFilterExpression={"patient_id": {"$type": "string"}},
+        ),
+        # Flag / category filters: any one set field is a range in
+        # (age, _id) order; other set fields are checked on the rows
+        *(
+            IndexModel(
+                [(name, ASCENDING), ("age", ASCENDING), ("_id", ASCENDING)],
+                name=f"{name}_age_id",
+            )
+            for name in FILTER_INDEX_FIELDS
+        ),
+    ],
+    "activity_logs": [
+        # Activity log, newest first, keyset-paginated on (timestamp, _id);
+        # each filter combination pages through one index range
+        IndexModel([("timestamp", DESCENDING), ("_id", DESCENDING)], name="timestamp_id"),
+        IndexModel(
+            [("username", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)],
+            name="username_timestamp_id",
+        ),
+        IndexModel(
+            [("action", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)],
+            name="action_timestamp_id",
+        ),
+        IndexModel(
+            [
+                ("username", ASCENDING),
+                ("action", ASCENDING),
+                ("timestamp", DESCENDING),
+                ("_id", DESCENDING),
+            ],
+            name="username_action_timestamp_id",
+        ),
+    ],
+    "activity_rollups": [
+        # Activity over time: one period, a range of start times
+        IndexModel([("period", ASCENDING), ("start", ASCENDING)], name="period_start"),
+    ],
+}
+
+# Plan stages that mean a query is not served by an index
+BAD_STAGES = {"COLLSCAN": "collection scan", "SORT": "in-memory sort", "$sort": "in-memory sort"}
+
+
+@dataclass(frozen=True)
+class QueryShape:
+    """
+    One query as issued by a view, with placeholder values.
+    """
+
+    name: str
+    collection: str
+    filter: dict = field(default_factory=dict)
+    sort: tuple = ()
+    limit: int = 0
+    projection: dict | None = None
+
+
+PATIENT_PAGE = {
+    # Default page size plus the look-ahead row
+    "limit": 51,
+    "projection": LIST_PROJECTION,
+}
+_SAMPLE_ID = ObjectId("000000000000000000000000")
+
+
+def _reversed(sort) -> list:
+    # "Previous" links read the index backwards (see fetch_page)
+    return [(name, -direction) for name, direction in sort]
+
+
+def _patient_shape(name: str, **filter_args) -> QueryShape:
+    query, sort = build_query(PatientFilters(**filter_args))
+    return QueryShape(name, "patients", filter=query, sort=tuple(sort), **PATIENT_PAGE)
+
+
+ACTIVITY_PAGE = {"limit": 101, "projection": ACTIVITY_PROJECTION}
+
+
+def _activity_shape(name: str, **filter_args) -> QueryShape:
+    query = build_activity_query(ActivityFilters(**filter_args))
+    return QueryShape(name, "activity_logs", filter=query, sort=tuple(ACTIVITY_SORT), **ACTIVITY_PAGE)
+
+
+QUERY_SHAPES = [
+    _patient_shape("patient list"),
+    QueryShape(
+        "patient list, next page",
+        "patients",
+        filter=keyset_filter(60, _SAMPLE_ID),
+        sort=tuple(LIST_SORT),
+        **PATIENT_PAGE,
+    ),
+    QueryShape(
+        "patient list, previous page",
+        "patients",
+        # Includes the records without an age, which sort first
+        filter=keyset_filter(60, _SAMPLE_ID, after=False),
+        sort=tuple(_reversed(LIST_SORT)),
+        **PATIENT_PAGE,
+    ),
+    _patient_shape("patients by age range", age_min=40, age_max=60),
+    _patient_shape("patients with stroke", stroke=1),
+    _patient_shape("patients by gender", gender="Female"),
+    _patient_shape("patients with hypertension and heart disease", hypertension=1, heart_disease=1),
+    _patient_shape(
+        "patients by smoking status and age", smoking_status="smokes", age_min=50
+    ),
+    _patient_shape(
+        "patients by every category filter",
+        stroke=1,
+        hypertension=1,
+        heart_disease=0,
+        gender="Female",
+        smoking_status="never smoked",
+    ),
+    _patient_shape("patient id prefix", id_prefix="P-00"),
+    _activity_shape("recent activity"),
+    QueryShape(
+        "recent activity, next page",
+        "activity_logs",
+        filter=keyset_filter(datetime(2024, 1, 1), _SAMPLE_ID, after=False, field="timestamp"),
+        sort=tuple(ACTIVITY_SORT),
+        **ACTIVITY_PAGE,
+    ),
+    QueryShape(
+        "recent activity, previous page",
+        "activity_logs",
+        filter=keyset_filter(datetime(2024, 1, 1), _SAMPLE_ID, field="timestamp"),
+        sort=tuple(_reversed(ACTIVITY_SORT)),
+        **ACTIVITY_PAGE,
+    ),
+    _activity_shape("activity by user", username="admin"),
+    _activity_shape("activity by action", action="DELETE_PATIENT"),
+    _activity_shape("activity by user and action", username="admin", action="DELETE_PATIENT"),
+    _activity_shape(
+        "activity in a time window", since=datetime(2024, 1, 1), until=datetime(2024, 2, 1)
+    ),
+    QueryShape(
+        "activity over time",
+        "activity_rollups",
+        filter={"period": "hour", "start": {"$gte": datetime(2024, 1, 1)}},
+        sort=(("start", ASCENDING),),
+    ),
+]
+
+
+class QueryPlanError(RuntimeError):
+    """
+    Raised when a declared query shape is not served by an index.
+    """
+
+
+def ensure_indexes(db, specs: dict | None = None) -> dict:
+    """
+    Create the declared indexes; returns index names per collection.
+    """
+    specs = INDEX_SPECS if specs is None else specs
+    return {name: db[name].create_indexes(models) for name, models in specs.items()}
+
+
+def plan_stages(plan) -> list:
+    """
+    Every stage name in an explain() plan tree, outermost first.
+
+    Handles classic plans (``inputStage`` / ``inputStages``), slot-based
+    engine plans (``queryPlan``) and sharded plans (``shards``).
+    """
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for key in ("queryPlan", "winningPlan", "inputStage", "inputStages", "shards"):
+            if key in plan:
+                stages.extend(plan_stages(plan[key]))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(plan_stages(item))
+    return stages
+
+
+def explain_shape(db, shape: QueryShape) -> dict:
+    """
+    Run ``explain()`` for one query shape.
+    """
+    cursor = db[shape.collection].find(shape.filter, shape.projection)
+    if shape.sort:
+        cursor = cursor.sort(list(shape.sort))
+    if shape.limit:
+        cursor = cursor.limit(shape.limit)
+    return cursor.explain()
+
+
+def plan_problems(explain: dict) -> list:
+    """
+    Descriptions of the unindexed stages in an explain() result.
+
+    Reads the ``queryPlanner`` winning plan of find-style output, the
+    ``stages`` of aggregation-shaped output (the ``$cursor`` stage's
+    plan, and any ``$sort`` left for the pipeline to do in memory) and
+    the per-shard output of a sharded aggregation. Output with none of
+    these is reported as unrecognised rather than passed as indexed.
+    """
+    problems = []
+    recognised = False
+    planner = explain.get("queryPlanner")
+    if planner is not None:
+        recognised = True
+        stages = plan_stages(planner.get("winningPlan", {}))
+        problems.extend(BAD_STAGES[stage] for stage in stages if stage in BAD_STAGES)
+    for stage in explain.get("stages", []):
+        recognised = True
+        if "$cursor" in stage:
+            problems.extend(plan_problems(stage["$cursor"]))
+        elif "$sort" in stage:
+            problems.append(BAD_STAGES["$sort"])
+    shards = explain.get("shards")
+    if isinstance(shards, dict):
+        recognised = True
+        for shard in shards.values():
+            problems.extend(plan_problems(shard))
+    if not recognised:
+        problems.append("unrecognised explain output")
+    return problems
+
+
+def verify_query_plans(db, shapes=None) -> None:
+    """
+    Raise QueryPlanError if any query shape's winning plan uses a
+    collection scan or an in-memory sort.
+    """
+    failures = []
+    for shape in QUERY_SHAPES if shapes is None else shapes:
+        problems = plan_problems(explain_shape(db, shape))
+        if problems:
+            failures.append(f"{shape.name} ({shape.collection}): {', '.join(problems)}")
+    if failures:
+        raise QueryPlanError("Queries not served by an index: " + "; ".join(failures))
+
+
+def init_app(app) -> None:
+    """
+    Set up the activity log storage and apply the index spec at startup
+    (``MONGO_ENSURE_INDEXES``), optionally verify query plans
+    (``MONGO_VERIFY_QUERY_PLANS``), and register the ``mongo-indexes``
+    and ``activity-storage`` CLI commands.
+    """
+    retention_days = app.config.get("AUDIT_RETENTION_DAYS", 365)
+
+    @app.cli.command("activity-storage")
+    @click.option(
+        "--rebuild-rollups",
+        "rebuild_rollups_",
+        is_flag=True,
+        help="Recount the hourly and daily activity rollups from the stored entries.",
+    )
+    def activity_storage_command(rebuild_rollups_):
+        """Apply the activity log retention period."""
+        db = _get_db()
+        ensure_activity_storage(db, retention_days)
+        if rebuild_rollups_:
+            click.echo(f"Counted {rebuild_rollups(db)} entries into the rollups.")
+        click.echo(f"activity_logs: retention {retention_days or 'unlimited'} days")
+
+    @app.cli.command("mongo-indexes")
+    @click.option("--check", is_flag=True, help="Also verify query plans with explain().")
+    def mongo_indexes_command(check):
+        """Create the declared MongoDB indexes."""
+        db = _get_db()
+        ensure_activity_storage(db, retention_days)
+        for collection, names in ensure_indexes(db).items():
+            click.echo(f"{collection}: {', '.join(names)}")
+        if check:
+            try:
+                verify_query_plans(db)
+            except QueryPlanError as exc:
+                raise click.ClickException(str(exc))
+            click.echo(f"{len(QUERY_SHAPES)} query shapes use indexes.")
+
+    if not app.config.get("MONGO_ENSURE_INDEXES", True):
+        return
+    with app.app_context():
+        db = _get_db()
+        try:
+            # Fail fast when MongoDB is down rather than blocking startup
+            # for the full server selection timeout
+            with pymongo.timeout(app.config.get("MONGO_STARTUP_TIMEOUT", 2.0)):
+                db.command("ping")
+            ensure_activity_storage(db, retention_days)
+        except PyMongoError as exc:
+            # Same as the views: the app still starts without MongoDB
+            app.logger.warning("Could not create MongoDB indexes: %s", exc)
+            return
+
+        # One collection's failure must not skip the others' indexes
+        complete = True
+        for collection, models in INDEX_SPECS.items():
+            try:
+                ensure_indexes(db, {collection: models})
+            except PyMongoError as exc:
+                app.logger.warning("Could not create MongoDB indexes on %s: %s", collection, exc)
+                complete = False
+        if complete and app.config.get("MONGO_VERIFY_QUERY_PLANS", False):
+            verify_query_plans(db)
@@ -0,0 +1,188 @@
+"""
+Bulk updates and deletes of patient records.
+
+A request lists operations on patient ``_id``s, each either a ``set`` of
+field values or a ``delete``::
+
+    {"operations": [
+        {"id": "65f0c0...", "set": {"stroke": 1, "smoking_status": "smokes"}},
+        {"id": "65f0c1...", "delete": true}
+    ]}
+
+``run_bulk`` executes them in three round trips whatever their number:
+one ``find`` with ``$in`` for the pre-images (needed for the running
+aggregates and the audit entry), one unordered ``bulk_write`` for all
+the writes, and one ``$inc`` of the combined aggregate changes (done by
+the caller). Single-record edits and deletes get their pre-image from
+``find_one_and_update`` / ``find_one_and_delete`` instead; for a batch
+that would be one round trip per record.
+
+A record changed by someone else between the ``find`` and the
+``bulk_write`` leaves the running aggregates slightly off until their
+next rebuild, as a failed ``$inc`` would.
+"""
+
+import math
+from dataclasses import dataclass, field
+
+from bson.errors import InvalidId
+from bson.objectid import ObjectId
+from pymongo import DeleteOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from .importer import CHOICE_VALUES, FLAG_FIELDS
+
+# Numeric fields that may be set, with their allowed range
+NUMBER_RANGES = {
+    "age": (0, 120),
+    "avg_glucose_level": (0, None),
+    "bmi": (0, None),
+}
+# patient_id is deliberately absent: one id must not be given to many records
+UPDATABLE_FIELDS = tuple(CHOICE_VALUES) + FLAG_FIELDS + tuple(NUMBER_RANGES)
+OPTIONAL_FIELDS = ("bmi",)
+
+
+class BulkRequestError(ValueError):
+    """
+    Raised for a malformed bulk request; nothing has been written.
+    """
+
+
+@dataclass
+class BulkResult:
+    """
+    Outcome of one bulk request.
+    """
+
+    matched: int = 0
+    modified: int = 0
+    deleted: int = 0
+    missing: list = field(default_factory=list)  # ids with no record
+    errors: list = field(default_factory=list)  # [(id, message)] rejected by the server
+    changes: list = field(default_factory=list)  # [(before, after)] of the written records
+
+    def to_dict(self) -> dict:
+        return {
+            "matched": self.matched,
+            "modified": self.modified,
+            "deleted": self.deleted,
+            "missing": self.missing,
+            "errors": [{"id": oid, "message": message} for oid, message in self.errors],
+        }
+
+
+def clean_value(name: str, value):
+    """
+    Validated stored value for field ``name``; raises BulkRequestError.
+    """
+    if name not in UPDATABLE_FIELDS:
+        raise BulkRequestError(f"Field '{name}' cannot be updated in bulk.")
+    if name in CHOICE_VALUES:
+        if value not in CHOICE_VALUES[name]:
+            raise BulkRequestError(
+                f"{name} must be one of: {', '.join(CHOICE_VALUES[name])}."
+            )
+        return value
+    if name in FLAG_FIELDS:
+        if value not in (0, 1, "0", "1") or isinstance(value, bool):
+            raise BulkRequestError(f"{name} must be 0 or 1.")
+        return int(value)
+    if value is None and name in OPTIONAL_FIELDS:
+        return None
+    lo, hi = NUMBER_RANGES[name]
+    if (
+        not isinstance(value, (int, float))
+        or isinstance(value, bool)
+        # JSON bodies may carry NaN and Infinity, which pass any range test
+        or not math.isfinite(value)
+        or value < lo
+        or (hi is not None and value > hi)
+    ):
+        bounds = f"from {lo} to {hi}" if hi is not None else f"of at least {lo}"
+        raise BulkRequestError(f"{name} must be a number {bounds}.")
+    return value
+
+
+def parse_operations(payload, max_operations: int) -> list:
+    """
+    ``[(ObjectId, fields or None for a delete)]`` from a request body.
+    """
+    operations = payload.get("operations") if isinstance(payload, dict) else None
+    if not isinstance(operations, list) or not operations:
+        raise BulkRequestError("Expected a non-empty 'operations' list.")
+    if len(operations) > max_operations:
+        raise BulkRequestError(f"At most {max_operations} operations per request.")
+
+    parsed = []
+    seen = set()
+    for number, op in enumerate(operations, start=1):
+        if not isinstance(op, dict):
+            raise BulkRequestError(f"Operation {number} is not an object.")
+        try:
+            oid = ObjectId(op.get("id"))
+        except (InvalidId, TypeError):
+            raise BulkRequestError(f"Operation {number} has an invalid id.")
+        if oid in seen:
+            raise BulkRequestError(f"Operation {number}: id {oid} is listed more than once.")
+        seen.add(oid)
+
+        if op.get("delete") is True and "set" not in op:
+            parsed.append((oid, None))
+            continue
+        fields = op.get("set")
+        if not isinstance(fields, dict) or not fields or "delete" in op:
+            raise BulkRequestError(
+                f"Operation {number} needs either a non-empty 'set' or 'delete': true."
+            )
+        parsed.append((oid, {name: clean_value(name, value) for name, value in fields.items()}))
+    return parsed
+
+
+def run_bulk(coll, operations: list) -> BulkResult:
+    """
+    Execute parsed operations with a single unordered ``bulk_write``.
+
+    :param coll: the patients collection
+    :param operations: output of ``parse_operations``
+    """
+    result = BulkResult()
+    ids = [oid for oid, _ in operations]
+    before = {doc["_id"]: doc for doc in coll.find({"_id": {"$in": ids}})}
+
+    requests = []
+    targets = []
+    for oid, fields in operations:
+        if oid not in before:
+            result.missing.append(str(oid))
+            continue
+        if fields is None:
+            requests.append(DeleteOne({"_id": oid}))
+        else:
+            requests.append(UpdateOne({"_id": oid}, {"$set": fields}))
+        targets.append((oid, fields))
+    if not requests:
+        return result
+
+    failed = set()
+    try:
+        outcome = coll.bulk_write(requests, ordered=False)
+        result.matched = outcome.matched_count
+        result.modified = outcome.modified_count
+        result.deleted = outcome.deleted_count
+    except BulkWriteError as exc:
+        details = exc.details
+        result.matched = details.get("nMatched", 0)
+        result.modified = details.get("nModified", 0)
+        result.deleted = details.get("nRemoved", 0)
+        for error in details.get("writeErrors", []):
+            oid = targets[error["index"]][0]
+            failed.add(oid)
+            result.errors.append((str(oid), error.get("errmsg", "write failed")))
+
+    for oid, fields in targets:
+        if oid in failed:
+            continue
+        doc = before[oid]
+        result.changes.append((doc, None if fields is None else {**doc, **fields}))
+    return result
@@ -0,0 +1,100 @@
+"""
+Streaming export of patient records as CSV or NDJSON.
+
+The export walks a MongoDB cursor and yields the encoded output in
+blocks of roughly ``BLOCK_BYTES``, so only one cursor batch and one
+output block are held in memory at a time however many records match.
+With ``compress=True`` the blocks are gzip-compressed as they are
+produced.
+
+CSV columns use the document field names, which the bulk import
+(``importer``) reads back unchanged.
+"""
+
+import csv
+import io
+import json
+import zlib
+
+from .importer import DOCUMENT_FIELDS
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+}
+EXPORT_PROJECTION = {"_id": 0, **{name: 1 for name in DOCUMENT_FIELDS}}
+# Output gathered before each yield; fewer, larger writes to the socket
+BLOCK_BYTES = 64 * 1024
+
+
+def export_cursor(coll, query: dict, batch_size: int):
+    """
+    Cursor over the records matching ``query``, in natural order.
+
+    No sort is requested: for a full export a collection scan is the
+    cheapest plan, and filtered exports still use the filter indexes.
+    """
+    return coll.find(query, EXPORT_PROJECTION, batch_size=batch_size)
+
+
+def csv_blocks(docs):
+    """
+    Yield UTF-8 CSV blocks (header first) for an iterable of documents.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(DOCUMENT_FIELDS)
+    for doc in docs:
+        writer.writerow([doc.get(name) for name in DOCUMENT_FIELDS])
+        if buffer.tell() >= BLOCK_BYTES:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
+
+
+def ndjson_blocks(docs):
+    """
+    Yield UTF-8 NDJSON blocks, one JSON object per document and line.
+    """
+    lines = []
+    size = 0
+    for doc in docs:
+        line = json.dumps(doc, separators=(",", ":"), default=str) + "\n"
+        lines.append(line)
+        size += len(line)
+        if size >= BLOCK_BYTES:
+            yield "".join(lines).encode("utf-8")
+            lines = []
+            size = 0
+    yield "".join(lines).encode("utf-8")
+
+
+def gzip_blocks(blocks):
+    """
+    Gzip-compress a stream of byte blocks incrementally.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for block in blocks:
+        compressed = compressor.compress(block)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_blocks(cursor, fmt: str, compress: bool = False):
+    """
+    Encoded export of ``cursor`` in ``fmt`` ("csv" or "ndjson").
+
+    The cursor is closed when the stream ends or is abandoned (for
+    example when the client disconnects).
+    """
+    try:
+        blocks = csv_blocks(cursor) if fmt == "csv" else ndjson_blocks(cursor)
+        if compress:
+            blocks = gzip_blocks(blocks)
+        for block in blocks:
+            if block:
+                yield block
+    finally:
+        cursor.close()
@@ -0,0 +1,407 @@
+"""
+Bulk import of patient records from a CSV file.
+
+The file is read in chunks of ``chunk_rows`` rows, so memory use does
+not depend on its size. Each chunk is validated column by column and
+mapped to the document shape ``add_patient`` writes:
+
+- ``Residence_type`` becomes ``residence_type`` and the dataset's ``id``
+  becomes ``patient_id`` (files that already use the document field
+  names, such as exports of this app, are read as they are);
+- text fields must hold one of the ``PatientForm`` choices, which the
+  patient list filters rely on (see ``queries``);
+- flags are stored as 0/1 ints, ages as ints when whole, and a missing
+  BMI as None.
+
+Rows that fail validation are skipped and reported with their row
+number. Valid rows are written as upserts keyed on ``patient_id``, so
+importing the same file twice replaces the records rather than
+duplicating them; a ``patient_id`` is therefore required on every row.
+The unique ``patient_id_unique`` index (see ``mongo_indexes``) keeps a
+concurrent insert from creating a second record with the same id; an
+upsert that loses that race is retried once and then replaces it.
+
+Writes are unordered ``bulk_write`` batches from ``workers`` threads.
+Rows are routed to a worker by ``patient_id``, so all rows for one
+patient are written by the same worker in file order and the last one
+wins. Each worker's queue holds at most two batches, which keeps the
+reader from running ahead of the database.
+"""
+
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+from flask import current_app
+from pymongo import ReplaceOne
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from app.db_mongo import get_patient_collection, get_patient_stats_collection, log_activity
+from app.insights.patient_stats import rebuild_patient_stats
+from .forms import PatientForm
+
+# CSV column -> document field, applied when the field is not already present
+COLUMN_NAMES = {"id": "patient_id", "Residence_type": "residence_type"}
+# Allowed values of the text fields (PatientForm choices)
+CHOICE_VALUES = {
+    name: [value for value, _label in getattr(PatientForm, name).kwargs["choices"]]
+    for name in ("gender", "ever_married", "work_type", "residence_type", "smoking_status")
+}
+# Missing-value markers besides empty cells, as for the analytics dataset
+NA_VALUES = ["N/A"]
+FLAG_FIELDS = ("hypertension", "heart_disease", "stroke")
+# Document fields in the order add_patient writes them
+DOCUMENT_FIELDS = (
+    "patient_id",
+    "gender",
+    "age",
+    "hypertension",
+    "heart_disease",
+    "ever_married",
+    "work_type",
+    "residence_type",
+    "avg_glucose_level",
+    "bmi",
+    "smoking_status",
+    "stroke",
+)
+# Every field except the optional BMI must be present in the file
+REQUIRED_FIELDS = tuple(name for name in DOCUMENT_FIELDS if name != "bmi")
+PATIENT_ID_MAX_LENGTH = 50
+
+# Row errors kept in the report; the rest are only counted
+MAX_REPORTED_ERRORS = 100
+# Server error code for a unique index violation
+DUPLICATE_KEY = 11000
+
+
+class PatientImportError(ValueError):
+    """
+    Raised when a file cannot be imported at all (unreadable, or missing
+    required columns).
+    """
+
+
+@dataclass
+class ImportReport:
+    """
+    Outcome of one import.
+    """
+
+    rows: int = 0
+    inserted: int = 0
+    replaced: int = 0
+    # Rows superseded by a later row with the same patient_id
+    duplicates: int = 0
+    failed: int = 0
+    errors: list = field(default_factory=list)  # [(row, message)], first few only
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def add_error(self, row: int, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((row, message))
+
+    def to_dict(self, max_errors: int = MAX_REPORTED_ERRORS) -> dict:
+        return {
+            "rows": self.rows,
+            "inserted": self.inserted,
+            "replaced": self.replaced,
+            "duplicates": self.duplicates,
+            "failed": self.failed,
+            "errors": [{"row": row, "message": msg} for row, msg in self.errors[:max_errors]],
+            "seconds": round(self.seconds, 3),
+            "rows_per_second": round(self.rows_per_second, 1),
+        }
+
+
+def _numbers(values: pd.Series) -> tuple:
+    """
+    ``(numbers, unparseable mask)`` for a column read as text.
+    """
+    numbers = pd.to_numeric(values, errors="coerce")
+    return numbers, numbers.isna() & values.notna()
+
+
+def chunk_documents(chunk: pd.DataFrame, first_row: int) -> tuple:
+    """
+    Validate one chunk read as text and convert it to patient documents.
+
+    Returns ``(documents, errors)``: ``documents`` is a list of
+    ``(row, doc)`` for the valid rows and ``errors`` a list of
+    ``(row, message)`` with the first problem of each invalid row.
+    Row numbers are 1-based data rows (the header is row 0).
+
+    :param chunk: rows with the document field names, as read by
+                  ``read_import_chunks``
+    :param first_row: row number of the chunk's first row
+    """
+    n = len(chunk)
+    problems = {}
+
+    def flag(mask, message):
+        for i in np.flatnonzero(np.asarray(mask)):
+            problems.setdefault(int(i), message)
+
+    ids = chunk["patient_id"].str.strip()
+    flag(ids.isna() | (ids == ""), "patient_id is required.")
+    flag(ids.str.len() > PATIENT_ID_MAX_LENGTH, "patient_id is longer than 50 characters.")
+
+    choices = {}
+    for name, allowed in CHOICE_VALUES.items():
+        values = chunk[name].str.strip()
+        flag(~values.isin(allowed), f"{name} must be one of: {', '.join(allowed)}.")
+        choices[name] = values.tolist()
+
+    flags = {}
+    for name in FLAG_FIELDS:
+        numbers, unparseable = _numbers(chunk[name])
+        flag(unparseable | ~numbers.isin([0, 1]), f"{name} must be 0 or 1.")
+        flags[name] = numbers.fillna(0).astype(int).tolist()
+
+    age, unparseable = _numbers(chunk["age"])
+    flag(unparseable | ~age.between(0, 120), "age must be a number from 0 to 120.")
+    glucose, unparseable = _numbers(chunk["avg_glucose_level"])
+    flag(unparseable | ~(glucose >= 0), "avg_glucose_level must be a number of at least 0.")
+    if "bmi" in chunk.columns:
+        bmi, unparseable = _numbers(chunk["bmi"])
+        flag(unparseable | (bmi < 0), "bmi must be a number of at least 0.")
+        bmi = bmi.astype(object).where(bmi.notna(), None).tolist()
+    else:
+        bmi = [None] * n
+
+    ids = ids.tolist()
+    age = age.tolist()
+    glucose = glucose.tolist()
+    documents = []
+    for i in range(n):
+        if i in problems:
+            continue
+        documents.append(
+            (
+                first_row + i,
+                {
+                    "patient_id": ids[i],
+                    "gender": choices["gender"][i],
+                    "age": int(age[i]) if float(age[i]).is_integer() else age[i],
+                    "hypertension": flags["hypertension"][i],
+                    "heart_disease": flags["heart_disease"][i],
+                    "ever_married": choices["ever_married"][i],
+                    "work_type": choices["work_type"][i],
+                    "residence_type": choices["residence_type"][i],
+                    "avg_glucose_level": glucose[i],
+                    "bmi": bmi[i],
+                    "smoking_status": choices["smoking_status"][i],
+                    "stroke": flags["stroke"][i],
+                },
+            )
+        )
+    errors = [(first_row + i, message) for i, message in sorted(problems.items())]
+    return documents, errors
+
+
+def read_import_chunks(source, chunk_rows: int):
+    """
+    Yield ``(first_row, chunk)`` pairs from a CSV path or file object,
+    with columns renamed to the document field names and every value
+    read as text.
+
+    Raises PatientImportError if the file cannot be parsed or lacks a
+    required column.
+    """
+    try:
+        reader = pd.read_csv(
+            source, chunksize=chunk_rows, dtype=str, na_values=NA_VALUES
+        )
+        first_row = 1
+        for chunk in reader:
+            renames = {
+                column: name
+                for column, name in COLUMN_NAMES.items()
+                if column in chunk.columns and name not in chunk.columns
+            }
+            chunk = chunk.rename(columns=renames)
+            missing = [name for name in REQUIRED_FIELDS if name not in chunk.columns]
+            if missing:
+                raise PatientImportError(
+                    "Missing required column(s): " + ", ".join(missing) + "."
+                )
+            yield first_row, chunk.reset_index(drop=True)
+            first_row += len(chunk)
+    except (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError) as exc:
+        raise PatientImportError(f"File could not be parsed as CSV ({exc}).") from exc
+
+
+def write_batch(coll, batch: list, retry_duplicates: bool = True) -> tuple:
+    """
+    Upsert one batch of ``(row, doc)`` pairs keyed on ``patient_id``.
+
+    Returns ``(inserted, replaced, errors)`` with ``errors`` as
+    ``(row, message)`` pairs for the documents the server rejected.
+    Upserts that fail with a duplicate key error (another writer inserted
+    the same ``patient_id`` first) are retried once, which replaces the
+    record the other writer inserted.
+    """
+    ops = [ReplaceOne({"patient_id": doc["patient_id"]}, doc, upsert=True) for _, doc in batch]
+    try:
+        result = coll.bulk_write(ops, ordered=False)
+        return result.upserted_count, result.matched_count, []
+    except BulkWriteError as exc:
+        details = exc.details
+        inserted = details.get("nUpserted", 0)
+        replaced = details.get("nMatched", 0)
+        errors = []
+        retry = []
+        for error in details.get("writeErrors", []):
+            row, doc = batch[error["index"]]
+            if retry_duplicates and error.get("code") == DUPLICATE_KEY:
+                retry.append((row, doc))
+            else:
+                errors.append((row, error.get("errmsg", "write failed")))
+        if retry:
+            more_inserted, more_replaced, more_errors = write_batch(
+                coll, retry, retry_duplicates=False
+            )
+            inserted += more_inserted
+            replaced += more_replaced
+            errors = sorted(errors + more_errors)
+        return inserted, replaced, errors
+
+
+class _Lane:
+    """
+    One writer thread and its bounded queue of batches.
+    """
+
+    def __init__(self, coll, report: ImportReport, lock: threading.Lock):
+        self.coll = coll
+        self.report = report
+        self.lock = lock
+        self.pending = {}  # patient_id -> (row, doc), next batch
+        self.queue = queue.Queue(maxsize=2)
+        self.failure = None
+        self.thread = threading.Thread(target=self._run, name="patient-import", daemon=True)
+        self.thread.start()
+
+    def add(self, row: int, doc: dict, batch_size: int) -> None:
+        if doc["patient_id"] in self.pending:
+            with self.lock:
+                self.report.duplicates += 1
+        self.pending[doc["patient_id"]] = (row, doc)
+        if len(self.pending) >= batch_size:
+            self.send()
+
+    def send(self) -> None:
+        if self.pending:
+            self.queue.put(list(self.pending.values()))
+            self.pending = {}
+
+    def _run(self) -> None:
+        while True:
+            batch = self.queue.get()
+            if batch is None:
+                return
+            if self.failure is not None:
+                # Keep draining so the reader is never blocked
+                continue
+            try:
+                inserted, replaced, errors = write_batch(self.coll, batch)
+            except Exception as exc:
+                self.failure = exc
+                continue
+            with self.lock:
+                self.report.inserted += inserted
+                self.report.replaced += replaced
+                for row, message in errors:
+                    self.report.add_error(row, message)
+
+
+def import_patients(
+    coll,
+    source,
+    batch_size: int = 1000,
+    workers: int = 4,
+    chunk_rows: int = 10_000,
+    progress=None,
+) -> ImportReport:
+    """
+    Import the patient rows of a CSV file into ``coll``.
+
+    :param coll: the patients collection
+    :param source: CSV path or binary/text file object
+    :param batch_size: documents per ``bulk_write``
+    :param workers: writer threads
+    :param chunk_rows: rows read and validated at a time
+    :param progress: optional callable receiving the report after each chunk
+    :raises PatientImportError: if the file cannot be read (some rows may
+        already have been written when this happens mid-file)
+    """
+    report = ImportReport()
+    lock = threading.Lock()
+    lanes = [_Lane(coll, report, lock) for _ in range(max(1, workers))]
+    started = time.perf_counter()
+    try:
+        for first_row, chunk in read_import_chunks(source, chunk_rows):
+            documents, errors = chunk_documents(chunk, first_row)
+            with lock:
+                report.rows += len(chunk)
+                for row, message in errors:
+                    report.add_error(row, message)
+            for row, doc in documents:
+                lanes[hash(doc["patient_id"]) % len(lanes)].add(row, doc, batch_size)
+            if any(lane.failure for lane in lanes):
+                break
+            if progress is not None:
+                progress(report)
+        for lane in lanes:
+            lane.send()
+    finally:
+        for lane in lanes:
+            lane.queue.put(None)
+        for lane in lanes:
+            lane.thread.join()
+        report.seconds = time.perf_counter() - started
+
+    for lane in lanes:
+        if lane.failure is not None:
+            raise lane.failure
+    return report
+
+
+def run_patient_import(source, username: str, progress=None) -> ImportReport:
+    """
+    Import a CSV file into the patients collection with the configured
+    batch size and worker count, then rebuild the running aggregates
+    and record the import in the activity log. Needs an app context.
+    """
+    config = current_app.config
+    report = import_patients(
+        get_patient_collection(),
+        source,
+        batch_size=config.get("PATIENT_IMPORT_BATCH_SIZE", 1000),
+        workers=config.get("PATIENT_IMPORT_WORKERS", 4),
+        chunk_rows=config.get("PATIENT_IMPORT_CHUNK_ROWS", 10_000),
+        progress=progress,
+    )
+    try:
+        # Too many changes for the per-record $inc updates
+        rebuild_patient_stats(get_patient_collection(), get_patient_stats_collection())
+    except PyMongoError as exc:
+        current_app.logger.warning("Failed to rebuild patient aggregates: %s", exc)
+
+    log_activity(
+        username=username,
+        action="IMPORT_PATIENTS",
+        details=(
+            f"Imported {report.rows} patient rows ({report.inserted} new, "
+            f"{report.replaced} replaced, {report.failed} rejected)."
+        ),
+    )
+    return report
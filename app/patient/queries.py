@@ -0,0 +1,283 @@
+"""
+Query helpers for the patient list.
+
+The list is paged with a keyset ("seek") cursor rather than ``skip``:
+each page asks an index for the entries just after (or before) the last
+row shown, so fetching page 1,000 costs the same as page 1. Only the
+fields the list template shows are projected, and the total uses
+``estimated_document_count`` (collection metadata) instead of counting
+documents.
+
+Filters are combined into one query that an index can serve in order:
+
+- without a patient id prefix, rows are ordered by ``(age, _id)``. Only
+  the categorical filters that are set are constrained. Each of them
+  leads its own ``<field>_age_id`` index, so pinning any one field gives
+  an index range already in ``(age, _id)`` order; MongoDB picks the most
+  selective of the set fields and checks the others on the fetched rows,
+  with no in-memory sort. The age range narrows that range. Records
+  whose values are missing or outside the form's choices are only left
+  out by a filter on that field;
+- with a patient id prefix, rows are ordered by ``(patient_id, _id)``
+  through the ``patient_id_id`` index. The prefix is an anchored regex,
+  which is an index range, and the other filters are checked on the
+  (few) matching rows.
+
+Cursors are opaque URL tokens encoding the sort value and ``_id`` of the
+boundary row. Ages may be missing on imported records; MongoDB sorts
+those first, and the keyset conditions below follow that order. Other
+sort fields are always set, so their conditions stay a single range.
+
+``fetch_page`` and the cursor helpers also page other collections (the
+activity log pages on a descending ``timestamp``).
+"""
+
+import base64
+import json
+import re
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+
+from bson.objectid import ObjectId
+from pymongo import ASCENDING, DESCENDING
+
+from .forms import PatientForm
+
+# Fields rendered by patient/list.html
+LIST_PROJECTION = {
+    "patient_id": 1,
+    "gender": 1,
+    "age": 1,
+    "hypertension": 1,
+    "heart_disease": 1,
+    "stroke": 1,
+}
+LIST_SORT = [("age", ASCENDING), ("_id", ASCENDING)]
+# Sort fields that imported records may lack (see keyset_filter)
+MAY_BE_MISSING = {"age"}
+PREFIX_SORT = [("patient_id", ASCENDING), ("_id", ASCENDING)]
+
+FLAG_FIELDS = ("stroke", "hypertension", "heart_disease")
+CHOICE_FIELDS = ("gender", "smoking_status")
+# Categorical filters; each leads a (field, age, _id) index
+FILTER_INDEX_FIELDS = FLAG_FIELDS + CHOICE_FIELDS
+
+
+def _choices(field_name: str, convert=str) -> list:
+    field = getattr(PatientForm, field_name)
+    return [convert(value) for value, _label in field.kwargs["choices"]]
+
+
+# Stored values of each filterable field, as written by add_patient
+FILTER_VALUES = {
+    **{name: _choices(name, int) for name in FLAG_FIELDS},
+    **{name: _choices(name) for name in CHOICE_FIELDS},
+}
+
+
+class InvalidCursor(ValueError):
+    """
+    Raised for a page cursor that cannot be decoded.
+    """
+
+
+@dataclass
+class PatientFilters:
+    """
+    Search filters for the patient list, parsed from request arguments.
+
+    Values that are blank or not among the allowed choices are ignored.
+    """
+
+    id_prefix: str = ""
+    age_min: float | None = None
+    age_max: float | None = None
+    gender: str | None = None
+    smoking_status: str | None = None
+    stroke: int | None = None
+    hypertension: int | None = None
+    heart_disease: int | None = None
+
+    @classmethod
+    def from_args(cls, args) -> "PatientFilters":
+        filters = cls(id_prefix=(args.get("q") or "").strip())
+        for name in ("age_min", "age_max"):
+            try:
+                setattr(filters, name, float(args.get(name, "")))
+            except ValueError:
+                pass
+        for name in FILTER_INDEX_FIELDS:
+            raw = (args.get(name) or "").strip()
+            value = int(raw) if name in FLAG_FIELDS and raw.isdigit() else raw
+            if value in FILTER_VALUES[name]:
+                setattr(filters, name, value)
+        return filters
+
+    def to_args(self) -> dict:
+        """
+        Request arguments that reproduce these filters (blank ones omitted).
+        """
+        args = {"q": self.id_prefix, **asdict(self)}
+        del args["id_prefix"]
+        return {key: value for key, value in args.items() if value not in (None, "")}
+
+    @property
+    def active(self) -> bool:
+        return bool(self.to_args())
+
+
+def build_query(filters: PatientFilters) -> tuple:
+    """
+    Mongo filter and sort order for ``filters``; returns ``(query, sort)``.
+    """
+    equality = {
+        name: getattr(filters, name)
+        for name in FILTER_INDEX_FIELDS
+        if getattr(filters, name) is not None
+    }
+    query = {}
+    if filters.id_prefix:
+        query["patient_id"] = {"$regex": "^" + re.escape(filters.id_prefix)}
+        sort = PREFIX_SORT
+    else:
+        sort = LIST_SORT
+    query.update(equality)
+
+    age = {}
+    if filters.age_min is not None:
+        age["$gte"] = filters.age_min
+    if filters.age_max is not None:
+        age["$lte"] = filters.age_max
+    if age:
+        query["age"] = age
+    return query, sort
+
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def encode_cursor(doc: dict, sort=LIST_SORT) -> str:
+    """
+    Opaque cursor for the position of ``doc`` in the ``sort`` order.
+    """
+    field = sort[0][0]
+    value = doc.get(field)
+    if isinstance(value, datetime):
+        # BSON dates hold milliseconds, so this round-trips exactly
+        value = {"ms": (value - _EPOCH) // timedelta(milliseconds=1)}
+    raw = json.dumps([value, str(doc["_id"])], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> tuple:
+    """
+    ``(value, ObjectId)`` from a cursor made by ``encode_cursor``.
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        value, oid = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if isinstance(value, dict):
+            value = _EPOCH + timedelta(milliseconds=int(value["ms"]))
+        elif value is not None and not isinstance(value, (int, float, str)):
+            raise TypeError(value)
+        return value, ObjectId(oid)
+    except Exception as exc:
+        raise InvalidCursor(f"Invalid page cursor: {token!r}") from exc
+
+
+def keyset_filter(value, oid: ObjectId, after: bool = True, field: str = "age") -> dict:
+    """
+    Filter for rows strictly after (or before) ``(value, oid)`` in
+    ascending ``(field, _id)`` order.
+    """
+    op = "$gt" if after else "$lt"
+    if value is None:
+        # Missing values sort before everything else
+        same_value = {field: None, "_id": {op: oid}}
+        if after:
+            return {"$or": [same_value, {field: {"$ne": None}}]}
+        return same_value
+    # The inclusive bound gives the planner an index range on the sort
+    # field; the $or then only decides ties on the boundary value
+    bounded = {
+        field: {op + "e": value},
+        "$or": [{field: {op: value}}, {"_id": {op: oid}}],
+    }
+    if after or field not in MAY_BE_MISSING:
+        return bounded
+    # Missing values sort first, so they are all before a present one
+    # ($lte never matches them)
+    return {"$or": [bounded, {field: None}]}
+
+
+@dataclass
+class Page:
+    """
+    One page of the patient list plus cursors for its neighbours.
+    """
+
+    items: list
+    next_cursor: str | None
+    prev_cursor: str | None
+
+
+def fetch_page(
+    coll,
+    query: dict,
+    page_size: int,
+    after=None,
+    before=None,
+    sort=LIST_SORT,
+    projection=LIST_PROJECTION,
+) -> Page:
+    """
+    Fetch one page of ``query`` in ``sort`` order.
+
+    :param coll: the collection to page through (usually patients)
+    :param query: filter to page through
+    :param page_size: rows per page
+    :param after: cursor of the last row of the previous page
+    :param before: cursor of the first row of the following page
+                   (used for "previous" links; ``after`` wins if both are set)
+    :param sort: ``(field, direction), ("_id", direction)`` with both
+                 directions the same, e.g. ``LIST_SORT`` or ``PREFIX_SORT``
+                 as returned by ``build_query``
+    :param projection: fields to return
+    """
+    backwards = after is None and before is not None
+    cursor_token = after if after is not None else before
+    descending = sort[0][1] == DESCENDING
+    conditions = [query] if query else []
+    if cursor_token is not None:
+        value, oid = decode_cursor(cursor_token)
+        # "After" in a descending order means smaller values
+        conditions.append(
+            keyset_filter(value, oid, after=backwards == descending, field=sort[0][0])
+        )
+    if len(conditions) > 1:
+        mongo_filter = {"$and": conditions}
+    else:
+        mongo_filter = conditions[0] if conditions else {}
+
+    # One extra row tells us whether another page exists
+    docs = list(
+        coll.find(mongo_filter, projection)
+        .sort([(field, -direction if backwards else direction) for field, direction in sort])
+        .limit(page_size + 1)
+    )
+    has_more = len(docs) > page_size
+    docs = docs[:page_size]
+    if backwards:
+        docs.reverse()
+
+    if not docs:
+        return Page(items=[], next_cursor=None, prev_cursor=None)
+    if backwards:
+        has_next, has_prev = True, has_more
+    else:
+        has_next, has_prev = has_more, cursor_token is not None
+    return Page(
+        items=docs,
+        next_cursor=encode_cursor(docs[-1], sort) if has_next else None,
+        prev_cursor=encode_cursor(docs[0], sort) if has_prev else None,
+    )
@@ -1,10 +1,24 @@
+import click
 from bson.objectid import ObjectId
-from flask import render_template, redirect, url_for, flash, request
+from flask import current_app, render_template, redirect, url_for, flash, request, abort, jsonify
 from flask_login import login_required, current_user
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, PyMongoError
 
-from app.db_mongo import get_patient_collection, log_activity
+from app.db_mongo import get_patient_collection, get_patient_stats_collection, log_activity
+from app.insights.patient_stats import apply_patient_changes
 from . import patient_bp
+from .bulk import BulkRequestError, parse_operations, run_bulk
+from .export import EXPORT_FORMATS, export_blocks, export_cursor
 from .forms import PatientForm
+from .importer import PatientImportError, run_patient_import
+from .queries import (
+    FILTER_VALUES,
+    InvalidCursor,
+    PatientFilters,
+    build_query,
+    fetch_page,
+)
 
 
 def _get_patient_collection():
@@ -14,23 +28,139 @@ def _get_patient_collection():
     return get_patient_collection()
 
 
+def _record_patient_change(before, after):
+    """
+    Apply a patient insert/update/delete to the running aggregates.
+    """
+    _record_patient_changes([(before, after)])
+
+
+def _record_patient_changes(changes):
+    """
+    Apply ``(before, after)`` patient changes to the running aggregates
+    in one update.
+
+    A failure only leaves the aggregates slightly off until the next
+    rebuild, so it must not fail the request.
+    """
+    try:
+        apply_patient_changes(get_patient_stats_collection(), changes)
+    except PyMongoError as exc:
+        current_app.logger.warning("Failed to update patient aggregates: %s", exc)
+
+
 @patient_bp.route("/", methods=["GET"])
 @login_required
 def list_patients():
+    """
+    One page of patients matching the search filters, with keyset
+    "next"/"previous" links.
+    """
     coll = _get_patient_collection()
-    search_id = request.args.get("q", "").strip()
+    filters = PatientFilters.from_args(request.args)
+    after = request.args.get("after") or None
+    before = request.args.get("before") or None
 
-    query = {}
-    if search_id:
-        query["patient_id"] = search_id
+    query, sort = build_query(filters)
+    page_size = current_app.config.get("PATIENTS_PAGE_SIZE", 50)
+    try:
+        page = fetch_page(coll, query, page_size, after=after, before=before, sort=sort)
+    except InvalidCursor:
+        flash("That page link is no longer valid; showing the first page.", "warning")
+        page = fetch_page(coll, query, page_size, sort=sort)
 
-    patients = list(coll.find(query).sort("age", 1))
+    # Collection metadata only; a filtered count would have to scan
+    total = None if query else coll.estimated_document_count()
 
     return render_template(
         "patient/list.html",
-        patients=patients,
-        search_query=search_id,
+        patients=page.items,
+        next_cursor=page.next_cursor,
+        prev_cursor=page.prev_cursor,
+        total=total,
+        filters=filters,
+        filter_args=filters.to_args(),
+        filter_values=FILTER_VALUES,
+        search_query=filters.id_prefix,
+    )
+
+
+@patient_bp.route("/export", methods=["GET"])
+@login_required
+def export_patients():
+    """
+    Stream every patient matching the list filters as CSV or NDJSON
+    (``format``), optionally gzip-compressed (``gzip=1``).
+    """
+    fmt = request.args.get("format", "csv")
+    if fmt not in EXPORT_FORMATS:
+        abort(400)
+    compress = request.args.get("gzip") in ("1", "true", "yes")
+    filters = PatientFilters.from_args(request.args)
+    query, _sort = build_query(filters)
+
+    cursor = export_cursor(
+        _get_patient_collection(),
+        query,
+        batch_size=current_app.config.get("PATIENT_EXPORT_BATCH_SIZE", 1000),
     )
+    log_activity(
+        username=current_user.username,
+        action="EXPORT_PATIENTS",
+        details=f"Exported patient records as {fmt} (filters: {filters.to_args() or 'none'}).",
+    )
+
+    mimetype, extension = EXPORT_FORMATS[fmt]
+    filename = f"patients.{extension}"
+    if compress:
+        mimetype, filename = "application/gzip", filename + ".gz"
+    response = current_app.response_class(
+        export_blocks(cursor, fmt, compress=compress), mimetype=mimetype
+    )
+    response.headers["Content-Disposition"] = f"attachment; filename={filename}"
+    # Let proxies pass blocks through as they are produced
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+@patient_bp.route("/bulk", methods=["POST"])
+@login_required
+def bulk_patients():
+    """
+    Apply a JSON list of patient updates and deletes in one bulk write
+    (see ``bulk`` for the request format), with one activity entry for
+    the whole batch. Like other POSTs, the request needs the CSRF token
+    (``X-CSRFToken`` header).
+    """
+    try:
+        operations = parse_operations(
+            request.get_json(silent=True),
+            current_app.config.get("PATIENT_BULK_MAX_OPERATIONS", 1000),
+        )
+        result = run_bulk(_get_patient_collection(), operations)
+    except BulkRequestError as exc:
+        return jsonify({"error": str(exc)}), 400
+    except PyMongoError:
+        return jsonify({"error": "Patient records store unavailable."}), 503
+
+    if result.changes:
+        _record_patient_changes(result.changes)
+        updated = [b for b, a in result.changes if a is not None]
+        deleted = [b for b, a in result.changes if a is None]
+        # Hospital ids of the first few records, as the single-record entries show
+        shown = [b.get("patient_id") or "not specified" for b, _ in result.changes[:20]]
+        more = len(result.changes) - len(shown)
+        log_activity(
+            username=current_user.username,
+            action="BULK_UPDATE_PATIENTS",
+            details=(
+                f"Bulk operation: updated {len(updated)} and deleted {len(deleted)} "
+                f"patient records (hospital ids={', '.join(shown)}"
+                + (f" and {more} more" if more else "")
+                + ")."
+            ),
+        )
+    return jsonify(result.to_dict())
 
 
 @patient_bp.route("/add", methods=["GET", "POST"])
@@ -55,7 +185,12 @@ def add_patient():
             "stroke": int(form.stroke.data),
         }
 
-        coll.insert_one(doc)
+        try:
+            coll.insert_one(doc)
+        except DuplicateKeyError:
+            flash(f"Another patient already has hospital id {doc['patient_id']}.", "danger")
+            return render_template("patient/form.html", form=form, title="Add patient")
+        _record_patient_change(None, doc)
 
         # Activity log for patient creation (no raw _id)
         display_id = doc.get("patient_id") or "not specified"
@@ -109,7 +244,21 @@ def edit_patient(patient_id):
             "stroke": int(form.stroke.data),
         }
 
-        coll.update_one({"_id": ObjectId(patient_id)}, {"$set": update_doc})
+        # The pre-image is returned atomically with the update
+        try:
+            before = coll.find_one_and_update(
+                {"_id": ObjectId(patient_id)},
+                {"$set": update_doc},
+                return_document=ReturnDocument.BEFORE,
+            )
+        except DuplicateKeyError:
+            flash(
+                f"Another patient already has hospital id {update_doc['patient_id']}.",
+                "danger",
+            )
+            return render_template("patient/form.html", form=form, title="Edit patient")
+        if before is not None:
+            _record_patient_change(before, {**before, **update_doc})
 
         # Use the edited hospital id for a clean log message
         display_id = update_doc.get("patient_id") or "not specified"
@@ -147,9 +296,10 @@ def view_patient(patient_id):
 def delete_patient(patient_id):
     coll = _get_patient_collection()
     try:
-        # Fetch once so we can get the friendly hospital id
-        doc = coll.find_one({"_id": ObjectId(patient_id)})
-        coll.delete_one({"_id": ObjectId(patient_id)})
+        # The deleted document gives the friendly hospital id
+        doc = coll.find_one_and_delete({"_id": ObjectId(patient_id)})
+        if doc is not None:
+            _record_patient_change(doc, None)
 
         display_id = (doc or {}).get("patient_id") or "not specified"
         log_activity(
@@ -163,3 +313,27 @@ def delete_patient(patient_id):
         flash("Could not delete patient.", "danger")
 
     return redirect(url_for("patient.list_patients"))
+
+
+@patient_bp.cli.command("import")
+@click.argument("csv_path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--username", default="cli", show_default=True, help="Name recorded in the activity log.")
+def import_patients_command(csv_path, username):
+    """Import patient records from a CSV file (upserted on patient_id)."""
+
+    def progress(report):
+        click.echo(f"{report.rows} rows read, {report.failed} rejected", err=True)
+
+    try:
+        report = run_patient_import(csv_path, username, progress=progress)
+    except PatientImportError as exc:
+        raise click.ClickException(str(exc))
+    click.echo(
+        f"{report.rows} rows in {report.seconds:.1f}s ({report.rows_per_second:.0f} rows/s): "
+        f"{report.inserted} new, {report.replaced} replaced, "
+        f"{report.duplicates} duplicate ids, {report.failed} rejected."
+    )
+    for row, message in report.errors:
+        click.echo(f"  row {row}: {message}")
+    if report.failed > len(report.errors):
+        click.echo(f"  ... and {report.failed - len(report.errors)} more")
@@ -4,9 +4,54 @@ Security utility functions for the Hospital Insight Hub.
 This module centralises basic security-related helpers so that
 password handling and other sensitive operations are not scattered
 throughout the codebase.
+
+New hashes use the method set with ``set_hash_method`` (the
+``PASSWORD_HASH_METHOD`` setting), e.g. ``scrypt:32768:8:1`` or
+``pbkdf2:sha256:600000``. Stored hashes made with another method or
+cost still verify; ``needs_rehash`` tells the login view to replace them
+once the user has signed in with the plain-text password.
 """
 
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.security import (
+    DEFAULT_PBKDF2_ITERATIONS,
+    check_password_hash,
+    generate_password_hash,
+)
+
+DEFAULT_HASH_METHOD = "scrypt:32768:8:1"
+
+_hash_method = DEFAULT_HASH_METHOD
+
+
+def normalize_hash_method(method: str) -> str:
+    """
+    ``method`` with Werkzeug's defaults filled in, as it appears at the
+    start of the hashes it produces ("scrypt" -> "scrypt:32768:8:1").
+
+    Raises ValueError for a method Werkzeug does not support.
+    """
+    name, *args = (method or "").split(":")
+    if name == "scrypt":
+        defaults = ["32768", "8", "1"]
+    elif name == "pbkdf2":
+        defaults = ["sha256", str(DEFAULT_PBKDF2_ITERATIONS)]
+    else:
+        raise ValueError(f"Unsupported password hash method: {method!r}")
+    if len(args) > len(defaults):
+        raise ValueError(f"Unsupported password hash method: {method!r}")
+    return ":".join([name, *args, *defaults[len(args):]])
+
+
+def set_hash_method(method: str) -> None:
+    """
+    Use ``method`` for new password hashes.
+    """
+    global _hash_method
+    _hash_method = normalize_hash_method(method)
+
+
+def get_hash_method() -> str:
+    return _hash_method
 
 
 def hash_password(plain_password: str) -> str:
@@ -18,7 +63,7 @@ def hash_password(plain_password: str) -> str:
     """
     if not isinstance(plain_password, str):
         raise TypeError("Password must be a string.")
-    return generate_password_hash(plain_password)
+    return generate_password_hash(plain_password, method=_hash_method)
 
 
 def verify_password(plain_password: str, stored_hash: str) -> bool:
@@ -30,3 +75,11 @@ def verify_password(plain_password: str, stored_hash: str) -> bool:
     if not plain_password or not stored_hash:
         return False
     return check_password_hash(stored_hash, plain_password)
+
+
+def needs_rehash(stored_hash: str) -> bool:
+    """
+    True if ``stored_hash`` was made with a method or cost other than
+    the configured one.
+    """
+    return stored_hash.split("$", 1)[0] != _hash_method
@@ -0,0 +1,126 @@
+"""
+Per-process cache of the user records behind ``current_user``.
+
+Flask-Login calls ``load_user`` on every authenticated request, which
+used to mean one SQLite query per page view just to rebuild the signed-in
+user. ``user_cache`` keeps the column values of recently loaded users,
+keyed by id, for ``USER_CACHE_TTL`` seconds and at most
+``USER_CACHE_MAX_ENTRIES`` users (least recently used dropped first).
+
+Plain values are cached rather than ``AppUser`` instances: an instance
+belongs to the session of the request that loaded it, and sharing it
+across requests and threads is not safe. ``load_user`` builds a detached
+``AppUser`` from them instead, so code that changes a user must load it
+into the session first (as ``auth.profile`` does) and call
+``invalidate`` after committing. The cache is per process; the TTL bounds
+how long another worker may keep showing the old username.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class UserCache:
+    """
+    Thread-safe TTL + LRU cache of user records keyed by id.
+    """
+
+    def __init__(self, ttl: float = 60, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._pid = os.getpid()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def configure(self, ttl: float, max_entries: int) -> None:
+        with self._lock:
+            self.ttl = ttl
+            self.max_entries = max_entries
+            self._entries.clear()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    def _check_fork(self) -> None:
+        # Each worker counts its own lookups
+        if self._pid != os.getpid():
+            self._entries.clear()
+            self._pid = os.getpid()
+
+    def get(self, user_id: int):
+        """
+        Cached record for ``user_id``, or None if absent or expired.
+        """
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            self._check_fork()
+            entry = self._entries.get(user_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, record = entry
+            if expires_at <= now:
+                del self._entries[user_id]
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return record
+
+    def put(self, user_id: int, record: dict) -> None:
+        """
+        Cache ``record`` for ``user_id``, dropping the least recently used
+        entries beyond ``max_entries``.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._check_fork()
+            self._entries[user_id] = (time.monotonic() + self.ttl, record)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, user_id: int | None = None) -> None:
+        """
+        Drop the entry for ``user_id``, or every entry if no id is given.
+        """
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            elif self._entries.pop(user_id, None) is not None:
+                self.invalidations += 1
+
+    def stats(self) -> dict:
+        """
+        Snapshot of the cache counters, suitable for JSON output.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+# Shared by every request in this worker process
+user_cache = UserCache()
@@ -0,0 +1,115 @@
+# benchmarks/bench_login.py
+"""
+Login throughput and latency of other pages during a login storm.
+
+Usage:
+    python benchmarks/bench_login.py [storm_threads] [seconds]
+
+Runs the app in-process against a throwaway SQLite database. Each of
+``storm_threads`` threads (default 16) signs in over and over for
+``seconds`` seconds (default 5), while one signed-in client loads
+``/auth/profile`` as fast as it can. Reports successful logins per
+second and the profile page's p50 / p99 latency, first with no storm,
+then with passwords checked in the request thread (PASSWORD_WORKERS=0),
+then on the password pool with 1 and 2 workers. The login rate limit is
+turned off so that every attempt is hashed.
+"""
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+# Ensure project root is on sys.path so "import app" works
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench_login.sqlite3")
+os.environ["TEST_DATABASE_URI"] = f"sqlite:///{DB_PATH}"
+os.environ["LOGIN_USER_PER_MINUTE"] = "0"
+os.environ["LOGIN_IP_PER_MINUTE"] = "0"
+
+from app import create_hospital_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.login_guard import password_pool  # noqa: E402
+from app.models import AppUser  # noqa: E402
+
+PASSWORD = "bench-password"
+MODES = {
+    "no storm": None,
+    "inline": 0,
+    "pool, 1 worker": 1,
+    "pool, 2 workers": 2,
+}
+
+
+def create_users(app, count: int) -> None:
+    with app.app_context():
+        for i in range(count + 1):
+            user = AppUser(username=f"bench{i}")
+            user.set_password(PASSWORD)
+            db.session.add(user)
+        db.session.commit()
+
+
+def login(client, username: str) -> bool:
+    resp = client.post("/auth/login", data={"username": username, "password": PASSWORD})
+    return resp.status_code == 302
+
+
+def run_mode(app, workers, storm_threads: int, seconds: float):
+    if workers is not None:
+        password_pool.configure(workers=workers, max_pending=64, timeout=30)
+    stop = threading.Event()
+    logins = []
+
+    def storm(i):
+        client = app.test_client()
+        done = 0
+        while not stop.is_set():
+            if login(client, f"bench{i + 1}"):
+                done += 1
+            client.get("/auth/logout")
+        logins.append(done)
+
+    reader = app.test_client()
+    login(reader, "bench0")
+    threads = []
+    if workers is not None:
+        threads = [threading.Thread(target=storm, args=(i,)) for i in range(storm_threads)]
+    for thread in threads:
+        thread.start()
+
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        reader.get("/auth/profile")
+        latencies.append(time.perf_counter() - started)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    ms = sorted(t * 1000 for t in latencies)
+    p99 = ms[min(len(ms) - 1, int(len(ms) * 0.99))]
+    return sum(logins) / seconds, statistics.median(ms), p99, len(ms)
+
+
+def main(storm_threads: int, seconds: float):
+    app = create_hospital_app("testing")
+    create_users(app, storm_threads)
+    print(f"{storm_threads} login threads, {seconds:g}s per mode, {os.cpu_count()} CPUs")
+    print(f"{'mode':>16} {'logins/s':>9} {'p50 (ms)':>9} {'p99 (ms)':>9} {'pages':>7}")
+    for name, workers in MODES.items():
+        rate, p50, p99, pages = run_mode(app, workers, storm_threads, seconds)
+        print(f"{name:>16} {rate:>9.1f} {p50:>9.2f} {p99:>9.2f} {pages:>7}")
+    os.remove(DB_PATH)
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 16,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 5,
+    )
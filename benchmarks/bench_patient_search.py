@@ -0,0 +1,126 @@
+# benchmarks/bench_patient_search.py
+"""
+Patient list query latency on a large collection in a local mongod.
+
+Usage:
+    python benchmarks/bench_patient_search.py [documents]
+
+Seeds ``documents`` synthetic patients (default 1M) into the
+``bench_patients`` collection of MONGO_DB_NAME on MONGO_URI (defaults:
+mongodb://localhost:27017, hospital_management_bench), creates the
+declared indexes, then for each filter combination times the first page
+and 20 keyset pages after it. Also reports keys/documents examined by
+the first page's plan, which should stay near the page size however
+large the collection is. The collection is kept between runs; pass a
+different size to rebuild it.
+"""
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+# Ensure project root is on sys.path so "import app" works
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from pymongo import MongoClient  # noqa: E402
+
+from app.mongo_indexes import INDEX_SPECS, ensure_indexes, plan_problems  # noqa: E402
+from app.patient.queries import (  # noqa: E402
+    FILTER_VALUES,
+    LIST_PROJECTION,
+    PatientFilters,
+    build_query,
+    fetch_page,
+)
+
+PAGE_SIZE = 50
+PAGES = 20
+CASES = {
+    "no filter": {},
+    "age 40-60": {"age_min": 40, "age_max": 60},
+    "stroke": {"stroke": 1},
+    "smokes, age >= 50": {"smoking_status": "smokes", "age_min": 50},
+    "all categories": {
+        "stroke": 1,
+        "hypertension": 1,
+        "heart_disease": 0,
+        "gender": "Female",
+        "smoking_status": "never smoked",
+    },
+    "id prefix": {"id_prefix": "P-0042"},
+}
+
+
+def seed(coll, documents: int, batch: int = 50_000) -> None:
+    if coll.estimated_document_count() == documents:
+        return
+    coll.drop()
+    rng = np.random.default_rng(0)
+    for start in range(0, documents, batch):
+        n = min(batch, documents - start)
+        ages = rng.integers(0, 83, n)
+        flags = {name: rng.integers(0, 2, n) for name in ("stroke", "hypertension", "heart_disease")}
+        genders = rng.choice(FILTER_VALUES["gender"], n)
+        smoking = rng.choice(FILTER_VALUES["smoking_status"], n)
+        coll.insert_many(
+            [
+                {
+                    "patient_id": f"P-{start + i:07d}",
+                    "age": int(ages[i]),
+                    "gender": str(genders[i]),
+                    "smoking_status": str(smoking[i]),
+                    **{name: int(values[i]) for name, values in flags.items()},
+                }
+                for i in range(n)
+            ],
+            ordered=False,
+        )
+    print(f"seeded {documents:,} documents")
+
+
+def run_case(coll, filters: PatientFilters):
+    query, sort = build_query(filters)
+    timings = []
+    after = None
+    for _ in range(PAGES + 1):
+        started = time.perf_counter()
+        page = fetch_page(coll, query, PAGE_SIZE, after=after, sort=sort)
+        timings.append(time.perf_counter() - started)
+        after = page.next_cursor
+        if after is None:
+            break
+
+    explain = (
+        coll.find(query, LIST_PROJECTION).sort(sort).limit(PAGE_SIZE + 1).explain()
+    )
+    stats = explain.get("executionStats", {})
+    return timings, stats, plan_problems(explain)
+
+
+def main(documents: int):
+    client = MongoClient(os.getenv("MONGO_URI", "mongodb://localhost:27017"))
+    db = client[os.getenv("MONGO_DB_NAME", "hospital_management_bench")]
+    coll = db["bench_patients"]
+    seed(coll, documents)
+    ensure_indexes(db, {"bench_patients": INDEX_SPECS["patients"]})
+
+    print(
+        f"{'case':>20} {'first (ms)':>11} {'p50 (ms)':>9} {'max (ms)':>9} "
+        f"{'keys':>7} {'docs':>7}  plan"
+    )
+    for name, args in CASES.items():
+        timings, stats, problems = run_case(coll, PatientFilters(**args))
+        ms = [t * 1000 for t in timings]
+        print(
+            f"{name:>20} {ms[0]:>11.2f} {statistics.median(ms):>9.2f} {max(ms):>9.2f} "
+            f"{stats.get('totalKeysExamined', '?'):>7} {stats.get('totalDocsExamined', '?'):>7}  "
+            f"{', '.join(problems) or 'indexed'}"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,97 @@
+# benchmarks/bench_profiling.py
+"""
+Compare the original data overview statistics code with profile_dataset.
+
+Usage:
+    python benchmarks/bench_profiling.py [rows ...]
+
+Defaults to 5k, 1M and 10M rows of synthetic stroke-like data.
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Ensure project root is on sys.path so "import app" works
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from app.insights.profiling import profile_dataset  # noqa: E402
+
+
+def synthetic_stroke_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Random data with the stroke dataset's column layout and ~4% missing BMI.
+    """
+    rng = np.random.default_rng(seed)
+    bmi = rng.normal(28.9, 7.8, rows)
+    bmi[rng.random(rows) < 0.04] = np.nan
+    return pd.DataFrame(
+        {
+            "id": np.arange(rows, dtype=np.int64),
+            "gender": rng.choice(["Male", "Female", "Other"], rows),
+            "age": rng.uniform(0.08, 82, rows).round(0),
+            "hypertension": rng.integers(0, 2, rows),
+            "heart_disease": rng.integers(0, 2, rows),
+            "avg_glucose_level": rng.gamma(7.0, 15.0, rows),
+            "bmi": bmi,
+            "smoking_status": rng.choice(["never smoked", "smokes", "Unknown"], rows),
+            "stroke": rng.integers(0, 2, rows),
+        }
+    )
+
+
+def legacy_overview_stats(df: pd.DataFrame):
+    """
+    The statistics code data_overview() used before profile_dataset.
+    """
+    missing = df.isna().sum()
+    numeric_df = df.select_dtypes(include=["float64", "int64"])
+    summary = numeric_df.describe().T
+    outliers = []
+    for col in numeric_df.columns:
+        series = numeric_df[col].dropna()
+        if series.empty:
+            continue
+        q1 = series.quantile(0.25)
+        q3 = series.quantile(0.75)
+        iqr = q3 - q1
+        lower = q1 - 1.5 * iqr
+        upper = q3 + 1.5 * iqr
+        outliers.append(int(((series < lower) | (series > upper)).sum()))
+    return missing, summary, outliers
+
+
+def best_of(fn, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main(sizes):
+    print(f"{'rows':>12} {'legacy (s)':>12} {'profile (s)':>12} {'speedup':>8}")
+    for rows in sizes:
+        df = synthetic_stroke_frame(rows)
+        repeats = 5 if rows <= 100_000 else 2
+
+        _, summary, outliers = legacy_overview_stats(df)
+        profile = profile_dataset(df)
+        assert np.allclose(
+            profile.stats[summary.columns].to_numpy(), summary.to_numpy(), equal_nan=True
+        )
+        assert profile.stats["outliers"].tolist() == outliers
+
+        legacy = best_of(lambda: legacy_overview_stats(df), repeats)
+        single = best_of(lambda: profile_dataset(df), repeats)
+        print(f"{rows:>12,} {legacy:>12.4f} {single:>12.4f} {legacy / single:>7.2f}x")
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [5_000, 1_000_000, 10_000_000]
+    main(sizes)
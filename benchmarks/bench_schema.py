@@ -0,0 +1,59 @@
+# benchmarks/bench_schema.py
+"""
+Compare loading the stroke CSV with default dtypes and with the dataset schema.
+
+Usage:
+    python benchmarks/bench_schema.py [rows ...]
+
+Defaults to 5k, 1M and 5M rows of synthetic stroke-like data. Reports
+parse time and the in-memory size of the resulting frame (deep, so the
+Python string objects behind object columns are counted).
+"""
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+# Ensure project root is on sys.path so "import app" works
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from app.insights.schema import read_stroke_csv  # noqa: E402
+from bench_profiling import best_of, synthetic_stroke_frame  # noqa: E402
+
+
+def megabytes(df: pd.DataFrame) -> float:
+    return df.memory_usage(deep=True).sum() / (1024 * 1024)
+
+
+def main(sizes):
+    print(
+        f"{'rows':>12} {'default (s)':>12} {'schema (s)':>11} "
+        f"{'default MB':>11} {'schema MB':>10} {'ratio':>7}"
+    )
+    for rows in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "stroke.csv")
+            synthetic_stroke_frame(rows).to_csv(path, index=False, na_rep="N/A")
+            repeats = 5 if rows <= 100_000 else 2
+
+            default_df = pd.read_csv(path)
+            schema_df = read_stroke_csv(path)
+            assert len(default_df) == len(schema_df)
+
+            default_s = best_of(lambda: pd.read_csv(path), repeats)
+            schema_s = best_of(lambda: read_stroke_csv(path), repeats)
+            default_mb = megabytes(default_df)
+            schema_mb = megabytes(schema_df)
+            print(
+                f"{rows:>12,} {default_s:>12.4f} {schema_s:>11.4f} "
+                f"{default_mb:>11.1f} {schema_mb:>10.1f} {default_mb / schema_mb:>6.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [5_000, 1_000_000, 5_000_000]
+    main(sizes)
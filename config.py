@@ -22,6 +22,104 @@ class BaseConfig:
     MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
     MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "hospital_management_db")
 
+    # One MongoClient (and connection pool) is shared per worker process
+    MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+    MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+    MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
+    # How long a request waits for a free pooled connection
+    MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "2000"))
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(
+        os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000")
+    )
+    MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+    MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "10000"))
+    # Write concern "w" may be a number or a mode such as "majority".
+    # Unset values fall back to the URI options / driver defaults
+    MONGO_WRITE_CONCERN_W = os.getenv("MONGO_WRITE_CONCERN_W") or None
+    MONGO_WRITE_CONCERN_JOURNAL = {"true": True, "false": False}.get(
+        os.getenv("MONGO_WRITE_CONCERN_JOURNAL", "").lower()
+    )
+    MONGO_READ_PREFERENCE = os.getenv("MONGO_READ_PREFERENCE") or None
+
+    # Create the indexes declared in app/mongo_indexes.py at startup, and
+    # optionally refuse to start if a view query would not use them
+    MONGO_ENSURE_INDEXES = os.getenv("MONGO_ENSURE_INDEXES", "true").lower() in ("1", "true", "yes")
+    MONGO_VERIFY_QUERY_PLANS = (
+        os.getenv("MONGO_VERIFY_QUERY_PLANS", "false").lower() in ("1", "true", "yes")
+    )
+    # Seconds startup waits for MongoDB before skipping the index setup
+    MONGO_STARTUP_TIMEOUT = float(os.getenv("MONGO_STARTUP_TIMEOUT", "2"))
+
+    # Where the dashboard KPIs and /insights/api/summary come from: "csv"
+    # (the uploaded stroke dataset), "mongo" (aggregation pipelines over
+    # the patients collection) or "mongo-incremental" (running aggregates
+    # updated on every patient change)
+    ANALYTICS_SOURCE = os.getenv("ANALYTICS_SOURCE", "csv")
+    # Age after which the running aggregates are rebuilt in the background
+    PATIENT_STATS_REBUILD_SECONDS = int(os.getenv("PATIENT_STATS_REBUILD_SECONDS", "3600"))
+
+    # Rows per page on the patient list (keyset-paginated)
+    PATIENTS_PAGE_SIZE = int(os.getenv("PATIENTS_PAGE_SIZE", "50"))
+
+    # Bulk patient import: documents per bulk_write, writer threads, and
+    # CSV rows read and validated at a time
+    PATIENT_IMPORT_BATCH_SIZE = int(os.getenv("PATIENT_IMPORT_BATCH_SIZE", "1000"))
+    PATIENT_IMPORT_WORKERS = int(os.getenv("PATIENT_IMPORT_WORKERS", "4"))
+    PATIENT_IMPORT_CHUNK_ROWS = int(os.getenv("PATIENT_IMPORT_CHUNK_ROWS", "10000"))
+    # Documents fetched per cursor round trip by the streaming export
+    PATIENT_EXPORT_BATCH_SIZE = int(os.getenv("PATIENT_EXPORT_BATCH_SIZE", "1000"))
+    # Largest list of operations accepted by POST /patients/bulk
+    PATIENT_BULK_MAX_OPERATIONS = int(os.getenv("PATIENT_BULK_MAX_OPERATIONS", "1000"))
+
+    # Entries per page on the activity log (keyset-paginated)
+    ACTIVITY_PAGE_SIZE = int(os.getenv("ACTIVITY_PAGE_SIZE", "100"))
+
+    # Audit entries are queued and written in batches by a background
+    # thread; set AUDIT_ASYNC=false to write each one inside the request
+    AUDIT_ASYNC = os.getenv("AUDIT_ASYNC", "true").lower() in ("1", "true", "yes")
+    AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))
+    AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "200"))
+    AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "0.5"))
+    # What to do with new entries while the queue is full: "block" (wait up
+    # to AUDIT_BLOCK_TIMEOUT seconds, then drop), "drop" or "inline" (write
+    # in the request)
+    AUDIT_FULL_POLICY = os.getenv("AUDIT_FULL_POLICY", "block")
+    AUDIT_BLOCK_TIMEOUT = float(os.getenv("AUDIT_BLOCK_TIMEOUT", "0.05"))
+    # Days activity entries are kept (0 keeps them forever); hourly and
+    # daily rollups are kept regardless
+    AUDIT_RETENTION_DAYS = int(os.getenv("AUDIT_RETENTION_DAYS", "365"))
+
+    # Live activity stream (Server-Sent Events): open streams per worker
+    # process, entries buffered per stream before a slow client is
+    # dropped, recent entries kept for reconnects, keep-alive interval
+    # and the longest a single stream stays open
+    ACTIVITY_STREAM_MAX_CLIENTS = int(os.getenv("ACTIVITY_STREAM_MAX_CLIENTS", "50"))
+    ACTIVITY_STREAM_BUFFER = int(os.getenv("ACTIVITY_STREAM_BUFFER", "100"))
+    ACTIVITY_STREAM_HISTORY = int(os.getenv("ACTIVITY_STREAM_HISTORY", "100"))
+    ACTIVITY_STREAM_HEARTBEAT = float(os.getenv("ACTIVITY_STREAM_HEARTBEAT", "15"))
+    ACTIVITY_STREAM_MAX_SECONDS = float(os.getenv("ACTIVITY_STREAM_MAX_SECONDS", "300"))
+
+    # Signed-in user records cached per worker process: seconds an entry
+    # is trusted (0 disables the cache) and the most users kept
+    USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))
+    USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "1024"))
+
+    # Method and cost for new password hashes, in Werkzeug's notation
+    # (e.g. "pbkdf2:sha256:600000"); older hashes are upgraded at login
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+    # Password checks per worker process: hashes run at once, checks
+    # queued or running before logins get a 503, and the longest a
+    # login waits for its check (0 workers hashes in the request thread)
+    PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS", "2"))
+    PASSWORD_MAX_PENDING = int(os.getenv("PASSWORD_MAX_PENDING", "32"))
+    PASSWORD_TIMEOUT = float(os.getenv("PASSWORD_TIMEOUT", "10"))
+    # Sign-in attempts allowed in a burst and per minute, per username
+    # and per client IP (a rate of 0 turns that limit off)
+    LOGIN_USER_BURST = int(os.getenv("LOGIN_USER_BURST", "5"))
+    LOGIN_USER_PER_MINUTE = float(os.getenv("LOGIN_USER_PER_MINUTE", "10"))
+    LOGIN_IP_BURST = int(os.getenv("LOGIN_IP_BURST", "20"))
+    LOGIN_IP_PER_MINUTE = float(os.getenv("LOGIN_IP_PER_MINUTE", "60"))
+
     SESSION_COOKIE_HTTPONLY = True
     REMEMBER_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SAMESITE = "Lax"
@@ -32,12 +130,47 @@ class BaseConfig:
         str(BASE_DIR / "dataset" / "stroke_data.csv")
     )
 
+    # Largest accepted dataset upload; requests above MAX_CONTENT_LENGTH
+    # are rejected by Flask before the body is read
+    MAX_DATASET_UPLOAD_BYTES = int(
+        os.getenv("MAX_DATASET_UPLOAD_BYTES", str(512 * 1024 * 1024))
+    )
+    MAX_CONTENT_LENGTH = MAX_DATASET_UPLOAD_BYTES + 1024 * 1024
+
+    # "exact" profiles the loaded dataset; "sketch" streams the CSV in
+    # chunks and estimates quartiles/outlier bounds with KLL sketches
+    OUTLIER_MODE = os.getenv("OUTLIER_MODE", "exact")
+    OUTLIER_SKETCH_K = int(os.getenv("OUTLIER_SKETCH_K", "200"))
+    DATASET_CHUNK_ROWS = int(os.getenv("DATASET_CHUNK_ROWS", "100000"))
+
+    # Rendered chart images kept under static/charts before LRU eviction
+    CHART_CACHE_MAX_FILES = int(os.getenv("CHART_CACHE_MAX_FILES", "50"))
+    CHART_CACHE_MAX_BYTES = int(os.getenv("CHART_CACHE_MAX_BYTES", str(20 * 1024 * 1024)))
+
+    # Chart rendering worker processes (0 renders inside the request thread)
+    CHART_RENDER_WORKERS = int(os.getenv("CHART_RENDER_WORKERS", "2"))
+    CHART_RENDER_MAX_PENDING = int(os.getenv("CHART_RENDER_MAX_PENDING", "16"))
+    # Seconds a page waits for a chart before showing a placeholder
+    CHART_RENDER_TIMEOUT = float(os.getenv("CHART_RENDER_TIMEOUT", "3.0"))
+
 
 class DevelopmentConfig(BaseConfig):
     DEBUG = True
 
 
+class TestingConfig(BaseConfig):
+    TESTING = True
+    # A fresh in-memory database per app, so tests never touch the real one
+    SQLALCHEMY_DATABASE_URI = os.getenv("TEST_DATABASE_URI", "sqlite://")
+    WTF_CSRF_ENABLED = False
+    # The test suite runs without a MongoDB server
+    MONGO_ENSURE_INDEXES = False
+    # Charts render in the request thread; no worker processes in tests
+    CHART_RENDER_WORKERS = 0
+
+
 config_map = {
     "development": DevelopmentConfig,
+    "testing": TestingConfig,
     "default": DevelopmentConfig,
 }
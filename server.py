@@ -1,6 +1,9 @@
 from app import create_hospital_app
 
-app = create_hospital_app()
+# Chart render workers are spawned processes that re-run this file as
+# "__mp_main__"; they only need app.insights.charts, not a second app
+if __name__ != "__mp_main__":
+    app = create_hospital_app()
 
 
 if __name__ == "__main__":
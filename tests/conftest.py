@@ -18,7 +18,7 @@ def app():
     Create a fresh Flask app instance for tests.
     CSRF is disabled so tests can submit forms if needed.
     """
-    flask_app = create_hospital_app()
+    flask_app = create_hospital_app("testing")
     flask_app.config["TESTING"] = True
     flask_app.config["WTF_CSRF_ENABLED"] = False
     return flask_app
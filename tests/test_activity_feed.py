@@ -0,0 +1,49 @@
+# tests/test_activity_feed.py
+from app.activity_feed import ActivityFeed
+
+
+def test_publish_fans_out_to_every_subscriber():
+    feed = ActivityFeed(buffer_size=10)
+    first, second = feed.subscribe(), feed.subscribe()
+
+    event_id = feed.publish({"action": "CREATE_PATIENT"})
+
+    assert first.get(timeout=0) == [(event_id, {"action": "CREATE_PATIENT"})]
+    assert second.get(timeout=0) == [(event_id, {"action": "CREATE_PATIENT"})]
+    assert first.get(timeout=0) == []
+
+
+def test_slow_subscriber_is_evicted_without_affecting_others():
+    """
+    A subscriber whose buffer fills up is dropped; the others keep
+    receiving entries and publishing never blocks.
+    """
+    feed = ActivityFeed(buffer_size=3)
+    slow, fast = feed.subscribe(), feed.subscribe()
+
+    for i in range(5):
+        feed.publish({"n": i})
+        assert len(fast.get(timeout=0)) == 1
+
+    assert slow.evicted
+    assert slow.get(timeout=0) == []
+    assert feed.stats()["subscribers"] == 1
+    assert feed.stats()["evicted"] == 1
+
+
+def test_reconnect_replays_missed_entries_and_limits_streams():
+    feed = ActivityFeed(buffer_size=10, history=3, max_subscribers=1)
+    ids = [feed.publish({"n": i}) for i in range(5)]
+
+    resumed = feed.subscribe(last_event_id=ids[2])
+    assert [entry["n"] for _, entry in resumed.get(timeout=0)] == [3, 4]
+    assert feed.subscribe() is None
+
+    resumed.close()
+    assert feed.subscribe() is not None
+
+
+def test_activity_stream_requires_login(client):
+    resp = client.get("/insights/activity-stream", follow_redirects=False)
+    assert resp.status_code == 302
+    assert "/auth/login" in resp.headers.get("Location", "")
@@ -0,0 +1,84 @@
+# tests/test_activity_log.py
+from datetime import datetime
+
+from bson.objectid import ObjectId
+from pymongo import ASCENDING, DESCENDING
+
+from app.insights.activity import ACTIVITY_SORT, ActivityFilters, build_activity_query
+from app.patient.queries import decode_cursor, encode_cursor, fetch_page
+
+
+class _CapturingCollection:
+    """
+    Records the filter and sort of each find() and returns no rows.
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def find(self, query, projection=None):
+        call = {"filter": query}
+        self.calls.append(call)
+
+        class _Cursor:
+            def sort(self, spec):
+                call["sort"] = spec
+                return self
+
+            def limit(self, n):
+                return iter([])
+
+        return _Cursor()
+
+
+def test_filters_round_trip_and_build_a_time_window():
+    filters = ActivityFilters.from_args(
+        {"username": " alice ", "action": "delete_patient", "since": "2024-05-01T13:30", "until": "bad"}
+    )
+    assert filters.to_args() == {
+        "username": "alice",
+        "action": "DELETE_PATIENT",
+        "since": "2024-05-01T13:30:00",
+    }
+    assert build_activity_query(filters) == {
+        "username": "alice",
+        "action": "DELETE_PATIENT",
+        "timestamp": {"$gte": datetime(2024, 5, 1, 13, 30)},
+    }
+
+
+def test_paging_links_keep_the_exact_time_window():
+    """
+    Seconds in a from/to time must survive into the paging links.
+    """
+    args = {"since": "2024-05-01T13:30:15", "until": "2024-05-01T13:45:30.500000"}
+    filters = ActivityFilters.from_args(args)
+    assert filters.to_args() == args
+    assert ActivityFilters.from_args(filters.to_args()) == filters
+
+
+def test_timestamp_cursors_page_backwards_in_time():
+    """
+    With the newest-first order, "next" asks for older entries and
+    "previous" for newer ones, read in ascending order.
+    """
+    stamp = datetime(2024, 5, 1, 13, 30, 15, 123000)
+    oid = ObjectId()
+    token = encode_cursor({"timestamp": stamp, "_id": oid}, ACTIVITY_SORT)
+    assert decode_cursor(token) == (stamp, oid)
+
+    coll = _CapturingCollection()
+    fetch_page(coll, {"username": "alice"}, 100, after=token, sort=ACTIVITY_SORT)
+    fetch_page(coll, {}, 100, before=token, sort=ACTIVITY_SORT)
+
+    older, newer = coll.calls
+    assert older["filter"]["$and"][1]["timestamp"] == {"$lte": stamp}
+    assert older["sort"] == [("timestamp", DESCENDING), ("_id", DESCENDING)]
+    assert newer["filter"]["timestamp"] == {"$gte": stamp}
+    assert newer["sort"] == [("timestamp", ASCENDING), ("_id", ASCENDING)]
+
+
+def test_activity_log_requires_login(client):
+    resp = client.get("/insights/activity-log", follow_redirects=False)
+    assert resp.status_code == 302
+    assert "/auth/login" in resp.headers.get("Location", "")
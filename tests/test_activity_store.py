@@ -0,0 +1,94 @@
+# tests/test_activity_store.py
+from datetime import datetime
+
+from app.activity_store import (
+    TTL_INDEX_NAME,
+    ensure_activity_storage,
+    rollup_series,
+    rollup_updates,
+)
+
+
+class _Collection:
+    def __init__(self, db, name):
+        self.database = db
+        self.name = name
+        self.indexes = {}
+
+    def index_information(self):
+        return self.indexes
+
+    def create_indexes(self, models):
+        for model in models:
+            doc = dict(model.document)
+            self.indexes[doc.pop("name")] = doc
+
+    def drop_index(self, name):
+        del self.indexes[name]
+
+
+class _Database:
+    def __init__(self):
+        self.commands = []
+        self.colls = {}
+
+    def command(self, *args, **kwargs):
+        self.commands.append((args, kwargs))
+
+    def __getitem__(self, name):
+        return self.colls.setdefault(name, _Collection(self, name))
+
+
+def test_rollup_updates_combine_entries_per_period():
+    """
+    A batch becomes one $inc upsert per hour and per day it touches.
+    """
+    entries = [
+        {"action": "CREATE_PATIENT", "timestamp": datetime(2024, 5, 1, 13, 5)},
+        {"action": "CREATE_PATIENT", "timestamp": datetime(2024, 5, 1, 13, 55)},
+        {"action": "DELETE_PATIENT", "timestamp": datetime(2024, 5, 1, 14, 1)},
+    ]
+    updates = {op._filter["_id"]: op._doc for op in rollup_updates(entries)}
+
+    assert set(updates) == {"hour:2024-05-01T13", "hour:2024-05-01T14", "day:2024-05-01"}
+    assert updates["hour:2024-05-01T13"]["$inc"] == {"total": 2, "counts.CREATE_PATIENT": 2}
+    assert updates["day:2024-05-01"]["$inc"] == {
+        "total": 3,
+        "counts.CREATE_PATIENT": 2,
+        "counts.DELETE_PATIENT": 1,
+    }
+    assert updates["day:2024-05-01"]["$setOnInsert"] == {
+        "period": "day",
+        "start": datetime(2024, 5, 1),
+    }
+
+
+def test_rollup_series_fills_empty_periods():
+    docs = [{"start": datetime(2024, 5, 2), "total": 4, "counts": {"CREATE_PATIENT": 4}}]
+    rows = rollup_series(docs, "day", datetime(2024, 5, 1, 9), datetime(2024, 5, 3, 8))
+
+    assert [row["start"].day for row in rows] == [1, 2, 3]
+    assert [row["total"] for row in rows] == [0, 4, 0]
+
+
+def test_retention_is_a_ttl_index_on_a_regular_collection():
+    """
+    The activity log stays a regular collection; retention is a TTL index
+    that follows the configured number of days.
+    """
+    db = _Database()
+    ensure_activity_storage(db, 30)
+    index = db["activity_logs"].indexes[TTL_INDEX_NAME]
+    assert index["expireAfterSeconds"] == 30 * 86400
+
+    ensure_activity_storage(db, 7)
+    assert db.commands[-1][1]["index"] == {"name": TTL_INDEX_NAME, "expireAfterSeconds": 7 * 86400}
+
+    ensure_activity_storage(db, 0)
+    assert TTL_INDEX_NAME not in db["activity_logs"].indexes
+
+
+def test_activity_trends_requires_login(client):
+    resp = client.get("/insights/activity-trends", follow_redirects=False)
+    assert resp.status_code == 302
+    assert "/auth/login" in resp.headers.get("Location", "")
@@ -0,0 +1,152 @@
+# tests/test_analytics.py
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.insights.analytics import compute_summary
+from app.insights.profiling import profile_dataset
+from app.insights.schema import read_stroke_csv
+from app.insights.sketches import KLLSketch, normalized_rank_error
+
+
+def test_summary_is_compact_and_json_safe():
+    """
+    The summary should hold binned counts (not raw rows) and no NaN values.
+    """
+    df = pd.DataFrame(
+        {
+            "gender": ["Male", "Female", "Female", "Male"],
+            "age": [10.0, 20.0, 30.0, 40.0],
+            "bmi": [20.0, np.nan, 25.0, 30.0],
+            "stroke": [0, 1, 0, 0],
+        }
+    )
+
+    summary = compute_summary(df)
+
+    assert summary["kpis"] == {
+        "total_records": 4,
+        "avg_age": 25.0,
+        "avg_bmi": 25.0,
+        "stroke_rate": 25.0,
+    }
+    assert summary["value_counts"]["gender"] == {"Male": 2, "Female": 2}
+    assert sum(summary["histograms"]["age"]["counts"]) == 4
+    assert sum(summary["histograms"]["bmi"]["counts"]) == 3
+    assert len(summary["histograms"]["age"]["edges"]) == 21
+    assert summary["correlation"]["columns"] == ["age", "bmi", "stroke"]
+    json.dumps(summary, allow_nan=False)
+
+
+def test_profile_matches_pandas_describe():
+    """
+    The single-pass profile should agree with describe() and the IQR rule.
+    """
+    rng = np.random.default_rng(1)
+    bmi = rng.normal(28, 6, 500)
+    bmi[::17] = np.nan
+    df = pd.DataFrame(
+        {
+            "age": rng.uniform(0, 90, 500),
+            "bmi": bmi,
+            "stroke": rng.integers(0, 2, 500),
+            "gender": rng.choice(["Male", None], 500),
+        }
+    )
+
+    profile = profile_dataset(df)
+
+    expected = df.select_dtypes(include=["float64", "int64"]).describe().T
+    assert np.allclose(
+        profile.stats[expected.columns].to_numpy(), expected.to_numpy()
+    )
+    assert profile.missing.to_dict() == df.isna().sum().to_dict()
+
+    series = df["bmi"].dropna()
+    q1, q3 = series.quantile(0.25), series.quantile(0.75)
+    lower, upper = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+    assert profile.stats.loc["bmi", "outliers"] == ((series < lower) | (series > upper)).sum()
+
+
+def test_profile_of_header_only_dataset_is_empty():
+    """
+    A dataset with columns but no rows should profile without errors.
+    """
+    df = pd.DataFrame({"age": pd.Series([], dtype=float), "gender": pd.Series([], dtype=object)})
+    profile = profile_dataset(df)
+
+    assert profile.stats.loc["age", "count"] == 0
+    assert profile.stats.loc["age", ["mean", "std", "min", "max"]].isna().all()
+    assert profile.missing.tolist() == [0, 0]
+    assert profile.outlier_frame().empty
+    assert len(profile.summary_frame()) == 1
+
+
+def test_profile_std_is_nan_below_two_values():
+    """
+    std needs two values; pandas reports NaN for all-NaN and single-value columns.
+    """
+    df = pd.DataFrame(
+        {
+            "empty": [np.nan, np.nan, np.nan],
+            "single": [np.nan, 4.0, np.nan],
+            "pair": [1.0, np.nan, 3.0],
+        }
+    )
+    profile = profile_dataset(df)
+
+    expected = df.describe().T["std"]
+    assert np.isnan(profile.stats.loc["empty", "std"])
+    assert np.isnan(profile.stats.loc["single", "std"])
+    assert profile.stats.loc["pair", "std"] == pytest.approx(expected["pair"])
+
+
+def test_schema_loads_compact_dtypes_without_changing_results(tmp_path):
+    """
+    Categoricals, int8 flags and float32 measures should give the same
+    counts, summary and displayed statistics as default parsing.
+    """
+    csv = tmp_path / "stroke.csv"
+    csv.write_text(
+        "gender,age,hypertension,bmi,smoking_status,stroke\n"
+        "Male,67,0,36.6,formerly smoked,1\n"
+        "Female,61,1,N/A,never smoked,1\n"
+        "Female,0.08,0,10.3,vapes,0\n"
+        "Male,80,0,32.5,smokes,0\n"
+    )
+
+    df = read_stroke_csv(csv)
+    plain = pd.read_csv(csv)
+
+    assert df["gender"].cat.categories.tolist() == ["Male", "Female"]
+    # Values missing from PatientForm's choices are kept, not nulled
+    assert df["smoking_status"].tolist() == plain["smoking_status"].tolist()
+    assert df["stroke"].dtype == np.int8
+    assert df["bmi"].dtype == np.float32
+    assert df["bmi"].isna().sum() == 1
+
+    assert compute_summary(df)["value_counts"] == compute_summary(plain)["value_counts"]
+    assert compute_summary(df)["kpis"] == compute_summary(plain)["kpis"]
+    stats = profile_dataset(df).stats
+    assert stats.loc["bmi", "max"] == 36.6
+    assert stats["outliers"].tolist() == profile_dataset(plain).stats["outliers"].tolist()
+
+
+def test_merged_kll_sketches_stay_within_rank_error():
+    """
+    Sketches built per chunk and merged should estimate quartiles within
+    the advertised rank error while retaining only a few hundred items.
+    """
+    values = np.random.default_rng(2).lognormal(size=200_000)
+    merged = KLLSketch(k=200, seed=0)
+    for chunk in np.array_split(values, 20):
+        merged.merge(KLLSketch(k=200, seed=1).update(chunk))
+
+    assert merged.n == values.size
+    assert merged.retained < 3 * 200
+    sorted_values = np.sort(values)
+    for q, estimate in zip([0.25, 0.5, 0.75], merged.quantiles([0.25, 0.5, 0.75])):
+        rank = np.searchsorted(sorted_values, estimate) / values.size
+        assert abs(rank - q) <= normalized_rank_error(200)
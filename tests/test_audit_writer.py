@@ -0,0 +1,47 @@
+# tests/test_audit_writer.py
+import threading
+
+from app.audit_writer import AuditWriter
+
+
+def test_entries_are_written_in_batches_and_flushed_on_shutdown():
+    """
+    Queued entries should reach the sink in batches, and shutdown must
+    write whatever is still queued.
+    """
+    batches = []
+    writer = AuditWriter(batches.append, batch_size=3, flush_interval=0.05)
+
+    for i in range(7):
+        assert writer.submit({"n": i})
+    assert writer.flush(timeout=5)
+    writer.submit({"n": 7})
+    assert writer.shutdown(timeout=5)
+
+    assert [entry["n"] for batch in batches for entry in batch] == list(range(8))
+    assert max(len(batch) for batch in batches) <= 3
+    stats = writer.stats()
+    assert stats["queued"] == stats["flushed"] == 8
+    assert stats["pending"] == 0
+
+
+def test_full_queue_applies_policy_when_sink_is_slow():
+    """
+    While the sink is stuck, entries beyond max_queue are dropped instead
+    of growing the queue.
+    """
+    release = threading.Event()
+    written = []
+
+    def slow_sink(entries):
+        release.wait(5)
+        written.extend(entries)
+
+    writer = AuditWriter(slow_sink, max_queue=2, batch_size=1, full_policy="drop")
+    results = [writer.submit({"n": i}) for i in range(5)]
+    assert results.count(False) >= 3
+    assert writer.stats()["dropped"] == results.count(False)
+
+    release.set()
+    assert writer.shutdown(timeout=5)
+    assert writer.stats()["flushed"] == len(written) == results.count(True)
@@ -0,0 +1,111 @@
+# tests/test_chart_cache.py
+import os
+import sys
+import types
+
+from app.insights.chart_cache import ChartCache, publish_file
+from app.insights.render_pool import ChartRenderer
+
+SERVER_PY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "server.py")
+
+
+def _fake_render(calls):
+    def render(path):
+        calls.append(path)
+        with open(path, "wb") as fh:
+            fh.write(b"png")
+    return render
+
+
+def _chart(cache, root, version, render):
+    """
+    Look a chart up and publish it if missing, as the insights views do.
+    """
+    filename = cache.filename("age", version, {"bins": 20})
+    if not cache.lookup(root, filename):
+        publish_file(os.path.join(root, filename), render)
+        cache.record_render(root)
+    return filename
+
+
+def test_chart_is_rendered_once_per_version(tmp_path):
+    """
+    A second request for the same chart and version should reuse the file.
+    """
+    cache = ChartCache()
+    calls = []
+    root = str(tmp_path)
+
+    first = _chart(cache, root, "v1", _fake_render(calls))
+    second = _chart(cache, root, "v1", _fake_render(calls))
+    third = _chart(cache, root, "v2", _fake_render(calls))
+
+    assert first == second
+    assert third != first
+    assert len(calls) == 2
+    assert sorted(os.listdir(root)) == sorted([first, third])
+
+
+def test_least_recently_used_charts_are_evicted(tmp_path):
+    """
+    The folder should never hold more than max_files cached charts.
+    """
+    cache = ChartCache(max_files=2)
+    root = str(tmp_path)
+    oldest = _chart(cache, root, "v1", _fake_render([]))
+    _chart(cache, root, "v2", _fake_render([]))
+    # Make the first file the oldest regardless of filesystem timestamp resolution
+    os.utime(os.path.join(root, oldest), ns=(0, 0))
+
+    newest = _chart(cache, root, "v3", _fake_render([]))
+
+    remaining = os.listdir(root)
+    assert len(remaining) == 2
+    assert oldest not in remaining
+    assert newest in remaining
+    assert cache.stats()["evictions"] == 1
+
+
+def test_identical_render_jobs_are_merged():
+    """
+    Submitting the same job key twice while it is in flight runs it once.
+    """
+    renderer = ChartRenderer(workers=1)
+    try:
+        first = renderer.submit("age-v1", float, "0.25")
+        second = renderer.submit("age-v1", float, "0.25")
+        assert first is second
+        assert first.result(timeout=30) == 0.25
+    finally:
+        renderer.shutdown()
+
+    stats = renderer.stats()
+    assert stats["submitted"] == 1
+    assert stats["deduplicated"] == 1
+
+
+def _main_module_has_app():
+    # Runs in the render worker; "__mp_main__" is the parent's main script
+    main = sys.modules.get("__mp_main__")
+    if hasattr(main, "app"):
+        raise RuntimeError("render worker built the Flask app")
+    return 0.0
+
+
+def test_render_workers_do_not_build_the_app(monkeypatch):
+    """
+    Spawned workers re-run server.py as "__mp_main__" and must skip
+    create_hospital_app (database setup, Mongo ping, index builds).
+    """
+    main = types.ModuleType("__main__")
+    main.__file__ = SERVER_PY
+    monkeypatch.setitem(sys.modules, "__main__", main)
+    # Should the guard ever regress, keep the worker off the real database
+    monkeypatch.setenv("SQLALCHEMY_DATABASE_URI", "sqlite://")
+
+    renderer = ChartRenderer(workers=1)
+    try:
+        future = renderer.submit("probe", _main_module_has_app)
+        assert future.result(timeout=60) == 0.0
+    finally:
+        renderer.shutdown()
@@ -0,0 +1,70 @@
+# tests/test_dataset_cache.py
+import os
+
+import pandas as pd
+
+from app.insights.dataset_cache import DatasetCache
+from app.insights.snapshot import load_snapshot, write_snapshot
+
+
+def _write_csv(path, rows):
+    pd.DataFrame({"age": list(range(rows))}).to_csv(path, index=False)
+
+
+def test_dataset_is_parsed_once_per_version(tmp_path):
+    """
+    Repeated lookups of an unchanged file should hit the cache.
+    """
+    csv_path = str(tmp_path / "data.csv")
+    _write_csv(csv_path, 3)
+    cache = DatasetCache()
+
+    first = cache.get_with_version(csv_path, pd.read_csv)[1]
+    second = cache.get_with_version(csv_path, pd.read_csv)[1]
+
+    assert first is second
+    stats = cache.stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+
+
+def test_replaced_file_is_reloaded(tmp_path):
+    """
+    Writing a new file at the same path must produce a fresh DataFrame.
+    """
+    csv_path = str(tmp_path / "data.csv")
+    _write_csv(csv_path, 3)
+    cache = DatasetCache()
+    assert len(cache.get_with_version(csv_path, pd.read_csv)[1]) == 3
+
+    _write_csv(csv_path, 5)
+    st = os.stat(csv_path)
+    os.utime(csv_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+    assert len(cache.get_with_version(csv_path, pd.read_csv)[1]) == 5
+    assert cache.stats()["misses"] == 2
+
+
+def test_snapshot_round_trip_matches_csv(tmp_path):
+    """
+    A memory-mapped snapshot should reproduce the parsed CSV values.
+    """
+    csv_path = str(tmp_path / "data.csv")
+    pd.DataFrame(
+        {
+            "gender": ["Male", "Female", None],
+            "bmi": [21.5, None, 30.1],
+            "stroke": [0, 1, 0],
+        }
+    ).to_csv(csv_path, index=False)
+    df = pd.read_csv(csv_path)
+
+    assert load_snapshot(csv_path) is None
+    write_snapshot(df, csv_path)
+    snap = load_snapshot(csv_path)
+
+    assert list(snap.columns) == list(df.columns)
+    assert snap["gender"].tolist()[:2] == ["Male", "Female"]
+    assert pd.isna(snap["gender"].iloc[2])
+    assert snap["bmi"].isna().sum() == 1
+    assert snap["stroke"].sum() == 1
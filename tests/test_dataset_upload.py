@@ -0,0 +1,112 @@
+# tests/test_dataset_upload.py
+import io
+import os
+
+import pytest
+
+from app.insights.dataset_cache import dataset_version
+from app.insights.jobs import JobQueue
+from app.insights.upload import (
+    DatasetValidationError,
+    publish_dataset,
+    stage_dataset,
+)
+
+HEADER = "id,gender,age,hypertension,heart_disease,bmi,stroke\n"
+GOOD_ROWS = "1,Male,67,0,1,36.6,1\n2,Female,61,0,0,N/A,1\n3,Male,80,0,1,32.5,0\n"
+
+
+def _live_dataset(tmp_path):
+    path = tmp_path / "stroke_data.csv"
+    path.write_text(HEADER + "9,Female,50,0,0,20.0,0\n")
+    return str(path)
+
+
+def test_valid_upload_replaces_dataset(tmp_path):
+    """
+    A valid CSV should be installed and previewed from its first chunk.
+    """
+    dataset_path = _live_dataset(tmp_path)
+    data = (HEADER + GOOD_ROWS).encode()
+
+    staged_path, preview, rows = stage_dataset(
+        io.BytesIO(data), dataset_path, max_bytes=1024, chunk_rows=2
+    )
+    publish_dataset(staged_path, dataset_path)
+
+    assert rows == 3
+    assert preview["id"].tolist() == [1, 2]
+    assert open(dataset_path, "rb").read() == data
+    assert os.listdir(tmp_path) == ["stroke_data.csv"]
+
+
+@pytest.mark.parametrize(
+    "body, max_bytes",
+    [
+        ("id,gender,age\n1,Male,60\n", 1024),
+        (HEADER + "1,Male,sixty,0,1,30.0,0\n", 1024),
+        (HEADER + "1,Male,60,0,1,30.0,2\n", 1024),
+        (HEADER + GOOD_ROWS, 16),
+    ],
+)
+def test_rejected_upload_leaves_dataset_untouched(tmp_path, body, max_bytes):
+    """
+    Schema errors and oversized files must not touch the live dataset.
+    """
+    dataset_path = _live_dataset(tmp_path)
+    before = open(dataset_path, "rb").read()
+
+    with pytest.raises(DatasetValidationError):
+        stage_dataset(io.BytesIO(body.encode()), dataset_path, max_bytes=max_bytes)
+
+    assert open(dataset_path, "rb").read() == before
+    assert os.listdir(tmp_path) == ["stroke_data.csv"]
+
+
+def test_staged_upload_keeps_its_version_when_published(tmp_path):
+    """
+    Artefacts built for a staged file must still match after the swap.
+    """
+    dataset_path = _live_dataset(tmp_path)
+    before = open(dataset_path, "rb").read()
+
+    staged_path, _, rows = stage_dataset(
+        io.BytesIO((HEADER + GOOD_ROWS).encode()), dataset_path, max_bytes=1024
+    )
+    staged_version = dataset_version(staged_path)
+
+    assert rows == 3
+    assert open(dataset_path, "rb").read() == before
+
+    publish_dataset(staged_path, dataset_path)
+    assert dataset_version(dataset_path) == staged_version
+    assert os.listdir(tmp_path) == ["stroke_data.csv"]
+
+
+def test_job_queue_tracks_progress_and_failures(caplog):
+    """
+    Jobs report their steps, result and error through ``to_dict``.
+    """
+    queue = JobQueue(workers=1)
+
+    def work(job, value):
+        job.advance("first")
+        job.advance("second")
+        if value < 0:
+            raise ValueError("negative")
+        return {"value": value}
+
+    ok = queue.submit("test", ["first", "second"], work, 5)
+    bad = queue.submit("test", ["first", "second"], work, -1)
+    assert ok.wait(5) and bad.wait(5)
+
+    assert ok.to_dict()["status"] == "succeeded"
+    assert ok.to_dict()["progress"] == 100
+    assert ok.result == {"value": 5}
+    assert bad.to_dict()["status"] == "failed"
+    assert bad.to_dict()["progress"] == 50
+    assert bad.error == "negative"
+    assert "Background job test" in caplog.text
+    assert "ValueError: negative" in caplog.text
+    assert queue.get(ok.id) is ok
+    assert queue.stats()["failed"] == 1
@@ -0,0 +1,58 @@
+# tests/test_db_mongo.py
+from types import SimpleNamespace
+
+from app.db_mongo import MongoClientManager, PoolStats, client_options
+
+
+def test_client_is_shared_until_settings_change_or_fork():
+    """
+    The same client should be reused across lookups and only rebuilt for
+    new settings or in a forked child. No server is contacted.
+    """
+    manager = MongoClientManager()
+    uri = "mongodb://localhost:27017"
+    options = {"serverSelectionTimeoutMS": 100, "maxPoolSize": 5}
+    resized_options = {**options, "maxPoolSize": 10}
+    try:
+        first = manager.get_client(uri, options)
+        assert manager.get_client(uri, dict(options)) is first
+
+        resized = manager.get_client(uri, resized_options)
+        assert resized is not first
+
+        # Pretend the client was created by a parent process
+        manager._client_pid = -1
+        assert manager.get_client(uri, resized_options) is not resized
+        assert manager.clients_created == 3
+    finally:
+        manager.close()
+
+
+def test_client_options_from_config():
+    """
+    Unset settings are omitted and a numeric write concern becomes an int.
+    """
+    options = client_options(
+        {"MONGO_MAX_POOL_SIZE": 20, "MONGO_WRITE_CONCERN_W": "1", "MONGO_READ_PREFERENCE": None}
+    )
+    assert options["maxPoolSize"] == 20
+    assert options["w"] == 1
+    assert "readPreference" not in options
+
+
+def test_pool_stats_track_checkouts_and_waits():
+    """
+    Pool events should update checkout counts and wait times.
+    """
+    stats = PoolStats()
+    stats.connection_created(None)
+    stats.connection_checked_out(SimpleNamespace(duration=0.004))
+    stats.connection_checked_out(SimpleNamespace(duration=0.002))
+    stats.connection_checked_in(None)
+
+    snapshot = stats.stats()
+    assert snapshot["checkouts"] == 2
+    assert snapshot["checked_out"] == 1
+    assert snapshot["max_checked_out"] == 2
+    assert snapshot["max_wait_ms"] == 4.0
+    assert snapshot["avg_wait_ms"] == 3.0
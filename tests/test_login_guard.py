@@ -0,0 +1,111 @@
+# tests/test_login_guard.py
+import threading
+
+import pytest
+
+from app import security_utils
+from app.login_guard import LoginRateLimiter, PasswordPool, PasswordPoolBusy, password_pool
+from app.models import AppUser
+from app.security_utils import hash_password, needs_rehash, normalize_hash_method
+
+
+def test_hash_methods_are_normalized():
+    assert normalize_hash_method("scrypt") == "scrypt:32768:8:1"
+    assert normalize_hash_method("scrypt:16384") == "scrypt:16384:8:1"
+    assert normalize_hash_method("pbkdf2:sha256:600000") == "pbkdf2:sha256:600000"
+    with pytest.raises(ValueError):
+        normalize_hash_method("md5")
+
+
+def test_hashes_from_another_method_need_rehash(monkeypatch):
+    """
+    A stored hash is flagged once the configured method or cost changes.
+    """
+    monkeypatch.setattr(security_utils, "_hash_method", "pbkdf2:sha256:1000")
+    old = hash_password("secret")
+    assert not needs_rehash(old)
+
+    security_utils.set_hash_method("pbkdf2:sha256:2000")
+    assert needs_rehash(old)
+    assert security_utils.verify_password("secret", old)
+
+
+def test_limiter_allows_a_burst_then_refills():
+    """
+    Attempts beyond the burst are refused until tokens refill.
+    """
+    limiter = LoginRateLimiter(user_burst=2, user_per_minute=60, ip_burst=100, ip_per_minute=600)
+
+    assert limiter.check("alice", "10.0.0.1", now=0) == 0
+    assert limiter.check("Alice", "10.0.0.2", now=0) == 0
+    assert limiter.check("alice", "10.0.0.3", now=0) == pytest.approx(1.0)
+    # Another user is unaffected
+    assert limiter.check("bob", "10.0.0.1", now=0) == 0
+    # One token a second
+    assert limiter.check("alice", "10.0.0.1", now=1.0) == 0
+    assert limiter.stats()["limited"] == 1
+
+
+def test_limiter_limits_one_ip_across_usernames():
+    """
+    Spraying many usernames from one address hits the IP bucket; the
+    refused attempt takes no token from the username bucket.
+    """
+    limiter = LoginRateLimiter(user_burst=1, user_per_minute=1, ip_burst=3, ip_per_minute=60)
+    for name in ("a", "b", "c"):
+        assert limiter.check(name, "10.0.0.9", now=0) == 0
+
+    assert limiter.check("d", "10.0.0.9", now=0) > 0
+    assert limiter.check("d", "10.0.0.10", now=0) == 0
+
+
+def test_pool_runs_checks_on_worker_threads():
+    pool = PasswordPool(workers=2, max_pending=4, timeout=5)
+    names = [pool.run(lambda: threading.current_thread().name) for _ in range(3)]
+
+    assert all(name.startswith("password") for name in names)
+    stats = pool.stats()
+    assert stats["completed"] == 3
+    assert stats["pending"] == 0
+
+
+def test_pool_rejects_work_beyond_max_pending():
+    """
+    With the pool full, a new check fails at once instead of queueing.
+    """
+    pool = PasswordPool(workers=1, max_pending=1, timeout=5)
+    release = threading.Event()
+    started = threading.Thread(target=pool.run, args=(release.wait,))
+    started.start()
+    try:
+        while pool.stats()["pending"] == 0:
+            pass
+        with pytest.raises(PasswordPoolBusy):
+            pool.run(lambda: True)
+    finally:
+        release.set()
+        started.join()
+    assert pool.stats()["rejected"] == 1
+
+
+def test_pool_without_workers_runs_inline():
+    pool = PasswordPool(workers=0)
+    assert pool.run(lambda: threading.current_thread().name) == threading.current_thread().name
+
+
+def test_register_answers_503_when_the_pool_is_full(client, monkeypatch):
+    """
+    Registration hashes on the password pool too, and creates nothing
+    when the pool turns the work away.
+    """
+    def busy(*args):
+        raise PasswordPoolBusy("full")
+
+    monkeypatch.setattr(password_pool, "run", busy)
+    resp = client.post(
+        "/auth/register",
+        data={"username": "pool-busy-user", "password": "secret123", "confirm_password": "secret123"},
+    )
+
+    assert resp.status_code == 503
+    assert AppUser.query.filter_by(username="pool-busy-user").first() is None
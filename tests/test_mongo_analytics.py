@@ -0,0 +1,118 @@
+# tests/test_mongo_analytics.py
+import numpy as np
+import pandas as pd
+
+from app.insights.analytics import compute_summary
+from app.insights.mongo_analytics import (
+    NUMERIC_FIELDS,
+    OUT_OF_RANGE_BUCKET,
+    bucket_boundaries,
+    histogram_edges,
+    histogram_pipeline,
+    summary_from_stats,
+)
+
+
+def _group_results(df: pd.DataFrame):
+    """
+    What the stats and bucket pipelines return for ``df``, worked out in
+    pandas with the same pairwise-complete and half-open-bucket rules.
+    """
+    stats = {"total": len(df)}
+    for name in NUMERIC_FIELDS:
+        col = df[name].dropna()
+        stats[f"n_{name}"] = len(col)
+        stats[f"sum_{name}"] = col.sum()
+        stats[f"min_{name}"] = col.min() if len(col) else None
+        stats[f"max_{name}"] = col.max() if len(col) else None
+    for i, a in enumerate(NUMERIC_FIELDS):
+        for b in NUMERIC_FIELDS[i:]:
+            pair = df[[a, b]].dropna().to_numpy().T
+            x, y = pair[0], pair[-1]
+            key = f"{a}__{b}"
+            stats.update(
+                {
+                    f"pn_{key}": len(x),
+                    f"pa_{key}": x.sum(),
+                    f"pb_{key}": y.sum(),
+                    f"paa_{key}": (x * x).sum(),
+                    f"pbb_{key}": (y * y).sum(),
+                    f"pab_{key}": (x * y).sum(),
+                }
+            )
+    buckets = {}
+    for column in ("age", "bmi"):
+        edges = histogram_edges(stats[f"min_{column}"], stats[f"max_{column}"])
+        bounds = bucket_boundaries(edges)
+        values = df[column].dropna().to_numpy()
+        idx = np.searchsorted(bounds, values, side="right") - 1
+        buckets[column] = [
+            {"_id": bounds[i], "count": int((idx == i).sum())} for i in np.unique(idx)
+        ]
+    counts = {
+        "gender": [{"_id": k, "count": v} for k, v in df["gender"].value_counts().items()]
+    }
+    return stats, counts, buckets
+
+
+def test_aggregated_summary_matches_dataframe_summary():
+    """
+    KPIs, histograms and correlations assembled from the aggregation
+    results should equal compute_summary on the same records.
+    """
+    rng = np.random.default_rng(3)
+    n = 400
+    bmi = rng.normal(28, 6, n)
+    bmi[::13] = np.nan
+    df = pd.DataFrame(
+        {
+            "gender": rng.choice(["Male", "Female"], n),
+            "age": rng.integers(0, 83, n).astype(float),
+            "hypertension": rng.integers(0, 2, n),
+            "heart_disease": rng.integers(0, 2, n),
+            "avg_glucose_level": rng.gamma(7.0, 15.0, n),
+            "bmi": bmi,
+            "stroke": rng.integers(0, 2, n),
+        }
+    )
+
+    expected = compute_summary(df)
+    summary = summary_from_stats(*_group_results(df))
+
+    assert summary["kpis"] == expected["kpis"]
+    assert summary["value_counts"]["gender"] == expected["value_counts"]["gender"]
+    assert summary["histograms"] == expected["histograms"]
+    assert summary["correlation"]["columns"] == expected["correlation"]["columns"]
+    assert np.allclose(
+        np.array(summary["correlation"]["matrix"], dtype=float),
+        np.array(expected["correlation"]["matrix"], dtype=float),
+        atol=2e-4,
+    )
+
+
+def test_empty_collection_gives_empty_summary():
+    """
+    $group returns no document for an empty collection.
+    """
+    summary = summary_from_stats({}, {}, {})
+    assert summary["kpis"]["total_records"] == 0
+    assert summary["kpis"]["avg_age"] is None
+    assert summary["histograms"]["age"] == {"edges": [], "counts": []}
+    assert summary["correlation"] == {"columns": [], "matrix": []}
+
+
+def test_values_outside_the_first_pass_range_are_dropped():
+    """
+    A record written between the min/max pass and the bucket pass lands
+    in the default bucket instead of failing the aggregation.
+    """
+    bucket = histogram_pipeline({"age": (10.0, 20.0)})[0]["$facet"]["age"][1]["$bucket"]
+    assert bucket["default"] == OUT_OF_RANGE_BUCKET
+
+    df = pd.DataFrame({name: [10.0, 20.0] for name in NUMERIC_FIELDS})
+    df["gender"] = ["Male", "Female"]
+    stats, counts, buckets = _group_results(df)
+    buckets["age"].append({"_id": OUT_OF_RANGE_BUCKET, "count": 3})
+
+    summary = summary_from_stats(stats, counts, buckets)
+    assert sum(summary["histograms"]["age"]["counts"]) == 2
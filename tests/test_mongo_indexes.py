@@ -0,0 +1,72 @@
+# tests/test_mongo_indexes.py
+from app.mongo_indexes import INDEX_SPECS, QUERY_SHAPES, plan_problems
+
+
+def _explain(winning_plan):
+    return {"queryPlanner": {"winningPlan": winning_plan}}
+
+
+def test_plan_problems_flag_collection_scans_and_memory_sorts():
+    """
+    Classic and slot-based explain() trees should both be inspected.
+    """
+    indexed = _explain(
+        {"stage": "LIMIT", "inputStage": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}}
+    )
+    in_memory_sort = _explain(
+        {"queryPlan": {"stage": "SORT", "inputStage": {"stage": "COLLSCAN"}}}
+    )
+
+    assert plan_problems(indexed) == []
+    assert plan_problems(in_memory_sort) == ["in-memory sort", "collection scan"]
+
+
+def test_plan_problems_read_aggregation_and_sharded_output():
+    """
+    Aggregation-shaped explain() output must not pass as indexed just
+    because it has no top-level winningPlan.
+    """
+    cursor_stage = {"$cursor": _explain({"stage": "IXSCAN"})}
+    indexed = {"stages": [cursor_stage, {"$limit": 51}]}
+    unpacked_sort = {
+        "stages": [
+            {"$cursor": _explain({"stage": "COLLSCAN"})},
+            {"$_internalUnpackBucket": {}},
+            {"$sort": {"sortKey": {"timestamp": -1, "_id": -1}}},
+        ]
+    }
+    sharded = {"shards": {"shard0": indexed, "shard1": unpacked_sort}}
+
+    assert plan_problems(indexed) == []
+    assert plan_problems(unpacked_sort) == ["collection scan", "in-memory sort"]
+    assert plan_problems(sharded) == ["collection scan", "in-memory sort"]
+    assert plan_problems({}) == ["unrecognised explain output"]
+
+
+def test_every_query_shape_has_a_matching_index():
+    """
+    Each declared query should have an index whose leading keys are some
+    of its equality (or $in) fields followed by its sort keys, so the
+    index returns rows in sort order (read forwards or backwards).
+    """
+    for shape in QUERY_SHAPES:
+        equality = {
+            name
+            for name, value in shape.filter.items()
+            if not name.startswith("$") and (not isinstance(value, dict) or "$in" in value)
+        }
+        sort = list(shape.sort)
+        backwards = [(name, -direction) for name, direction in sort]
+
+        def serves(key):
+            return any(
+                all(name in equality for name, _ in key[:n])
+                and key[n : n + len(sort)] in (sort, backwards)
+                for n in range(len(equality) + 1)
+            )
+
+        keys = [
+            list(model.document["key"].items())
+            for model in INDEX_SPECS[shape.collection]
+        ]
+        assert any(serves(k) for k in keys), shape.name
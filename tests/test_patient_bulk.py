@@ -0,0 +1,106 @@
+# tests/test_patient_bulk.py
+from types import SimpleNamespace
+
+import pytest
+from bson.objectid import ObjectId
+from pymongo import DeleteOne
+
+from app.patient.bulk import BulkRequestError, parse_operations, run_bulk
+
+
+class _Patients:
+    """
+    Stands in for the patients collection and counts round trips.
+    """
+
+    def __init__(self, docs):
+        self.docs = {doc["_id"]: doc for doc in docs}
+        self.calls = []
+
+    def find(self, query):
+        self.calls.append("find")
+        return [self.docs[oid] for oid in query["_id"]["$in"] if oid in self.docs]
+
+    def bulk_write(self, requests, ordered=True):
+        self.calls.append("bulk_write")
+        assert ordered is False
+        deleted = modified = 0
+        for req in requests:
+            oid = req._filter["_id"]
+            if isinstance(req, DeleteOne):
+                del self.docs[oid]
+                deleted += 1
+            else:
+                self.docs[oid] = {**self.docs[oid], **req._doc["$set"]}
+                modified += 1
+        return SimpleNamespace(matched_count=modified, modified_count=modified, deleted_count=deleted)
+
+
+def test_bulk_updates_and_deletes_in_one_write():
+    """
+    Updates and deletes run as one find plus one bulk_write, and the
+    pre-images come back for the aggregates and audit entry.
+    """
+    docs = [{"_id": ObjectId(), "patient_id": f"P-{i}", "stroke": 0} for i in range(4)]
+    gone = ObjectId()
+    coll = _Patients(docs)
+    operations = parse_operations(
+        {
+            "operations": [
+                {"id": str(docs[0]["_id"]), "set": {"stroke": "1", "smoking_status": "smokes"}},
+                {"id": str(docs[1]["_id"]), "delete": True},
+                {"id": str(gone), "delete": True},
+            ]
+        },
+        max_operations=10,
+    )
+    result = run_bulk(coll, operations)
+
+    assert coll.calls == ["find", "bulk_write"]
+    assert (result.modified, result.deleted, result.missing) == (1, 1, [str(gone)])
+    assert coll.docs[docs[0]["_id"]]["stroke"] == 1
+    assert docs[1]["_id"] not in coll.docs
+    assert result.changes[0] == (docs[0], {**docs[0], "stroke": 1, "smoking_status": "smokes"})
+    assert result.changes[1] == (docs[1], None)
+
+
+@pytest.mark.parametrize(
+    "operation",
+    [
+        {"id": "not-an-id", "delete": True},
+        {"id": str(ObjectId()), "set": {"patient_id": "P-1"}},
+        {"id": str(ObjectId()), "set": {"gender": "Robot"}},
+        {"id": str(ObjectId()), "set": {"age": 400}},
+        {"id": str(ObjectId()), "set": {"age": float("nan")}},
+        {"id": str(ObjectId()), "set": {"avg_glucose_level": float("inf")}},
+        {"id": str(ObjectId()), "set": {"stroke": True}},
+        {"id": str(ObjectId())},
+    ],
+)
+def test_invalid_operations_are_rejected(operation):
+    with pytest.raises(BulkRequestError):
+        parse_operations({"operations": [operation]}, max_operations=10)
+
+
+def test_bulk_endpoint_requires_login(client):
+    resp = client.post("/patients/bulk", json={"operations": []}, follow_redirects=False)
+    assert resp.status_code == 302
+    assert "/auth/login" in resp.headers.get("Location", "")
+
+
+def test_bulk_endpoint_rejects_nan(client):
+    """
+    A JSON body may spell NaN, which must not reach the records.
+    """
+    form = {"username": "bulk-nan-user", "password": "secret123"}
+    client.post("/auth/register", data={**form, "confirm_password": "secret123"})
+    client.post("/auth/login", data=form)
+
+    resp = client.post(
+        "/patients/bulk",
+        data='{"operations": [{"id": "%s", "set": {"bmi": NaN}}]}' % ObjectId(),
+        content_type="application/json",
+    )
+
+    assert resp.status_code == 400
+    assert "bmi must be a number" in resp.get_json()["error"]
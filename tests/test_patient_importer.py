@@ -0,0 +1,130 @@
+# tests/test_patient_importer.py
+import io
+import threading
+from types import SimpleNamespace
+
+from pymongo.errors import BulkWriteError
+
+from app.patient.importer import import_patients
+
+HEADER = (
+    "id,gender,age,hypertension,heart_disease,ever_married,work_type,"
+    "Residence_type,avg_glucose_level,bmi,smoking_status,stroke\n"
+)
+
+
+class _RecordingPatients:
+    """
+    Stands in for the patients collection: applies ReplaceOne upserts to a dict.
+    """
+
+    def __init__(self):
+        self.docs = {}
+        self.lock = threading.Lock()
+
+    def bulk_write(self, ops, ordered=True):
+        assert ordered is False
+        inserted = matched = 0
+        with self.lock:
+            for op in ops:
+                key = op._filter["patient_id"]
+                if key in self.docs:
+                    matched += 1
+                else:
+                    inserted += 1
+                self.docs[key] = op._doc
+        return SimpleNamespace(upserted_count=inserted, matched_count=matched)
+
+
+def test_import_maps_columns_and_reports_bad_rows():
+    """
+    Rows are mapped to the add_patient document shape; invalid rows are
+    skipped and reported with their row number.
+    """
+    csv = io.StringIO(
+        HEADER
+        + "9046,Male,67,0,1,Yes,Private,Urban,228.69,36.6,formerly smoked,1\n"
+        + "51676,Female,0.08,0,0,No,children,Rural,202.21,N/A,never smoked,0\n"
+        + "3,Robot,40,0,0,Yes,Private,Urban,90,25,smokes,0\n"
+        + ",Male,40,0,0,Yes,Private,Urban,90,25,smokes,0\n"
+        + "5,Male,40,2,0,Yes,Private,Urban,90,25,smokes,0\n"
+    )
+    coll = _RecordingPatients()
+    report = import_patients(coll, csv, batch_size=2, workers=3, chunk_rows=2)
+
+    assert (report.rows, report.inserted, report.failed) == (5, 2, 3)
+    assert [row for row, _ in report.errors] == [3, 4, 5]
+    assert "gender" in report.errors[0][1]
+    assert coll.docs["9046"]["residence_type"] == "Urban"
+    assert type(coll.docs["9046"]["age"]) is int
+    assert type(coll.docs["9046"]["stroke"]) is int
+    assert coll.docs["51676"]["age"] == 0.08
+    assert coll.docs["51676"]["bmi"] is None
+
+
+def test_reimport_is_idempotent_and_last_duplicate_wins():
+    """
+    Importing a file twice replaces the records; a patient_id repeated
+    in the file keeps its last row.
+    """
+    rows = "".join(
+        f"P-{i},Female,{30 + i % 50},0,0,Yes,Private,Rural,100,22,Unknown,0\n" for i in range(500)
+    )
+    data = HEADER + rows + "P-7,Female,99,0,0,Yes,Private,Rural,100,22,Unknown,1\n"
+    coll = _RecordingPatients()
+
+    first = import_patients(coll, io.StringIO(data), batch_size=64, workers=4, chunk_rows=100)
+    second = import_patients(coll, io.StringIO(data), batch_size=64, workers=4, chunk_rows=100)
+
+    assert len(coll.docs) == 500
+    assert coll.docs["P-7"]["age"] == 99
+    assert first.inserted + first.replaced + first.duplicates == 501
+    assert (second.inserted, second.failed) == (0, 0)
+
+
+class _RacingPatients(_RecordingPatients):
+    """
+    Another writer inserts each new patient_id just before this upsert
+    does, the first time it is written.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.raced = set()
+
+    def bulk_write(self, ops, ordered=True):
+        lost = [i for i, op in enumerate(ops) if op._filter["patient_id"] not in self.raced]
+        if not lost:
+            return super().bulk_write(ops, ordered)
+        won = [op for i, op in enumerate(ops) if i not in lost]
+        result = super().bulk_write(won, ordered) if won else None
+        for i in lost:
+            key = ops[i]._filter["patient_id"]
+            self.raced.add(key)
+            self.docs[key] = {"patient_id": key, "by": "other writer"}
+        raise BulkWriteError(
+            {
+                "nUpserted": result.upserted_count if result else 0,
+                "nMatched": result.matched_count if result else 0,
+                "writeErrors": [
+                    {"index": i, "code": 11000, "errmsg": "E11000 duplicate key error"}
+                    for i in lost
+                ],
+            }
+        )
+
+
+def test_upsert_that_loses_a_duplicate_key_race_is_retried():
+    """
+    A duplicate key error from a concurrent insert is retried once and
+    replaces the other writer's record instead of failing the row.
+    """
+    data = HEADER + "".join(
+        f"P-{i},Male,40,0,0,Yes,Private,Urban,90,25,smokes,0\n" for i in range(3)
+    )
+    coll = _RacingPatients()
+    report = import_patients(coll, io.StringIO(data), batch_size=10, workers=1)
+
+    assert report.failed == 0
+    assert report.replaced == 3
+    assert all(doc["gender"] == "Male" for doc in coll.docs.values())
@@ -0,0 +1,166 @@
+# tests/test_patient_queries.py
+import pytest
+from bson.objectid import ObjectId
+
+from app.mongo_indexes import INDEX_SPECS
+from app.patient.queries import (
+    FILTER_INDEX_FIELDS,
+    LIST_SORT,
+    PREFIX_SORT,
+    InvalidCursor,
+    PatientFilters,
+    build_query,
+    decode_cursor,
+    encode_cursor,
+    fetch_page,
+    keyset_filter,
+)
+
+_COMPARE = {
+    "$gt": lambda a, b: a > b,
+    "$gte": lambda a, b: a >= b,
+    "$lt": lambda a, b: a < b,
+    "$lte": lambda a, b: a <= b,
+    "$ne": lambda a, b: a != b,
+}
+
+
+def _matches(doc, query):
+    """
+    The subset of MongoDB matching used by the keyset filters; like
+    MongoDB, range operators never match a missing value.
+    """
+    for key, cond in query.items():
+        if key == "$and":
+            if not all(_matches(doc, q) for q in cond):
+                return False
+        elif key == "$or":
+            if not any(_matches(doc, q) for q in cond):
+                return False
+        elif isinstance(cond, dict):
+            value = doc.get(key)
+            for op, bound in cond.items():
+                if op != "$ne" and value is None:
+                    return False
+                if not _COMPARE[op](value, bound):
+                    return False
+        elif doc.get(key) != cond:
+            return False
+    return True
+
+
+class _Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, keys):
+        for field, direction in reversed(keys):
+            # Missing values sort before numbers
+            self.docs.sort(
+                key=lambda d: (d.get(field) is not None, d.get(field) or 0),
+                reverse=direction < 0,
+            )
+        return self
+
+    def limit(self, n):
+        return self.docs[:n]
+
+
+class _Patients:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, query, projection=None):
+        return _Cursor([d for d in self.docs if _matches(d, query)])
+
+
+def test_cursor_round_trip():
+    """
+    A page cursor should decode to the (age, _id) it was made from.
+    """
+    oid = ObjectId()
+    assert decode_cursor(encode_cursor({"_id": oid, "age": 67})) == (67, oid)
+    assert decode_cursor(encode_cursor({"_id": oid})) == (None, oid)
+
+
+@pytest.mark.parametrize("token", ["", "not-a-cursor", encode_cursor({"_id": "x", "age": 1})])
+def test_tampered_cursor_is_rejected(token):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(token)
+
+
+def test_keyset_filter_bounds_age_for_the_index():
+    """
+    The filter after (60, id) should be an age range plus a tie-breaker.
+    """
+    oid = ObjectId()
+    assert keyset_filter(60, oid) == {
+        "age": {"$gte": 60},
+        "$or": [{"age": {"$gt": 60}}, {"_id": {"$gt": oid}}],
+    }
+    before = keyset_filter(60, oid, after=False)
+    assert before["$or"][0]["age"] == {"$lte": 60}
+    assert before["$or"][1] == {"age": None}
+    # Timestamps are never missing, so no null branch widens the range
+    assert keyset_filter(60, oid, after=False, field="timestamp") == {
+        "timestamp": {"$lte": 60},
+        "$or": [{"timestamp": {"$lt": 60}}, {"_id": {"$lt": oid}}],
+    }
+
+
+def test_previous_pages_reach_records_without_an_age():
+    """
+    Paging back from records with an age must return to those without
+    one, which sort first.
+    """
+    docs = [{"_id": ObjectId(), "age": None} for _ in range(3)]
+    docs += [{"_id": ObjectId(), "age": age} for age in (20, 40, 60)]
+    coll = _Patients(docs)
+
+    pages = [fetch_page(coll, {}, 2)]
+    while pages[-1].next_cursor:
+        pages.append(fetch_page(coll, {}, 2, after=pages[-1].next_cursor))
+    assert [d["age"] for d in pages[-1].items] == [40, 60]
+
+    back = [pages[-1]]
+    while back[-1].prev_cursor:
+        back.append(fetch_page(coll, {}, 2, before=back[-1].prev_cursor))
+    seen = [d["_id"] for page in reversed(back) for d in page.items]
+    assert seen == [d["_id"] for d in pages[0].items + pages[1].items + pages[2].items]
+    assert len(seen) == 6
+
+
+def test_only_set_category_filters_are_constrained():
+    """
+    Unset category fields are left out of the query, so records with a
+    missing or unexpected value there are still listed.
+    """
+    filters = PatientFilters.from_args(
+        {"smoking_status": "smokes", "age_min": "50", "stroke": "7", "q": " "}
+    )
+    query, sort = build_query(filters)
+
+    assert filters.stroke is None  # not a valid flag value
+    assert query == {"smoking_status": "smokes", "age": {"$gte": 50.0}}
+    assert sort == LIST_SORT
+
+    unusual = {"_id": ObjectId(), "smoking_status": "smokes", "age": 70, "gender": "Unknown"}
+    assert _matches(unusual, query)
+
+
+def test_each_category_filter_leads_an_index():
+    """
+    Any set category field gives an index range in (age, _id) order.
+    """
+    keys = {tuple(model.document["key"]) for model in INDEX_SPECS["patients"]}
+    for name in FILTER_INDEX_FIELDS:
+        assert (name, "age", "_id") in keys
+
+
+def test_id_prefix_is_an_anchored_literal():
+    """
+    Regex characters in the prefix must be matched literally.
+    """
+    query, sort = build_query(PatientFilters(id_prefix="P.1", stroke=1))
+    assert query == {"patient_id": {"$regex": r"^P\.1"}, "stroke": 1}
+    assert sort == PREFIX_SORT
@@ -0,0 +1,116 @@
+# tests/test_patient_stats.py
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.insights import patient_stats
+from app.insights.analytics import compute_summary
+from app.insights.patient_stats import change_deltas, load_running_summary, summary_from_running
+
+
+def _apply_inc(doc: dict, inc: dict) -> None:
+    """
+    Apply a $inc update with dotted paths, as MongoDB would.
+    """
+    for path, delta in inc.items():
+        *parents, leaf = path.split(".")
+        node = doc
+        for key in parents:
+            node = node.setdefault(key, {})
+        node[leaf] = node.get(leaf, 0) + delta
+
+
+def _patient(rng, i):
+    return {
+        "patient_id": f"P-{i}",
+        "gender": str(rng.choice(["Male", "Female"])),
+        "age": int(rng.integers(1, 90)),
+        "hypertension": int(rng.integers(0, 2)),
+        "heart_disease": int(rng.integers(0, 2)),
+        "residence_type": str(rng.choice(["Urban", "Rural"])),
+        "avg_glucose_level": float(rng.gamma(7.0, 15.0)),
+        "bmi": None if i % 7 == 0 else float(rng.normal(28, 6)),
+        "smoking_status": "never smoked",
+        "stroke": int(rng.integers(0, 2)),
+    }
+
+
+def test_running_aggregates_follow_inserts_updates_and_deletes():
+    """
+    $inc deltas for a series of changes should leave the same KPIs,
+    counts and correlations as summarising the final records.
+    """
+    rng = np.random.default_rng(5)
+    records = {i: _patient(rng, i) for i in range(60)}
+    running = {}
+    for doc in records.values():
+        _apply_inc(running, change_deltas(None, doc))
+
+    for i in range(0, 60, 5):
+        before = records[i]
+        records[i] = {**before, "age": before["age"] + 3, "stroke": 1 - before["stroke"]}
+        _apply_inc(running, change_deltas(before, records[i]))
+    for i in range(1, 60, 9):
+        _apply_inc(running, change_deltas(records.pop(i), None))
+
+    summary = summary_from_running(running)
+    df = pd.DataFrame(list(records.values())).rename(columns={"residence_type": "Residence_type"})
+    df["bmi"] = df["bmi"].astype(float)
+    expected = compute_summary(df.drop(columns=["patient_id"]))
+
+    assert summary["kpis"] == expected["kpis"]
+    assert summary["value_counts"]["stroke"] == expected["value_counts"]["stroke"]
+    assert summary["value_counts"]["Residence_type"] == expected["value_counts"]["Residence_type"]
+    assert sum(summary["histograms"]["age"]["counts"]) == len(records)
+    assert np.allclose(
+        np.array(summary["correlation"]["matrix"], dtype=float),
+        np.array(expected["correlation"]["matrix"], dtype=float),
+        atol=2e-4,
+    )
+
+
+def test_unchanged_fields_produce_no_deltas():
+    doc = {"age": 50, "gender": "Male", "stroke": 0, "bmi": 30.0}
+    assert change_deltas(doc, dict(doc)) == {}
+
+
+class _StatsCollection:
+    def __init__(self):
+        self.doc = None
+
+    def find_one(self, query):
+        return self.doc
+
+
+def test_missing_summary_is_built_once_for_concurrent_requests(monkeypatch):
+    """
+    Dashboard requests arriving while the summary document is missing
+    share one rebuild rather than each aggregating the collection.
+    """
+    stats_coll = _StatsCollection()
+    builds = []
+
+    def rebuild(patients_coll, coll):
+        builds.append(1)
+        time.sleep(0.05)
+        coll.doc = {"_id": "patients", "format": patient_stats.STATS_FORMAT, "stats": {"total": 0}}
+        return coll.doc
+
+    monkeypatch.setattr(patient_stats, "rebuild_patient_stats", rebuild)
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(load_running_summary(None, stats_coll, 0, None))
+        )
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(builds) == 1
+    assert len(results) == 5
+    assert all(r["kpis"]["total_records"] == 0 for r in results)
@@ -0,0 +1,82 @@
+# tests/test_user_cache.py
+import time
+
+from app.models import AppUser, load_user
+from app.user_cache import UserCache, user_cache
+
+
+def _record(user_id, username="alice"):
+    return {"id": user_id, "username": username, "password_hash": "x"}
+
+
+def test_hits_and_misses_are_counted():
+    """
+    A cached record is returned until invalidated, and lookups are counted.
+    """
+    cache = UserCache(ttl=60, max_entries=10)
+    assert cache.get(1) is None
+    cache.put(1, _record(1))
+
+    assert cache.get(1)["username"] == "alice"
+    cache.invalidate(1)
+    assert cache.get(1) is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["hit_rate"] == round(1 / 3, 4)
+    assert stats["invalidations"] == 1
+
+
+def test_entries_expire_after_ttl():
+    """
+    An entry older than the TTL is treated as a miss and dropped.
+    """
+    cache = UserCache(ttl=0.01, max_entries=10)
+    cache.put(1, _record(1))
+    time.sleep(0.02)
+
+    assert cache.get(1) is None
+    assert cache.stats()["expired"] == 1
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    """
+    Beyond max_entries, the entry looked up longest ago goes first.
+    """
+    cache = UserCache(ttl=60, max_entries=2)
+    cache.put(1, _record(1))
+    cache.put(2, _record(2))
+    cache.get(1)
+    cache.put(3, _record(3))
+
+    assert cache.get(2) is None
+    assert cache.get(1) is not None
+    assert cache.get(3) is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_zero_ttl_disables_the_cache():
+    cache = UserCache(ttl=0, max_entries=10)
+    cache.put(1, _record(1))
+    assert cache.get(1) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_load_user_is_served_from_the_cache(app):
+    """
+    A cached user is rebuilt without touching the users table.
+    """
+    # No such row exists, so a database lookup would return None
+    user_id = 987_654_321
+    user_cache.put(user_id, _record(user_id, "cached-user"))
+    try:
+        with app.app_context():
+            user = load_user(str(user_id))
+        assert isinstance(user, AppUser)
+        assert user.id == user_id
+        assert user.username == "cached-user"
+        assert user.is_authenticated
+    finally:
+        user_cache.invalidate(user_id)